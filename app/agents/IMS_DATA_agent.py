@@ -3,31 +3,126 @@ IMS Data Agent module for enriching fire events with real-time weather data from
 This agent finds the nearest weather station to a fire event and retrieves current meteorological conditions.
 """
 
+import asyncio
 import os
+import threading
 import time
 
-import requests
+import httpx
 from dotenv import load_dotenv
 
-from app.services.ims_stations_service import get_nearest_station
+from app.services.ims_stations_service import get_nearest_stations
 
 load_dotenv()
 IMS_TOKEN = os.getenv("IMS_TOKEN")
 IMS_BASE_URL = "https://api.ims.gov.il/v1/envista/stations"
 
-# Persistent session for IMS API requests with required authentication and headers
-ims_session = requests.Session()
-ims_session.headers.update({
+# Authentication and browser headers required by the IMS API, sent on every request through the shared client
+IMS_HEADERS = {
     "Authorization": f"ApiToken {IMS_TOKEN}",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Accept": "application/json",
     "Referer": "https://ims.gov.il/"
-})
+}
 
+# Latest station readings are reused for this long across events and cycles
+IMS_OBSERVATION_TTL_SECONDS = float(os.getenv("IMS_OBSERVATION_TTL_SECONDS", 600))
+# Number of nearest stations tried, in order, when a station reports no data
+IMS_STATION_CANDIDATES = 3
 
-def enrich_with_ims(fire_event):
+
+class ImsObservationCache:
+    """
+    Short-lived cache of the latest reading per IMS station. Concurrent callers asking for the same station share one in-flight request, so nearby fires cost a single fetch per station per TTL.
+    """
+
+    def __init__(self, ttl_seconds=IMS_OBSERVATION_TTL_SECONDS):
+        """Initializes an empty cache with the given time-to-live in seconds."""
+        self.ttl_seconds = ttl_seconds
+        self._observations = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Drops every cached reading."""
+        with self._lock:
+            self._observations.clear()
+
+    def peek(self, station_id):
+        """Returns (True, reading) for a fresh cached reading of the station (the reading may be None for a station with no data), or (False, None) on a miss."""
+        with self._lock:
+            entry = self._observations.get(station_id)
+        if entry and time.time() - entry[0] < self.ttl_seconds:
+            return True, entry[1]
+        return False, None
+
+    async def get_latest(self, station_id, client):
+        """Returns the station's latest reading (the first record of the IMS 'data' list, or None when the station has no data), fetching it through the shared async client only on a cache miss and coalescing concurrent misses into one request. Raises if the fetch fails."""
+        hit, reading = self.peek(station_id)
+        if hit:
+            return reading
+
+        loop = asyncio.get_running_loop()
+        task = self._in_flight.get(station_id)
+        # Each monitor cycle runs its own event loop, so only tasks of the current loop can be shared
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(self._fetch(station_id, client))
+            self._in_flight[station_id] = task
+            task.add_done_callback(lambda done: self._in_flight.pop(station_id, None)
+                                   if self._in_flight.get(station_id) is done else None)
+
+        # Shielded so one cancelled waiter does not cancel the fetch other events are waiting on
+        return await asyncio.shield(task)
+
+    async def _fetch(self, station_id, client):
+        """Requests the station's latest data and stores it in the cache."""
+        url = f"{IMS_BASE_URL}/{station_id}/data/latest"
+        # Connect timeout 3s, read timeout 10s
+        response = await client.get(url, headers=IMS_HEADERS, timeout=httpx.Timeout(10.0, connect=3.0))
+
+        # Check if response is valid JSON (not HTML error page)
+        if response.status_code != 200 or response.text.strip().startswith("<"):
+            raise RuntimeError(f"Server blocked/failed ({response.status_code}) for station {station_id}")
+
+        json_response = response.json()
+        reading = json_response["data"][0] if json_response.get("data") else None
+
+        with self._lock:
+            self._observations[station_id] = (time.time(), reading)
+        return reading
+
+    async def prefetch(self, station_ids, client):
+        """Fetches the latest reading of every given station that is not already cached, concurrently. Returns the number of stations fetched."""
+        missing = [station_id for station_id in set(station_ids) if not self.peek(station_id)[0]]
+        results = await asyncio.gather(*(self.get_latest(station_id, client) for station_id in missing),
+                                       return_exceptions=True)
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        if failed:
+            print(f"⚠️ IMS prefetch: {failed}/{len(missing)} stations failed.")
+        return len(missing) - failed
+
+
+observation_cache = ImsObservationCache()
+
+
+async def prefetch_ims_observations(lats, lons, client):
+    """
+    Warms the observation cache with the latest readings of the stations nearest to the given coordinates (typically the cycle's new detections), so IMS enrichment of the resulting events is a dictionary lookup.
     """
-    Enriches a fire event with real-time weather data from the nearest IMS weather station. Updates the fire_event object with temperature, humidity, wind speed/direction, rain, gusts, and radiation data retrieved from IMS API with retry logic.
+    if not IMS_TOKEN:
+        return 0
+
+    start_time = time.time()
+    station_ids = {candidates[0]['id'] for candidates in get_nearest_stations(lats, lons, k=1) if candidates}
+    fetched = await observation_cache.prefetch(station_ids, client)
+    print(f"🕵️ IMS prefetch: {fetched} station readings fetched for {len(station_ids)} stations "
+          f"in {(time.time() - start_time):.1f} seconds")
+    return fetched
+
+
+async def enrich_with_ims(fire_event, client):
+    """
+    Enriches a fire event with real-time weather data from the nearest IMS weather station that reports data, falling back to the next-nearest stations when one is empty. Updates the fire_event object with temperature, humidity, wind speed/direction, rain, gusts, and radiation data retrieved from IMS API through the shared async HTTP client, which retries transient failures with backoff. Station readings come from the short-TTL observation cache, so events near the same station share one request.
     """
     start_time = time.time()
     print(f"🕵️ IMS Agent: Working on Event #{fire_event.id}...")
@@ -42,80 +137,67 @@ def enrich_with_ims(fire_event):
         lat = fire_event.latitude
         lon = fire_event.longitude
 
-        # Find the closest weather station to the fire location
-        station = get_nearest_station(lat, lon)
-        if not station:
+        # Find the closest weather stations to the fire location, nearest first
+        candidates = get_nearest_stations([lat], [lon], k=IMS_STATION_CANDIDATES)[0]
+        if not candidates:
             print("⚠️ IMS Agent: No station found nearby.")
             return
 
-        station_id = station['id']
-        station_name = station['name']
-
-        # Build API endpoint URL for the station's latest data
-        url = f"{IMS_BASE_URL}/{station_id}/data/latest"
-
-        max_retries = 3
+        latest = None
+        for station in candidates:
+            station_id = station['id']
+            station_name = station['name']
 
-        # Retry loop to handle transient API failures
-        for attempt in range(1, max_retries + 1):
+            # Served from the observation cache when this station was read recently
             try:
-                response = ims_session.get(url, timeout=(3.0, 10.0))
-
-                # Check if response is valid JSON (not HTML error page)
-                if response.status_code != 200 or response.text.strip().startswith("<"):
-                    print(f"   🔄 IMS Error (Attempt {attempt}/{max_retries}): Server blocked/failed. Retrying in 3s...")
-                    time.sleep(0.5)
-                    continue
-
-                json_response = response.json()
-
-                # Verify data structure contains expected fields
-                if "data" not in json_response or not json_response["data"]:
-                    print(f"⚠️ IMS Empty Data: Station {station_name}")
-                    return
-
-                latest = json_response["data"][0]
-                channels = latest.get("channels", [])
-
-                # Associate the station ID with this fire event
-                fire_event.ims_station_id = station_id
-
-                rain_val = 0.0
-
-                # Parse weather channels and map to fire event attributes
-                for channel in channels:
-                    name = channel.get("name")
-                    val = channel.get("value")
-
-                    if val is not None:
-                        if name == "TD":
-                            fire_event.ims_temp = val
-                        elif name == "RH":
-                            fire_event.ims_humidity = val
-                        elif name == "WS":
-                            fire_event.ims_wind_speed = val
-                        elif name == "WD":
-                            fire_event.ims_wind_dir = int(val)
-                        elif name == "Rain":
-                            rain_val = val
-                        elif name == "WSmax":
-                            fire_event.ims_wind_gust = val
-                        elif name == "Grad":
-                            fire_event.ims_radiation = val
-
-                # Assign rain value to fire event
-                fire_event.ims_rain = rain_val
-
-                print(f"✅ IMS Updated: {station_name} ({fire_event.ims_temp}°C)")
-                total_time = time.time() - start_time
-                print(f"⏱️ IMS Agent Time: {total_time:.1f} seconds")
-                return
-
+                latest = await observation_cache.get_latest(station_id, client)
             except Exception as e:
-                print(f"⚠️ IMS Connection Warning (Attempt {attempt}): {e}")
-                time.sleep(0.5)
+                print(f"❌ IMS Failed for {station_name}: {e}")
+                continue
+
+            if latest:
+                break
+            # Station has no current data, try the next-nearest one
+            print(f"⚠️ IMS Empty Data: Station {station_name}")
 
-        print(f"❌ IMS Failed after {max_retries} attempts for {station_name}")
+        if not latest:
+            print(f"❌ IMS: none of the {len(candidates)} nearest stations returned data for Event #{fire_event.id}")
+            return
+
+        channels = latest.get("channels", [])
+
+        # Associate the station ID with this fire event
+        fire_event.ims_station_id = station_id
+
+        rain_val = 0.0
+
+        # Parse weather channels and map to fire event attributes
+        for channel in channels:
+            name = channel.get("name")
+            val = channel.get("value")
+
+            if val is not None:
+                if name == "TD":
+                    fire_event.ims_temp = val
+                elif name == "RH":
+                    fire_event.ims_humidity = val
+                elif name == "WS":
+                    fire_event.ims_wind_speed = val
+                elif name == "WD":
+                    fire_event.ims_wind_dir = int(val)
+                elif name == "Rain":
+                    rain_val = val
+                elif name == "WSmax":
+                    fire_event.ims_wind_gust = val
+                elif name == "Grad":
+                    fire_event.ims_radiation = val
+
+        # Assign rain value to fire event
+        fire_event.ims_rain = rain_val
+
+        print(f"✅ IMS Updated: {station_name} ({fire_event.ims_temp}°C)")
+        total_time = time.time() - start_time
+        print(f"⏱️ IMS Agent Time: {total_time:.1f} seconds")
 
     except Exception as e:
         total_time = time.time() - start_time
@@ -1,13 +1,27 @@
-import math
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import numpy as np
 import pulp
 import requests
 from pyproj import Geod
 from shapely.geometry import shape
 
 from app.extensions import db
+from app.geo.distance import haversine_km, haversine_matrix, nearest_neighbor
+from app.geo.station_index import get_station_index
 from app.models.fire_events import FireEvent
+from app.services.local_router import get_local_router
+from app.services.travel_time_cache import TravelTimeCache
+
+# Maximum number of coordinates (sources + destinations) accepted by the OSRM server in a single Table request
+OSRM_MAX_TABLE_COORDS = int(os.environ.get('OSRM_MAX_TABLE_COORDS', 100))
+# Districts whose dispatch summaries are generated by the LLM concurrently
+DISTRICT_SUMMARY_WORKERS = int(os.environ.get('DISTRICT_SUMMARY_WORKERS', 4))
+# Dispatch MILP: wall-clock time limit per solve (seconds) and relative MIP gap at which CBC may stop
+MILP_TIME_LIMIT_SECONDS = float(os.environ.get('MILP_TIME_LIMIT_SECONDS', 10))
+MILP_GAP_REL = float(os.environ.get('MILP_GAP_REL', 0.01))
 
 
 class CommanderAgent:
@@ -23,19 +37,16 @@ class CommanderAgent:
 
     @staticmethod
     def _calculate_distance(lat1, lon1, lat2, lon2):
-        """Calculate aerial distance in kilometers between two geographic coordinates using the Haversine formula, which accounts for Earth's spherical shape."""
-        R = 6371.0  # Earth's radius in km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(
-            dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        """Calculate aerial distance in kilometers between two geographic coordinates using the shared Haversine kernel, which accounts for Earth's spherical shape."""
+        return haversine_km(lat1, lon1, lat2, lon2)
 
     def __init__(self):
-        """Initialize the Commander Agent with a geoid object for precise Earth surface distance calculations (WGS84 ellipsoid) and a persistent HTTP session for external API calls."""
+        """Initialize the Commander Agent with a geoid object for precise Earth surface distance calculations (WGS84 ellipsoid), a persistent HTTP session for external API calls, the persistent travel-time cache and the optional offline routing engine."""
         self.geod = Geod(ellps="WGS84")
         self.http_session = requests.Session()
+        self.travel_time_cache = TravelTimeCache()
+        # Offline road-graph router (None unless ROUTING_BACKEND=local and the graph loaded successfully)
+        self.local_router = get_local_router()
 
     def step1_calculate_demands(self):
         """Iterate over all active fire events with prediction polygons, calculate the polygon perimeter in meters to determine defense line requirements, and persist the demand values to the database."""
@@ -136,17 +147,13 @@ class CommanderAgent:
 
     def _allocate_enabler_eshed(self, fire, available_esheds, allocated_set):
         """Find and assign the closest available ESHED water tanker to support SAAR vehicles at a fire event, updating its status to EN_ROUTE and tracking it in the allocated set."""
-        closest_eshed = None
-        min_dist = float('inf')
-
         # Search for the closest ESHED that hasn't been assigned yet
-        for eshed in available_esheds:
-            if eshed.id in allocated_set or eshed.status != 'AVAILABLE':
-                continue
-            dist = self._calculate_distance(fire.latitude, fire.longitude, eshed.current_lat, eshed.current_lon)
-            if dist < min_dist:
-                min_dist = dist
-                closest_eshed = eshed
+        candidates = [eshed for eshed in available_esheds
+                      if eshed.id not in allocated_set and eshed.status == 'AVAILABLE']
+        closest_index, min_dist = nearest_neighbor(fire.latitude, fire.longitude,
+                                                   [eshed.current_lat for eshed in candidates],
+                                                   [eshed.current_lon for eshed in candidates])
+        closest_eshed = candidates[closest_index] if closest_index is not None else None
 
         # If found an ESHED, assign it
         if closest_eshed:
@@ -159,22 +166,8 @@ class CommanderAgent:
             print(f"⚠️ Critical Warning: No available ESHED vehicles remaining to support fire {fire.id}!")
             return None
 
-    def _assign_district_to_fire(self, fire, all_stations):
-        """Find the closest fire station to the fire event and return the district name of that station for regional resource allocation."""
-        closest_station = None
-        min_dist = float('inf')
-
-        for station in all_stations:
-            dist = self._calculate_distance(fire.latitude, fire.longitude, station.latitude, station.longitude)
-            if dist < min_dist:
-                min_dist = dist
-                closest_station = station
-
-        # Return the district name, or default value if not found
-        return closest_station.district if closest_station else "UNKNOWN"
-
     def _get_eta_matrix(self, resources, fires):
-        """Calculate travel time matrix using OSRM Table API in a single centralized request for all resource-fire combinations, significantly reducing computation time with fallback to mathematical estimation if API fails."""
+        """Calculate travel time matrix for all resource-fire combinations, reusing cells from the persistent travel-time cache and requesting only the missing station/fire pairs from the OSRM Table API in batched requests, with fallback to mathematical estimation for any pair the API fails to answer."""
         matrix = {res.id: {} for res in resources}
 
         # Merge resources at the same station to avoid duplicate coordinates
@@ -187,179 +180,296 @@ class CommanderAgent:
 
         unique_stations = list(stations_dict.keys())
 
+        # Reuse every station/fire cell that is already cached (key: station coordinate + snapped fire location)
+        cache_keys = {
+            (i, j): self.travel_time_cache.key_for(lat, lon, fire.latitude, fire.longitude)
+            for i, (lon, lat) in enumerate(unique_stations)
+            for j, fire in enumerate(fires)
+        }
+        cached = self._cache_lookup(cache_keys.values())
+        durations = {ij: cached[key] for ij, key in cache_keys.items() if key in cached}
+
+        missing = [ij for ij in cache_keys if ij not in durations]
+        if cache_keys:
+            print(f"   🗃️ Travel-time cache: {len(durations)}/{len(cache_keys)} cells reused, {len(missing)} missing.")
+
+        if missing:
+            # Request only the sub-matrix of stations and fires that have at least one missing cell
+            missing_stations = sorted({i for i, _ in missing})
+            missing_fires = sorted({j for _, j in missing})
+            fetched = self._fetch_travel_times(
+                [unique_stations[i] for i in missing_stations],
+                [(fires[j].longitude, fires[j].latitude) for j in missing_fires]
+            )
+
+            new_entries = {}
+            for (a, b), duration_seconds in fetched.items():
+                ij = (missing_stations[a], missing_fires[b])
+                durations[ij] = duration_seconds
+                new_entries[cache_keys[ij]] = duration_seconds
+            self._cache_store(new_entries)
+
+        # Fallback mechanism: pairs the API could not answer use quick mathematical calculation (offline)
+        fallback_eta = None
+        if len(durations) < len(cache_keys):
+            print("🔄 Computing missing cells using local offline engine...")
+            dist_km = haversine_matrix([lat for _, lat in unique_stations], [lon for lon, _ in unique_stations],
+                                       [fire.latitude for fire in fires], [fire.longitude for fire in fires])
+            fallback_eta = (dist_km * 1.3) / 60.0
+
+        # Decode the matrix and assign back to each resource in the system
+        for i, station_loc in enumerate(unique_stations):
+            for j, fire in enumerate(fires):
+                if (i, j) not in durations:
+                    eta_hours = float(fallback_eta[i, j])
+                elif durations[(i, j)] is not None:
+                    eta_hours = durations[(i, j)] / 3600.0  # Convert from seconds to hours
+                else:
+                    eta_hours = 999.0  # Not accessible
+
+                # Update this time for all resources at that station
+                for res in stations_dict[station_loc]:
+                    matrix[res.id][fire.id] = eta_hours
+
+        return matrix
+
+    def _fetch_travel_times(self, sources, destinations):
+        """Fetch the full sources x destinations travel time table from the offline road graph when configured, otherwise from the OSRM Table API split into blocks that respect the server's coordinate limit. Returns a dictionary mapping (source index, destination index) to duration in seconds (None where no road exists); cells of failed blocks are left out so the caller can fall back."""
+        if not sources or not destinations:
+            return {}
+
+        if self.local_router is not None:
+            try:
+                print(f"   🛣️ Local router: computing {len(sources)}x{len(destinations)} travel time table offline...")
+                table = self.local_router.table(sources, destinations)
+                return {(a, b): seconds for a, row in enumerate(table) for b, seconds in enumerate(row)}
+            except Exception as e:
+                print(f"⚠️ Local router error (switching to OSRM HTTP): {e}")
+
+        # Give destinations up to half of each request, and fill the rest with sources
+        dest_chunk = max(1, min(len(destinations), OSRM_MAX_TABLE_COORDS // 2))
+        source_chunk = max(1, OSRM_MAX_TABLE_COORDS - dest_chunk)
+
+        fetched = {}
+        for s0 in range(0, len(sources), source_chunk):
+            for d0 in range(0, len(destinations), dest_chunk):
+                block = self._fetch_osrm_table(sources[s0:s0 + source_chunk], destinations[d0:d0 + dest_chunk])
+                if block is None:
+                    continue
+                for a, row in enumerate(block):
+                    for b, duration_seconds in enumerate(row):
+                        fetched[(s0 + a, d0 + b)] = duration_seconds
+        return fetched
+
+    def _fetch_osrm_table(self, sources, destinations):
+        """Request a travel time table from the OSRM Table API for the given source and destination (lon, lat) coordinates in a single call, returning a nested list of durations in seconds (None where no road exists) or None if the request failed."""
         # Build coordinate array: first all stations (sources), then all fires (destinations)
-        coords = [f"{lon},{lat}" for lon, lat in unique_stations]
-        coords += [f"{fire.longitude},{fire.latitude}" for fire in fires]
+        coords = [f"{lon},{lat}" for lon, lat in sources]
+        coords += [f"{lon},{lat}" for lon, lat in destinations]
 
         # Create indices for sources and destinations
-        sources_indices = ";".join(str(i) for i in range(len(unique_stations)))
-        dest_indices = ";".join(str(i + len(unique_stations)) for i in range(len(fires)))
+        sources_indices = ";".join(str(i) for i in range(len(sources)))
+        dest_indices = ";".join(str(i + len(sources)) for i in range(len(destinations)))
 
         # Build URL for Table service
         coords_string = ";".join(coords)
         url = f"http://router.project-osrm.org/table/v1/driving/{coords_string}?sources={sources_indices}&destinations={dest_indices}"
 
         try:
-            print(f"   🌐 Sending centralized OSRM Table request ({len(unique_stations)} station locations vs {len(fires)} targets)...")
+            print(f"   🌐 Sending centralized OSRM Table request ({len(sources)} station locations vs {len(destinations)} targets)...")
 
             response = self.http_session.get(url, timeout=10.0)
             response.raise_for_status()
             data = response.json()
 
             if data.get("code") == "Ok":
-                # Server returns a matrix (2D array) of travel times in seconds
-                durations = data["durations"]
-
-                # Decode the matrix and assign back to each resource in the system
-                for i, station_loc in enumerate(unique_stations):
-                    for j, fire in enumerate(fires):
-                        duration_seconds = durations[i][j]
-
-                        # Server returns None if no road exists (e.g., crossing sea/border)
-                        if duration_seconds is not None:
-                            eta_hours = duration_seconds / 3600.0  # Convert from seconds to hours
-                        else:
-                            eta_hours = 999.0  # Not accessible
-
-                        # Update this time for all resources at that station
-                        for res in stations_dict[station_loc]:
-                            matrix[res.id][fire.id] = eta_hours
-
-                print("   ⚡ OSRM Table API: Complete matrix returned successfully in a single call!")
-                return matrix
+                # Server returns a matrix (2D array) of travel times in seconds, None if no road exists (e.g., crossing sea/border)
+                print("   ⚡ OSRM Table API: Matrix returned successfully in a single call!")
+                return data["durations"]
             else:
                 print(f"⚠️ Server Error: {data.get('code')}")
 
         except Exception as e:
             print(f"🔌 OSRM Table API Error (switching to mathematical fallback): {e}")
 
-        # Fallback mechanism: if API failed, use quick mathematical calculation (offline)
-        print("🔄 Computing matrix using local offline engine...")
-        for res in resources:
-            for fire in fires:
-                dist_km = self._calculate_distance(res.current_lat, res.current_lon, fire.latitude, fire.longitude)
-                eta_hours = (dist_km * 1.3) / 60.0
-                matrix[res.id][fire.id] = eta_hours
+        return None
 
-        return matrix
+    def _cache_lookup(self, keys):
+        """Read travel times from the persistent cache, treating any cache failure as a full miss so routing never depends on the cache being available."""
+        try:
+            return self.travel_time_cache.get_many(keys)
+        except Exception as e:
+            print(f"⚠️ Travel-time cache unavailable (read): {e}")
+            return {}
+
+    def _cache_store(self, entries):
+        """Write freshly fetched travel times to the persistent cache, logging and ignoring any cache failure."""
+        try:
+            self.travel_time_cache.put_many(entries)
+        except Exception as e:
+            print(f"⚠️ Travel-time cache unavailable (write): {e}")
+
+    def _feasible_pairs(self, unsolved_fires, math_survivors, eta_matrix, time_horizon_hours, fire_demands):
+        """Return a dictionary mapping each (resource id, fire id) pair worth a MILP variable to its net yield: pairs where the resource arrives within the time horizon at a fire with remaining demand, minus pairs dominated by faster resources of the same type."""
+        net_yields = {}
+        for resource in math_survivors:
+            for fire in unsolved_fires:
+                if fire_demands[fire.id] <= 0:
+                    continue
+                net_yield = self.get_net_yield(resource.resource_type, fire, eta_matrix[resource.id][fire.id],
+                                               time_horizon_hours)
+                if net_yield > 0:
+                    net_yields[resource.id, fire.id] = net_yield
+
+        # Every assignment has a positive cost, so an optimal allocation has no redundant resource: a fire gets fewer
+        # than demand / smallest yield + 1 of them, which bounds the number of resources dispatched in the arena
+        pairs_by_fire = {}
+        for r, f in net_yields:
+            pairs_by_fire.setdefault(f, []).append(r)
+        max_dispatched = sum(min(len(res_ids), int(fire_demands[f] // min(net_yields[r, f] for r in res_ids)) + 1)
+                             for f, res_ids in pairs_by_fire.items())
+
+        # A slower resource of the same type costs more and yields less at the same fire, so once max_dispatched faster
+        # ones exist, one of them is always free to take its place and the slower pair can be dropped
+        resource_types = {resource.id: resource.resource_type for resource in math_survivors}
+        kept = {}
+        for f, res_ids in pairs_by_fire.items():
+            by_type = {}
+            for r in res_ids:
+                by_type.setdefault(resource_types[r], []).append(r)
+            for same_type in by_type.values():
+                same_type.sort(key=lambda r: (eta_matrix[r][f], r))
+                for r in same_type[:max_dispatched]:
+                    kept[r, f] = net_yields[r, f]
+        return kept
 
     def step4_optimize_and_dispatch(self, unsolved_fires, math_survivors, eta_matrix, time_horizon_hours, fire_demands,
                                     allocated_in_this_cycle, available_supply, llm_summary, district_name):
-        """Execute Mixed Integer Linear Programming (MILP) optimization to allocate resources to fires based on weighted cost function (SDI, resource power, travel time), then dispatch assigned resources and collect data for LLM summary generation."""
+        """Execute Mixed Integer Linear Programming (MILP) optimization to allocate resources to fires based on weighted cost function (SDI, resource power, travel time), then dispatch assigned resources and collect data for LLM summary generation. The model only holds variables for feasible, non-dominated pairs and CBC stops at the configured time limit or MIP gap."""
         print("     🧠 Activating global optimization engine (MILP) for arena...")
         prob = pulp.LpProblem("Fire_Resource_Allocation", pulp.LpMinimize)
 
         fire_ids = [f.id for f in unsolved_fires]
-        res_ids = [r.id for r in math_survivors]
 
         fire_dict = {f.id: f for f in unsolved_fires}
         res_dict = {r.id: r for r in math_survivors}
 
-        # Boolean variable for each combination of resource and fire
-        assign_vars = pulp.LpVariable.dicts("Assign",
-                                            ((r, f) for r in res_ids for f in fire_ids),
-                                            cat='Binary')
+        # Sparse formulation: a boolean variable only for pairs that can contribute to a fire's demand
+        net_yields = self._feasible_pairs(unsolved_fires, math_survivors, eta_matrix, time_horizon_hours, fire_demands)
+        pairs = list(net_yields)
+        print(f"     🧮 Model size: {len(pairs)} of {len(math_survivors) * len(fire_ids)} resource-fire pairs, "
+              f"{len({r for r, _ in pairs})} of {len(math_survivors)} resources.")
+
+        reachable_fires = {f for _, f in pairs}
+        uncovered = [f for f in fire_ids if fire_demands[f] > 0 and f not in reachable_fires]
+        if uncovered:
+            print(f"     ❌ No resource can reach fires {uncovered} within the time window.")
+            return False
+
+        assign_vars = pulp.LpVariable.dicts("Assign", pairs, cat='Binary')
 
         # Calculate three-layer cost function (Cost Matrix)
         costs = {}
-        for r in res_ids:
-            resource = res_dict[r]
+        for r, f in pairs:
             # Second layer: penalty for resource power (to preserve reserves)
-            resource_power_penalty = self.BASE_PRODUCTION_RATES.get(resource.resource_type, 0.0)
+            resource_power_penalty = self.BASE_PRODUCTION_RATES.get(res_dict[r].resource_type, 0.0)
+            eta_hours = eta_matrix[r][f]
 
-            for f in fire_ids:
-                eta_hours = eta_matrix[r][f]
+            # Build weighted cost: SDI (10,000) > resource type > travel time
+            base_penalty = 10000.0
+            power_penalty = resource_power_penalty
+            time_penalty = eta_hours * 100.0
 
-                # Build weighted cost: SDI (10,000) > resource type > travel time
-                base_penalty = 10000.0
-                power_penalty = resource_power_penalty
-                time_penalty = eta_hours * 100.0
-
-                costs[r, f] = base_penalty + power_penalty + time_penalty
+            costs[r, f] = base_penalty + power_penalty + time_penalty
 
         # Define objective function
         # Engine will try to minimize total of these costs
-        prob += pulp.lpSum(assign_vars[r, f] * costs[r, f] for r in res_ids for f in fire_ids), "Minimize_Total_Cost"
+        prob += pulp.lpSum(assign_vars[pair] * costs[pair] for pair in pairs), "Minimize_Total_Cost"
+
+        pairs_by_res = {}
+        pairs_by_fire = {}
+        for r, f in pairs:
+            pairs_by_res.setdefault(r, []).append((r, f))
+            pairs_by_fire.setdefault(f, []).append((r, f))
 
         # Constraint 1: each resource sent to maximum one fire
-        for r in res_ids:
-            prob += pulp.lpSum(assign_vars[r, f] for f in fire_ids) <= 1
+        for res_pairs in pairs_by_res.values():
+            if len(res_pairs) > 1:
+                prob += pulp.lpSum(assign_vars[pair] for pair in res_pairs) <= 1
 
-        # Constraint 2: satisfy demand for each fire
-        for f in fire_ids:
-            current_fire = fire_dict[f]
-            demand = fire_demands[f]  # Use updated remaining demand
+        # Constraint 2: satisfy demand for each fire (use updated remaining demand)
+        for f, fire_pairs in pairs_by_fire.items():
+            prob += pulp.lpSum(assign_vars[pair] * net_yields[pair] for pair in fire_pairs) >= fire_demands[f]
 
-            yield_sum = []
-            for r in res_ids:
-                eta_hours = eta_matrix[r][f]
-                net_yield = self.get_net_yield(res_dict[r].resource_type, current_fire, eta_hours, time_horizon_hours)
-                yield_sum.append(assign_vars[r, f] * net_yield)
+        # Solve without internal console messages, within the dispatch time budget
+        prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=MILP_TIME_LIMIT_SECONDS, timeMode="elapsed",
+                                     gapRel=MILP_GAP_REL))
 
-            prob += pulp.lpSum(yield_sum) >= demand
+        # An integer-feasible incumbent (time limit or gap reached) is dispatched as well
+        if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return False
 
-        # Solve without internal console messages
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        chosen = {pair for pair in pairs if (assign_vars[pair].varValue or 0.0) > 0.5}
 
-        if pulp.LpStatus[prob.status] == 'Optimal':
+        if prob.sol_status == pulp.LpSolutionOptimal:
             print("     ✅ Found optimal global solution for arena (weighted cost-based)!")
-            saar_counters = {f: 0 for f in fire_ids}
-
-            # Initialize district in JSON dictionary
-            if district_name not in llm_summary:
-                llm_summary[district_name] = {}
-
-            # Perform actual dispatch and collect data
-            for r in res_ids:
-                for f in fire_ids:
-                    if pulp.value(assign_vars[r, f]) == 1.0:
-                        selected_res = res_dict[r]
-                        target_fire = fire_dict[f]
-
-                        selected_res.status = 'EN_ROUTE'
-                        selected_res.assigned_event_id = target_fire.id
-                        allocated_in_this_cycle.add(selected_res.id)
-
-                        actual_eta_mins = eta_matrix[r][f] * 60
-                        print(
-                            f"       🚒 Assigned {selected_res.resource_type} vehicle to fire {target_fire.id} (ETA: {actual_eta_mins:.1f} min)")
-
-                        # Collect for JSON
-                        fire_key = f"fire_{target_fire.id}"
-                        if fire_key not in llm_summary[district_name]:
-                            llm_summary[district_name][fire_key] = {
-                                "status": "ACTIVELY_DISPATCHING",
-                                "location": {
-                                    "lat": target_fire.latitude,
-                                    "lon": target_fire.longitude
-                                },
-                                "resources": []
-                            }
-
-                        llm_summary[district_name][fire_key]["resources"].append({
-                            "type": selected_res.resource_type,
-                            "eta_minutes": round(actual_eta_mins, 1),
-                            "station": selected_res.station.name if selected_res.station else "Unknown"
-                        })
-
-                        # Enabler protocol: assign ESHED tanker for every 3 SAAR vehicles
-                        if selected_res.resource_type == "SAAR":
-                            saar_counters[f] += 1
-                            if saar_counters[f] % 3 == 0:
-                                allocated_eshed = self._allocate_enabler_eshed(target_fire,
-                                                                               available_supply.get("ESHED", []),
-                                                                               allocated_in_this_cycle)
-                                if allocated_eshed:
-                                    eshed_eta = self._get_driving_eta_minutes(
-                                        allocated_eshed.current_lon, allocated_eshed.current_lat,
-                                        target_fire.longitude, target_fire.latitude
-                                    )
-                                    llm_summary[district_name][fire_key]["resources"].append(
-                                        {"type": "ESHED (Water Supply)", "eta_minutes": round(eshed_eta, 1),
-                                         "station": allocated_eshed.station.name if allocated_eshed.station else "Unknown"})
-            return True
         else:
-            return False
+            print("     ✅ Found integer-feasible solution for arena within the time limit (weighted cost-based)!")
+
+        saar_counters = {f: 0 for f in fire_ids}
+
+        # Initialize district in JSON dictionary
+        if district_name not in llm_summary:
+            llm_summary[district_name] = {}
+
+        # Perform actual dispatch and collect data
+        for r, f in pairs:
+            if (r, f) in chosen:
+                selected_res = res_dict[r]
+                target_fire = fire_dict[f]
+
+                selected_res.status = 'EN_ROUTE'
+                selected_res.assigned_event_id = target_fire.id
+                allocated_in_this_cycle.add(selected_res.id)
+
+                actual_eta_mins = eta_matrix[r][f] * 60
+                print(
+                    f"       🚒 Assigned {selected_res.resource_type} vehicle to fire {target_fire.id} (ETA: {actual_eta_mins:.1f} min)")
+
+                # Collect for JSON
+                fire_key = f"fire_{target_fire.id}"
+                if fire_key not in llm_summary[district_name]:
+                    llm_summary[district_name][fire_key] = {
+                        "status": "ACTIVELY_DISPATCHING",
+                        "location": {
+                            "lat": target_fire.latitude,
+                            "lon": target_fire.longitude
+                        },
+                        "resources": []
+                    }
+
+                llm_summary[district_name][fire_key]["resources"].append({
+                    "type": selected_res.resource_type,
+                    "eta_minutes": round(actual_eta_mins, 1),
+                    "station": selected_res.station.name if selected_res.station else "Unknown"
+                })
+
+                # Enabler protocol: assign ESHED tanker for every 3 SAAR vehicles
+                if selected_res.resource_type == "SAAR":
+                    saar_counters[f] += 1
+                    if saar_counters[f] % 3 == 0:
+                        allocated_eshed = self._allocate_enabler_eshed(target_fire,
+                                                                       available_supply.get("ESHED", []),
+                                                                       allocated_in_this_cycle)
+                        if allocated_eshed:
+                            eshed_eta = self._get_driving_eta_minutes(
+                                allocated_eshed.current_lon, allocated_eshed.current_lat,
+                                target_fire.longitude, target_fire.latitude
+                            )
+                            llm_summary[district_name][fire_key]["resources"].append(
+                                {"type": "ESHED (Water Supply)", "eta_minutes": round(eshed_eta, 1),
+                                 "station": allocated_eshed.station.name if allocated_eshed.station else "Unknown"})
+        return True
 
     def step5_update_resource_locations(self):
         """Update the location of each dispatched resource to the fire location and change status to NOT_AVAILABLE to prevent reassignment in subsequent allocation rounds."""
@@ -399,13 +509,15 @@ class CommanderAgent:
             print(f"   ❌ Error updating vehicle locations: {e}")
 
     def _generate_and_save_district_summaries(self, llm_summary_json):
-        """Process summary JSON by sending it to LLM agent for structured formatting, save the results to database, and broadcast structured summaries to React frontend via WebSockets."""
+        """Process summary JSON by sending each district's data to the LLM agent for structured formatting on a bounded thread pool, broadcast every district's structured summary to the React frontend via WebSockets as soon as it is ready, then save the tactical summaries and the operations log to the database in one transaction."""
         if not llm_summary_json:
             return
 
         import json
         import os
+        from flask import current_app
         from flask_socketio import SocketIO
+        from sqlalchemy import insert
         from app.extensions import db
         from app.models.commander_logs import CommandLog
         from app.agents.llm_agent import LLMAgent
@@ -417,61 +529,79 @@ class CommanderAgent:
         redis_url = os.environ.get('REDIS_URL')
         emitter = SocketIO(message_queue=redis_url) if redis_url else SocketIO()
 
-        for district, fires_data in llm_summary_json.items():
-            try:
-                # Get response from LLM
-                raw_summary_string = llm.summarize_dispatch(district, fires_data)
-                print(f"   ✅ Received raw LLM output for district {district}:\n      {raw_summary_string}\n")
-
-                # Convert string to Python object (dictionary)
-                try:
-                    structured_data = json.loads(raw_summary_string)
-                    # Extract recommendations array (or empty list if none)
-                    fires_allocation = structured_data.get("fires_allocation", [])
-
-                    for allocation in fires_allocation:
-                        if not isinstance(allocation, dict):
-                            print(f"      ⚠️ Skipping corrupted item in JSON for district {district}: {allocation}")
-                            continue
-
-                        event_id = allocation.get("event_id")
-                        tactical_summary = allocation.get("tactical_summary")
+        # Worker threads need their own application context (the LLM response cache may live in the database)
+        app = current_app._get_current_object()
 
-                        if event_id and tactical_summary:
-                            # Find specific fire and update its column
-                            fire_event = FireEvent.query.get(event_id)
-                            if fire_event:
-                                fire_event.tactical_summary = tactical_summary
+        def summarize(district, fires_data):
+            """Requests the structured dispatch summary of one district from the LLM agent."""
+            with app.app_context():
+                return llm.summarize_dispatch(district, fires_data)
 
-                    # Save all fire updates at once
-                    db.session.commit()
+        tactical_summaries = {}
+        log_rows = []
+        workers = max(1, min(DISTRICT_SUMMARY_WORKERS, len(llm_summary_json)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="district-summary") as pool:
+            futures = {pool.submit(summarize, district, fires_data): district
+                       for district, fires_data in llm_summary_json.items()}
 
-                except json.JSONDecodeError as e:
-                    print(f"❌ Error: LLM did not return valid JSON for {district}. Exception: {e}")
-                    structured_data = {
+            # Districts are handled in completion order, so a slow LLM answer does not hold back the others
+            for future in as_completed(futures):
+                district = futures[future]
+                try:
+                    # Get response from LLM
+                    raw_summary_string = future.result()
+                    print(f"   ✅ Received raw LLM output for district {district}:\n      {raw_summary_string}\n")
+
+                    # Convert string to Python object (dictionary)
+                    try:
+                        structured_data = json.loads(raw_summary_string)
+                        # Extract recommendations array (or empty list if none)
+                        fires_allocation = structured_data.get("fires_allocation", [])
+
+                        for allocation in fires_allocation:
+                            if not isinstance(allocation, dict):
+                                print(f"      ⚠️ Skipping corrupted item in JSON for district {district}: {allocation}")
+                                continue
+
+                            event_id = allocation.get("event_id")
+                            tactical_summary = allocation.get("tactical_summary")
+
+                            if event_id and tactical_summary:
+                                try:
+                                    tactical_summaries[int(event_id)] = tactical_summary
+                                except (TypeError, ValueError):
+                                    print(f"      ⚠️ Skipping invalid event id in JSON for district {district}: {event_id}")
+
+                    except json.JSONDecodeError as e:
+                        print(f"❌ Error: LLM did not return valid JSON for {district}. Exception: {e}")
+                        structured_data = {
+                            "district_name": district,
+                            "district_overview": "⚠️ Error formatting dispatch strategy.",
+                            "fires_allocation": []
+                        }
+
+                    # Operations log row (save string as-is), inserted together with the others after the loop
+                    log_rows.append({
                         "district_name": district,
-                        "district_overview": "⚠️ Error formatting dispatch strategy.",
-                        "fires_allocation": []
-                    }
-
-                # Save to database (save string as-is in operations log)
-                new_log = CommandLog(
-                    district_name=district,
-                    raw_json=fires_data,
-                    llm_summary_text=raw_summary_string
-                )
-                db.session.add(new_log)
+                        "raw_json": llm_summary_json[district],
+                        "llm_summary_text": raw_summary_string
+                    })
 
-                # Live broadcast to React - we broadcast the structured object
-                print(f"📡 Broadcasting structured commander summary for district {district} via WebSockets...")
-                emitter.emit('commander_update', structured_data)
-                print("Emitted commander_update event to WebSocket clients.")
+                    # Live broadcast to React - we broadcast the structured object
+                    print(f"📡 Broadcasting structured commander summary for district {district} via WebSockets...")
+                    emitter.emit('commander_update', structured_data)
+                    print("Emitted commander_update event to WebSocket clients.")
 
-            except Exception as e:
-                print(f"   ⚠️ Error creating LLM summary for district {district}: {e}")
+                except Exception as e:
+                    print(f"   ⚠️ Error creating LLM summary for district {district}: {e}")
 
-        # Final commit of operations log
+        # Update the tactical summaries of all allocated fires with a single lookup, then save the operations log
         try:
+            if tactical_summaries:
+                for fire_event in FireEvent.query.filter(FireEvent.id.in_(tactical_summaries)).all():
+                    fire_event.tactical_summary = tactical_summaries[fire_event.id]
+            if log_rows:
+                db.session.execute(insert(CommandLog), log_rows)
             db.session.commit()
             print("   💾 Operations log saved successfully to DB.")
         except Exception as e:
@@ -481,9 +611,9 @@ class CommanderAgent:
     def run_master_cycle(self):
         """Execute the main strategic command loop using Time-First Architecture to iteratively allocate resources to active fires across expanding time horizons until all demands are satisfied or time windows are exhausted."""
         from app.models.fire_events import FireEvent
-        from app.models.resources import Station
         from app.extensions import db
         from app.agents.predict_agent import FirePredictorAgent
+        from app.services.spread_engine import PREDICTION_HORIZONS_HOURS
 
         print("\n==================================================")
         print("🚀 Starting strategic command cycle (Master Cycle)...")
@@ -500,25 +630,45 @@ class CommanderAgent:
             print(f"⏱️ Master Cycle completed early (Early Return) in {time.time() - cycle_start_time:.2f} seconds.")
             return
 
-        all_stations = Station.query.all()
         available_supply = self._fetch_available_resources()
 
+        # Fill in the district for legacy fires that were stored without one (one batched station-index lookup)
+        missing_district = [fire for fire in active_fires if not fire.district]
+        if missing_district:
+            districts = get_station_index().districts_for([fire.latitude for fire in missing_district],
+                                                          [fire.longitude for fire in missing_district])
+            for fire, district in zip(missing_district, districts):
+                fire.district = district
+
         # Build arena dictionary by districts
         district_zones = {}
         for fire in active_fires:
-            d_name = self._assign_district_to_fire(fire, all_stations)
+            # Fires that could not be matched to a station (empty station table) share one arena
+            d_name = fire.district or "UNKNOWN"
             if d_name not in district_zones:
                 district_zones[d_name] = []
             district_zones[d_name].append(fire)
 
         print(f"🗺️ System grouped {len(active_fires)} fires into {len(district_zones)} district arenas.")
 
+        # Cycle-scoped travel time matrix: all available resources x all active fires, fetched once and sliced per arena
+        cycle_resources = [res for res_type, resources in available_supply.items() if res_type != "ESHED"
+                           for res in resources]
+        cycle_eta_matrix = self._get_eta_matrix(cycle_resources, active_fires)
+
         allocated_in_this_cycle = set()
         allocated_yield_per_fire = {fire.id: 0.0 for fire in active_fires}  # Track dispatch history
         fire_demands = {fire.id: 0.0 for fire in active_fires}
 
         predictor = FirePredictorAgent()
-        time_horizons = [1.0, 2.0, 3.0, 6.0, 12.0]  # Time windows (in hours)
+        time_horizons = list(PREDICTION_HORIZONS_HOURS)  # Time windows (in hours)
+
+        # All horizons are predicted up front in one vectorized pass; each window below only applies its own
+        try:
+            print(f"\n🔮 Predicting fire spread for all time windows {time_horizons}...")
+            predictor.predict_horizons(time_horizons)
+        except Exception as e:
+            print(f"⚠️ Error running multi-horizon prediction: {e}")
 
         # The main loop (Spatio-Temporal Loop)
         for target_hours in time_horizons:
@@ -533,7 +683,7 @@ class CommanderAgent:
 
             # Prediction and re-demand for current time
             try:
-                predictor.run_cycle(target_hours=target_hours)
+                predictor.apply_horizon(target_hours)
                 self.step1_calculate_demands()
             except Exception as e:
                 print(f"⚠️ Error running prediction/demand: {e}")
@@ -563,7 +713,7 @@ class CommanderAgent:
                     continue
 
                 # Phase A: Fast mathematical filter (who can reach the arena?)
-                math_survivors = []
+                candidates = []
                 for res_type, resources in available_supply.items():
                     if res_type == "ESHED": continue
 
@@ -574,21 +724,21 @@ class CommanderAgent:
                         if target_hours <= 1.0 and res.station.district != district_name:
                             continue
 
-                        # Can the vehicle reach at least one fire in the arena in time?
-                        can_reach = False
-                        for fire in unsolved_fires:
-                            dist = self._calculate_distance(fire.latitude, fire.longitude, res.current_lat,
-                                                            res.current_lon)
-                            fast_eta = (dist * 1.4) / 60.0
-                            if fast_eta < target_hours:
-                                can_reach = True
-                                break
-
-                        if can_reach:
-                            math_survivors.append(res)
+                        candidates.append(res)
 
-                # Phase B: Get accurate times from API
-                eta_matrix = self._get_eta_matrix(math_survivors, unsolved_fires)
+                # Can the vehicle reach at least one fire in the arena in time? (one distance matrix per arena)
+                math_survivors = []
+                if candidates:
+                    dist_km = haversine_matrix([res.current_lat for res in candidates],
+                                               [res.current_lon for res in candidates],
+                                               [fire.latitude for fire in unsolved_fires],
+                                               [fire.longitude for fire in unsolved_fires])
+                    fast_eta = (dist_km * 1.4) / 60.0
+                    can_reach = np.any(fast_eta < target_hours, axis=1)
+                    math_survivors = [res for res, reachable in zip(candidates, can_reach) if reachable]
+
+                # Phase B: Take this arena's view of the accurate cycle-wide travel times
+                eta_matrix = {res.id: cycle_eta_matrix[res.id] for res in math_survivors}
 
                 # Feasibility Check
                 total_potential_yield = 0.0
@@ -658,7 +808,20 @@ class CommanderAgent:
         return master_llm_summary
 
     def _get_driving_eta_minutes(self, start_lon, start_lat, dest_lon, dest_lat):
-        """Calculate driving time (ETA) in minutes between two points using OSRM routing API with fallback to aerial distance calculation if the server is unavailable."""
+        """Calculate driving time (ETA) in minutes between two points using the persistent travel-time cache or the OSRM routing API, with fallback to aerial distance calculation if the server is unavailable."""
+        # Reuse a cached duration for this station/fire cell if available
+        cache_key = self.travel_time_cache.key_for(start_lat, start_lon, dest_lat, dest_lon)
+        cached = self._cache_lookup([cache_key])
+        if cached.get(cache_key) is not None:
+            return cached[cache_key] / 60.0
+
+        # Offline road graph answers without touching the network
+        if self.local_router is not None:
+            duration_seconds = self._fetch_travel_times([(start_lon, start_lat)], [(dest_lon, dest_lat)]).get((0, 0))
+            if duration_seconds is not None:
+                self._cache_store({cache_key: duration_seconds})
+                return duration_seconds / 60.0
+
         # Build URL according to OSRM standard (longitude then latitude)
         url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{dest_lon},{dest_lat}?overview=false"
 
@@ -675,6 +838,7 @@ class CommanderAgent:
             if data.get("code") == "Ok" and len(data.get("routes", [])) > 0:
                 # Travel time returned in seconds, divide by 60 to get minutes
                 duration_seconds = data["routes"][0]["duration"]
+                self._cache_store({cache_key: duration_seconds})
                 return duration_seconds / 60.0
             else:
                 print(f"⚠️ OSRM API Warning: Received invalid response from server: {data.get('code')}")
@@ -1,10 +1,12 @@
+import asyncio
 import json
 import time
 
-import requests
+import httpx
+import numpy as np
+
+from app.services.landcover_cache import LANDCOVER_NO_DATA, get_landcover_cache
 
-# Global session for improved performance in concurrent requests
-esri_session = requests.Session()
 ESRI_LULC_URL = "https://ic.imagery1.arcgis.com/arcgis/rest/services/Sentinel2_10m_LandCover/ImageServer/identify"
 
 # Mapping of ESRI Sentinel-2 land cover pixel values to fuel types and their respective fuel load factors
@@ -20,11 +22,60 @@ FUEL_CLASSES = {
     "11": {"type": "Rangeland", "fuel_load": 0.4}
 }
 
+# FUEL_CLASSES as lookup tables indexed by pixel value, for mapping many raster lookups at once
+FUEL_TYPE_BY_CLASS = np.full(256, "Unknown", dtype=object)
+FUEL_LOAD_BY_CLASS = np.zeros(256)
+for _pixel_value, _fuel_info in FUEL_CLASSES.items():
+    FUEL_TYPE_BY_CLASS[int(_pixel_value)] = _fuel_info["type"]
+    FUEL_LOAD_BY_CLASS[int(_pixel_value)] = _fuel_info["fuel_load"]
+
+
+def fuel_for_classes(classes):
+    """Maps an array of land-cover pixel values to arrays of fuel types and fuel loads in one vectorized lookup."""
+    classes = np.asarray(classes, dtype=np.uint8)
+    return FUEL_TYPE_BY_CLASS[classes], FUEL_LOAD_BY_CLASS[classes]
 
-def enrich_with_fuel(fire_event):
+
+async def enrich_events_with_fuel(fire_events, client):
     """
-    Enriches a fire event with fuel type and fuel load data by querying the ESRI Sentinel-2 Land Cover API at the fire's coordinates.
-    Takes a fire_event object with latitude and longitude, updates its fuel_type and fuel_load attributes based on land cover data, and returns nothing.
+    Enriches many fire events with fuel type and fuel load from the local land-cover raster cache, lazily filling any missing tile first. Events the cache still cannot answer (tile export failed or no data) fall back to the per-point ESRI identify call.
+    """
+    fire_events = list(fire_events)
+    if not fire_events:
+        return
+
+    start_time = time.time()
+    cache = get_landcover_cache()
+    lats = [event.latitude for event in fire_events]
+    lons = [event.longitude for event in fire_events]
+
+    try:
+        await cache.ensure(lats, lons, client)
+        classes = cache.lookup(lats, lons)
+    except Exception as e:
+        print(f"⚠️ Fuel Agent: land-cover cache unavailable ({e}), using point lookups.")
+        classes = np.full(len(fire_events), LANDCOVER_NO_DATA, dtype=np.uint8)
+
+    fuel_types, fuel_loads = fuel_for_classes(classes)
+    fallback = []
+    for event, pixel_value, fuel_type, fuel_load in zip(fire_events, classes, fuel_types, fuel_loads):
+        if pixel_value == LANDCOVER_NO_DATA:
+            fallback.append(event)
+            continue
+        event.fuel_type = fuel_type
+        event.fuel_load = float(fuel_load)
+
+    print(f"🌲 Fuel Agent: {len(fire_events) - len(fallback)}/{len(fire_events)} events from the land-cover cache "
+          f"in {(time.time() - start_time):.3f} seconds")
+
+    if fallback:
+        await asyncio.gather(*(enrich_with_fuel(event, client) for event in fallback))
+
+
+async def enrich_with_fuel(fire_event, client):
+    """
+    Enriches a fire event with fuel type and fuel load data by querying the ESRI Sentinel-2 Land Cover API at the fire's coordinates through the shared async HTTP client.
+    Takes a fire_event object with latitude and longitude and the client, updates its fuel_type and fuel_load attributes based on land cover data, and returns nothing.
     """
     start_time = time.time()
     print(f"🌲 Fuel Agent: Working on Event #{fire_event.id}...")
@@ -45,40 +96,33 @@ def enrich_with_fuel(fire_event):
         "f": "json"
     }
 
-    max_retries = 2
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            # Using Session with short timeout
-            response = esri_session.get(ESRI_LULC_URL, params=params, timeout=(2.0, 5.0))
+    try:
+        # Short timeout; transient failures are retried by the client with backoff
+        response = await client.get(ESRI_LULC_URL, params=params, timeout=httpx.Timeout(5.0, connect=2.0))
 
-            if response.status_code == 200:
-                data = response.json()
+        if response.status_code != 200:
+            print(f"❌ Fuel Failed: Server returned {response.status_code} for Event #{fire_event.id}.")
+            return
 
-                if "value" in data and data["value"] != "NoData":
-                    pixel_value = data["value"]
+        data = response.json()
 
-                    # Retrieve full object from dictionary, with default value if not found
-                    fuel_info = FUEL_CLASSES.get(str(pixel_value), {"type": "Unknown", "fuel_load": 0.0})
+        if "value" in data and data["value"] != "NoData":
+            pixel_value = data["value"]
 
-                    # Update fuel type and fuel load in the fire event
-                    fire_event.fuel_type = fuel_info["type"]
-                    fire_event.fuel_load = fuel_info["fuel_load"]
+            # Retrieve full object from dictionary, with default value if not found
+            fuel_info = FUEL_CLASSES.get(str(pixel_value), {"type": "Unknown", "fuel_load": 0.0})
 
-                    print(
-                        f"✅ Fuel Updated: Event #{fire_event.id} is '{fire_event.fuel_type}' (Load: {fire_event.fuel_load})")
-                    print(f"⏱️ Fuel Agent Time: {(time.time() - start_time):.1f} seconds")
-                    return
-                else:
-                    print(f"⚠️ Fuel Agent: No data found for Event #{fire_event.id} coordinates.")
-                    return
-            else:
-                print(f"🔄 Fuel Error: Server returned {response.status_code}. Retrying...")
-                time.sleep(1)
+            # Update fuel type and fuel load in the fire event
+            fire_event.fuel_type = fuel_info["type"]
+            fire_event.fuel_load = fuel_info["fuel_load"]
 
-        except requests.exceptions.Timeout:
-            print(f"⚠️ Fuel Timeout (Attempt {attempt}).")
-        except Exception as e:
-            print(f"⚠️ Fuel Connection Error (Attempt {attempt}): {e}")
+            print(
+                f"✅ Fuel Updated: Event #{fire_event.id} is '{fire_event.fuel_type}' (Load: {fire_event.fuel_load})")
+            print(f"⏱️ Fuel Agent Time: {(time.time() - start_time):.1f} seconds")
+        else:
+            print(f"⚠️ Fuel Agent: No data found for Event #{fire_event.id} coordinates.")
 
-    print(f"❌ Fuel Failed after {max_retries} attempts for Event #{fire_event.id}.")
+    except httpx.TimeoutException:
+        print(f"❌ Fuel Timeout for Event #{fire_event.id}.")
+    except Exception as e:
+        print(f"❌ Fuel Connection Error for Event #{fire_event.id}: {e}")
@@ -1,9 +1,42 @@
 import json
 import os
 
-import google.generativeai as genai
-from groq import Groq
-from groq.types.chat import ChatCompletionUserMessageParam
+from app.services.llm_cache import cache_key, get_llm_cache
+from app.services.llm_router import get_llm_router, models_for_task
+
+# Rough characters-per-token ratio used to size batched prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+# Token budget of one batched prediction summary call (prompt plus expected output), and the cap on predictions per call
+LLM_BATCH_TOKEN_BUDGET = int(os.environ.get('LLM_BATCH_TOKEN_BUDGET', 6000))
+LLM_BATCH_MAX_ITEMS = int(os.environ.get('LLM_BATCH_MAX_ITEMS', 15))
+# Expected output tokens per prediction summary
+LLM_SUMMARY_OUTPUT_TOKENS = 200
+# Attempts per prediction before batched summarization gives up on it
+LLM_BATCH_MAX_ATTEMPTS = int(os.environ.get('LLM_BATCH_MAX_ATTEMPTS', 3))
+
+
+def estimate_tokens(text):
+    """Returns a rough token count for the given text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_into_batches(items, token_budget=LLM_BATCH_TOKEN_BUDGET, max_items=LLM_BATCH_MAX_ITEMS,
+                       output_tokens_per_item=LLM_SUMMARY_OUTPUT_TOKENS):
+    """Greedily packs JSON-serializable items into consecutive batches whose estimated prompt and output tokens stay within the token budget and whose size stays within max_items. An item too large for the budget on its own gets a batch of its own."""
+    batches = []
+    current = []
+    current_tokens = 0
+    for item in items:
+        item_tokens = estimate_tokens(json.dumps(item, ensure_ascii=False)) + output_tokens_per_item
+        if current and (current_tokens + item_tokens > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        batches.append(current)
+    return batches
 
 
 class LLMAgent:
@@ -13,7 +46,7 @@ class LLMAgent:
 
     def __init__(self):
         """
-        Initializes the LLM Agent by loading multiple Groq API keys and configuring Gemini as a fallback, ensuring high availability for critical fire management operations.
+        Initializes the LLM Agent by loading multiple Groq API keys and Gemini as a fallback, and attaches the shared provider router (pooled clients and endpoint health), ensuring high availability for critical fire management operations.
         """
         # 1. Initialize Groq (First Fallback)
         self.groq_keys = [
@@ -26,78 +59,111 @@ class LLMAgent:
 
         # 2. Initialize Gemini (Final Fallback)
         self.gemini_key = os.getenv("GEMINI_API_KEY")
-        if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            self.gemini_model = genai.GenerativeModel('gemini-3.1-flash-lite')
-        else:
-            self.gemini_model = None
 
         self.is_active = len(self.groq_keys) > 0 or self.gemini_key is not None
         if not self.is_active:
             print("❌ LLM Agent Error: No API keys found for OpenRouter, Groq, or Gemini.")
 
+        # Provider clients are built once per process and shared with every agent through the router
+        self.router = get_llm_router(self.groq_keys, self.gemini_key) if self.is_active else None
+
+        # Content-addressed response cache (None when caching is turned off)
+        self.response_cache = get_llm_cache()
+
+    @staticmethod
+    def _models_for_task(task_type):
+        """
+        Returns the Groq model chain used for a task type: small fast models for high-volume prediction summaries, large models for the complex dispatch JSON.
+        """
+        return models_for_task(task_type)
+
+    def _cache_key(self, task_type, payload):
+        """
+        Returns the response cache key of a payload sent for the given task type with its model chain.
+        """
+        return cache_key(task_type, self._models_for_task(task_type), payload)
+
+    def _cache_get_many(self, keys):
+        """
+        Looks up cached responses for the given keys, returning a dict of the hits. Cache failures are logged and treated as misses.
+        """
+        if self.response_cache is None:
+            return {}
+        try:
+            return self.response_cache.get_many(keys)
+        except Exception as e:
+            print(f"      ⚠️ LLM cache lookup failed: {e}")
+            return {}
+
+    def _cache_put_many(self, task_type, responses):
+        """
+        Stores responses (dict of key to text) in the cache. Cache failures are logged and ignored.
+        """
+        if self.response_cache is None or not responses:
+            return
+        try:
+            self.response_cache.put_many(task_type, responses)
+        except Exception as e:
+            print(f"      ⚠️ LLM cache store failed: {e}")
+
+    @staticmethod
+    def _is_cacheable_response(response_text, is_json):
+        """
+        Returns True if an LLM response is a real answer worth caching rather than an error or fallback message.
+        """
+        if not response_text or response_text.startswith("⚠️"):
+            return False
+        if not is_json:
+            return True
+        try:
+            parsed = json.loads(response_text)
+        except ValueError:
+            return False
+        return not (isinstance(parsed, dict) and "error" in parsed)
+
+    def _call_llm_cached(self, prompt, cache_payload, context_name="LLM", is_json=False, task_type="dispatch"):
+        """
+        Returns the cached response for the task type and normalized cache payload if there is one, otherwise calls the LLM with fallback and caches a successful response.
+        """
+        key = self._cache_key(task_type, {"context": context_name, "data": cache_payload})
+        cached = self._cache_get_many([key]).get(key)
+        if cached is not None:
+            print(f"      ♻️ {context_name}: Reusing cached LLM response.")
+            return cached
+
+        response_text = self._call_llm_with_fallback(prompt, context_name=context_name, is_json=is_json,
+                                                     task_type=task_type)
+        if self._is_cacheable_response(response_text, is_json):
+            self._cache_put_many(task_type, {key: response_text})
+        return response_text
+
     def _call_llm_with_fallback(self, prompt, context_name="LLM", is_json=False, task_type="dispatch"):
         """
-        Attempts to execute a prompt across multiple Groq API keys using high-capacity models, falling back to Gemini if all Groq attempts fail, and returns the generated text response or error message.
-        """
-        # TASK ROUTING LOGIC
-        if task_type == "prediction":
-            # High Volume / Low Complexity
-            target_models = [
-                "llama-3.1-8b-instant",
-                "qwen/qwen3-32b"
-            ]
-        else:
-            # Low Volume / High Complexity (Dispatch JSON)
-            target_models = [
-                "llama-3.3-70b-versatile",
-                "openai/gpt-oss-120b"
-            ]
-
-        kwargs = {"temperature": 0.1}
-        if is_json:
-            kwargs["response_format"] = {"type": "json_object"}
-
-        # Step 1: Try all Groq API keys and models
-        for key_index, api_key in enumerate(self.groq_keys):
-            client = Groq(api_key=api_key)
-
-            for model_name in target_models:  # <--- שים לב שזה שונה מ-groq_strong_models
-                try:
-                    print(f"      🔄 {context_name}: Trying Groq Key #{key_index + 1} ({model_name})...")
-                    chat_completion = client.chat.completions.create(
-                        messages=[ChatCompletionUserMessageParam(role="user", content=prompt)],
-                        model=model_name,
-                        **kwargs
-                    )
-                    print(f"      🟢 {context_name}: Success using Groq")
-                    return chat_completion.choices[0].message.content
-                except Exception as e:
-                    print(f"      ⚠️ {context_name}: Error with Groq {model_name}: {e}")
-                    continue
-
-        # Step 3: Try Gemini (Final Fallback)
-        if self.gemini_model:
-            try:
-                print(f"      🚨 {context_name}: Groq exhausted. Trying Gemini...")
-                generation_config = {"temperature": 0.1}
-                if is_json:
-                    generation_config["response_mime_type"] = "application/json"
-
-                response = self.gemini_model.generate_content(
-                    prompt,
-                    generation_config=generation_config
-                )
-                print(f"      🟢 {context_name}: Success using Gemini")
-                return response.text
-            except Exception as e:
-                print(f"      ❌ {context_name}: Gemini fallback failed: {e}")
-
-        # Step 4: Everything failed
+        Sends a prompt through the provider router, which tries the healthy Groq key/model endpoints and then Gemini, skipping endpoints that recently failed or were rate limited, and returns the generated text response or error message.
+        """
+        response_text = None
+        if self.router is not None:
+            response_text = self.router.complete(prompt, task_type=task_type, is_json=is_json, context_name=context_name,
+                                                 validate=self._is_valid_json if is_json else None)
+        if response_text is not None:
+            return response_text
+
+        # Everything failed
         error_text = f"⚠️ Error: LLM completely unavailable for {context_name}."
         print(error_text)
         return '{"error": "API Blocked"}' if is_json else error_text
 
+    @staticmethod
+    def _is_valid_json(response_text):
+        """
+        Returns True if a JSON-mode response parses as JSON, so a malformed answer moves the router on to the next endpoint.
+        """
+        try:
+            json.loads(response_text)
+        except ValueError:
+            return False
+        return True
+
     def summarize_predictions(self, predictions_data):
         """
         Converts raw fire prediction data into a structured, human-readable tactical forecast with threat assessment and key metrics in Markdown format, returning a summary string or error/status message.
@@ -140,7 +206,129 @@ class LLMAgent:
         YOUR OUTPUT:
         """
 
-        return self._call_llm_with_fallback(prompt, context_name="Prediction Summary", task_type="prediction")
+        return self._call_llm_cached(prompt, predictions_data, context_name="Prediction Summary", task_type="prediction")
+
+    def summarize_predictions_batch(self, predictions_data):
+        """
+        Summarizes many predictions with batched JSON-mode prompts. Each payload must carry a unique 'summary_id'; payloads are packed into batches under the token budget, every returned summary is validated against the expected schema, and only the predictions that failed are retried (in smaller batches) up to LLM_BATCH_MAX_ATTEMPTS times. Returns a dict mapping summary_id to summary text, without the predictions that never succeeded.
+        """
+        if not predictions_data:
+            return {}
+
+        if not self.is_active:
+            return {item["summary_id"]: "⚠️ LLM Agent is inactive." for item in predictions_data}
+
+        # Predictions whose normalized payload was summarized before are served from the cache
+        keys = {item["summary_id"]: self._cache_key("prediction", {"context": "Prediction Summary Batch", "data": item})
+                for item in predictions_data}
+        cached = self._cache_get_many(keys.values())
+        summaries = {summary_id: cached[key] for summary_id, key in keys.items() if key in cached}
+        if summaries:
+            print(f"   ♻️ LLM Agent: {len(summaries)} prediction summaries served from the cache.")
+
+        summaries.update(self._summarize_uncached_batches([item for item in predictions_data
+                                                           if item["summary_id"] not in summaries]))
+        self._cache_put_many("prediction", {keys[summary_id]: summary for summary_id, summary in summaries.items()
+                                            if keys[summary_id] not in cached})
+        return summaries
+
+    def _summarize_uncached_batches(self, predictions_data):
+        """
+        Runs the batched summarization loop for predictions that missed the cache: packs them into batches under the token budget and retries only the failed ones in smaller batches. Returns a dict mapping summary_id to the valid summaries.
+        """
+        summaries = {}
+        remaining = list(predictions_data)
+        max_items = LLM_BATCH_MAX_ITEMS
+        for attempt in range(1, LLM_BATCH_MAX_ATTEMPTS + 1):
+            if not remaining:
+                break
+            failed = []
+            for batch in split_into_batches(remaining, max_items=max_items):
+                batch_summaries = self._summarize_prediction_batch(batch)
+                if batch_summaries is None:
+                    # Every provider is down; retrying now would only repeat the failure
+                    return summaries
+
+                summaries.update(batch_summaries)
+                failed.extend(item for item in batch if item["summary_id"] not in batch_summaries)
+
+            if not failed:
+                break
+            print(f"   🔁 LLM Agent: {len(failed)} prediction summaries failed validation (attempt {attempt}/{LLM_BATCH_MAX_ATTEMPTS}).")
+            remaining = failed
+            # Smaller batches on retry, in case the whole response was cut off
+            max_items = max(1, max_items // 2)
+
+        return summaries
+
+    def _summarize_prediction_batch(self, batch):
+        """
+        Sends one JSON-mode prompt summarizing a batch of predictions and returns a dict mapping summary_id to summary text for the entries that pass validation, or None if no LLM provider was reachable.
+        """
+        print(f"🤖 LLM Agent: Translating {len(batch)} predictions into human-readable tactical summaries...")
+
+        data_str = json.dumps(batch, ensure_ascii=False, indent=2)
+
+        prompt = f"""
+        You are a tactical forecasting analyst for the Fire and Rescue Service.
+        Data (JSON list, one prediction per item): {data_str}
+
+        Task: For EVERY prediction in the list, write a tactical forecast and return a STRICT JSON output.
+
+        RULES:
+        1. You MUST return ONLY valid JSON. No markdown formatting around the output (like ```json), no conversational text.
+        2. DO NOT SKIP ANY PREDICTION. Return exactly one entry per input item, copying its `summary_id` value unchanged.
+        3. **Threat Assessment:** Write exactly ONE flowing, natural sentence that explains the actual danger. Avoid robotic, data-dump phrasing.
+        4. **Key Metrics:** Limit the list EXACTLY to the 4 items shown in the example (Vector, Wind, Fuel, Intensity).
+        5. **Vector Format:** Always write the textual cardinal direction first, followed by the numeric degrees in parentheses (e.g., South-East (130°)).
+        6. Do NOT include Lat/Lon coordinates in the text.
+        7. **Time Horizon Context:** Include the item's 'time_horizon_hours' explicitly in both the title of the Threat Assessment and within its sentence (e.g., "Over the next X hours...").
+        8. Use Markdown formatting (\n\n for new paragraphs, **bold** for titles, * for bullet points) INSIDE the JSON string values.
+
+        EXPECTED JSON SCHEMA:
+        {{
+          "summaries": [
+            {{
+              "summary_id": "22:1.0",
+              "summary": "**🔥 Threat Assessment (1 hour):**\nOver the next hour the fire is spreading rapidly eastward into built areas, driven by strong winds.\n\n**📊 Key Metrics:**\n* 🧭 **Vector:** South-East (130°)\n* 💨 **Wind:** Northwest (7.8 km/h)\n* 🌾 **Fuel:** Built area structures\n* 📏 **Intensity:** Spread: 195 m/h | Flame: 0.98m"
+            }}
+          ]
+        }}
+
+        YOUR JSON OUTPUT:
+        """
+
+        response_text = self._call_llm_with_fallback(prompt, context_name="Prediction Summary Batch", is_json=True,
+                                                     task_type="prediction")
+        try:
+            response = json.loads(response_text)
+        except (TypeError, ValueError):
+            print("      ⚠️ Prediction Summary Batch: Response is not valid JSON.")
+            return {}
+
+        if isinstance(response, dict) and "error" in response and "summaries" not in response:
+            return None
+
+        expected_ids = {item["summary_id"] for item in batch}
+        entries = response.get("summaries") if isinstance(response, dict) else None
+        summaries = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if self._is_valid_batch_summary(entry, expected_ids):
+                summaries[entry["summary_id"]] = entry["summary"].strip()
+        return summaries
+
+    @staticmethod
+    def _is_valid_batch_summary(entry, expected_ids):
+        """
+        Checks one entry of a batched summary response against the schema: an object whose 'summary_id' is one of the requested ids and whose 'summary' is a non-empty string.
+        """
+        return (
+            isinstance(entry, dict)
+            and isinstance(entry.get("summary_id"), str)
+            and entry["summary_id"] in expected_ids
+            and isinstance(entry.get("summary"), str)
+            and bool(entry["summary"].strip())
+        )
 
     def summarize_dispatch(self, district_name, dispatch_data):
         """
@@ -193,7 +381,9 @@ class LLMAgent:
         YOUR JSON OUTPUT:
         """
 
-        # Use the fallback mechanism with Groq
-        response_text = self._call_llm_with_fallback(prompt, context_name=f"Dispatch {district_name}", is_json=True, task_type="dispatch")
+        # Use the fallback mechanism with Groq, reusing the answer for an unchanged district dispatch
+        response_text = self._call_llm_cached(prompt, {"district_name": district_name, "dispatch": dispatch_data},
+                                              context_name=f"Dispatch {district_name}", is_json=True,
+                                              task_type="dispatch")
 
         return response_text
@@ -1,19 +1,23 @@
-import math
+import asyncio
+import contextlib
 import os
-from concurrent.futures import ThreadPoolExecutor, wait
+import time
 from datetime import datetime, timedelta
 
-from flask import current_app
 from flask_socketio import SocketIO
 
-from app.agents.IMS_DATA_agent import enrich_with_ims
+from app.agents.IMS_DATA_agent import enrich_with_ims, prefetch_ims_observations
 from app.agents.commander_agent import CommanderAgent
-from app.agents.fuel_agent import enrich_with_fuel
+from app.agents.fuel_agent import enrich_events_with_fuel
 from app.agents.open_weather_map_agent import WeatherService
-from app.agents.topo_agent import enrich_with_topography
+from app.agents.topo_agent import enrich_events_with_topography
 from app.extensions import db
+from app.geo.distance import haversine_km
+from app.geo.grid_index import GridIndex
+from app.geo.station_index import get_station_index
 from app.models.fire_events import FireEvent
 from app.models.nasa_fire import FireIncident
+from app.services.http_client import AsyncHttpClient, run_with_client
 
 
 class MonitorAgent:
@@ -23,11 +27,33 @@ class MonitorAgent:
 
     def __init__(self):
         """
-        Initializes the MonitorAgent with weather service, clustering radius (2.5 km), and event timeout (24 hours).
+        Initializes the MonitorAgent with weather service, clustering radius (2.5 km), event timeout (24 hours), per-agent enrichment concurrency limits and the enrichment deadline for a cycle.
         """
         self.weather_service = WeatherService()
         self.CLUSTER_RADIUS_KM = 2.5
         self.EVENT_TIMEOUT_HOURS = 24
+        # Maximum concurrent tasks per per-event enrichment agent. The batch agents (weather, topography, fuel) run as
+        # one task each; their upstream requests are bounded per host by HOST_CONCURRENCY in app.services.http_client
+        self.ENRICHMENT_CONCURRENCY = {
+            "ims": 4  # Israel Meteorological Service
+        }
+        # Enrichments still unfinished after this many seconds are skipped for the current cycle
+        self.ENRICHMENT_DEADLINE_SECONDS = 90
+        self._event_index = GridIndex(self.CLUSTER_RADIUS_KM)
+
+    @property
+    def active_events_cache(self):
+        """
+        In-memory collection of active fire events, backed by a spatial grid index so clustering only inspects neighbouring cells.
+        """
+        return self._event_index
+
+    @active_events_cache.setter
+    def active_events_cache(self, events):
+        """
+        Replaces the in-memory cache with the given events, rebuilding the spatial grid index over them in order.
+        """
+        self._event_index = GridIndex(self.CLUSTER_RADIUS_KM, events)
 
     def run_cycle(self):
         """
@@ -42,6 +68,9 @@ class MonitorAgent:
             print("Monitor: No new raw data.")
             return
 
+        # Warm the IMS observation cache for the stations near the new detections
+        self._prefetch_ims_observations(unprocessed_reads)
+
         events_to_enrich = set()
 
         # Load active events into memory to avoid repeated database queries during clustering
@@ -77,6 +106,9 @@ class MonitorAgent:
             # Mark incident as processed
             read.is_processed = True
 
+        # Store the district of every created or moved event once, so serialization needs no station lookups
+        self._assign_districts(events_to_enrich)
+
         # Save structural changes to database
         try:
             db.session.commit()
@@ -87,30 +119,7 @@ class MonitorAgent:
 
         print(f"🌍 Enriching {len(events_to_enrich)} events with external data...")
 
-        app = current_app._get_current_object()
-
-        for event in events_to_enrich:
-            # Execute enrichment with parallel threads for improved performance
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                def run_in_context(func, target_event):
-                    with app.app_context():
-                        return func(target_event)
-
-                # Submit all enrichment tasks to run in parallel for the current event
-                futures = [
-                    executor.submit(run_in_context, self.weather_service.update_weather_for_event, event),
-                    executor.submit(run_in_context, enrich_with_topography, event),
-                    executor.submit(run_in_context, enrich_with_ims, event),
-                    executor.submit(run_in_context, enrich_with_fuel, event)
-                ]
-
-                # Wait for all enrichment tasks to complete before proceeding
-                wait(futures)
-
-                # Check if any enrichment agent encountered errors
-                for future in futures:
-                    if future.exception():
-                        print(f"❌ Agent Error on event {event.id}: {future.exception()}")
+        self._enrich_events(list(events_to_enrich))
 
         # Commit all enrichment changes to the database
         try:
@@ -138,19 +147,74 @@ class MonitorAgent:
 
         print("✅ Monitor cycle finished.")
 
-    def _find_matching_event_in_memory(self, read):
+    def _enrich_events(self, events):
         """
-        Searches for an existing fire event within the clustering radius of the given incident by iterating through the in-memory cache, and returns the closest matching event or None if no match is found.
+        Runs every (event, agent) enrichment on one asyncio event loop sharing a single pooled HTTP client, keeping each agent under its concurrency limit, and cancels whatever is still unfinished once the cycle deadline passes.
         """
-        closest, min_dist = None, float('inf')
+        start_time = time.time()
+        skipped = asyncio.run(self._enrich_events_async(events))
 
-        # Iterate over the in-memory cache instead of querying the database
-        for event in self.active_events_cache:
-            dist = self._calculate_distance(read.latitude, read.longitude, event.latitude, event.longitude)
-            if dist < self.CLUSTER_RADIUS_KM:
-                if dist < min_dist:
-                    min_dist = dist
-                    closest = event
+        if skipped:
+            print(f"⏰ Enrichment deadline ({self.ENRICHMENT_DEADLINE_SECONDS}s) reached: skipped {skipped} unfinished enrichment tasks.")
+        print(f"⏱️ Enriched {len(events)} events in {time.time() - start_time:.1f} seconds.")
+
+    async def _enrich_events_async(self, events):
+        """
+        Coroutine behind _enrich_events: schedules all enrichment tasks at once and returns the number of tasks cancelled at the deadline. Per-event agents get one task per event, gated by per-agent semaphores; batch agents get a single task covering all events, whose requests are bounded by the shared client's per-host limits.
+        """
+        agents = {
+            "ims": enrich_with_ims
+        }
+        # Weather interpolates a prefetched grid field, topography packs many events into each OpenTopoData request
+        # and fuel reads the local land-cover raster cache
+        batch_agents = {
+            "weather": self.weather_service.update_weather_for_events,
+            "topography": enrich_events_with_topography,
+            "fuel": enrich_events_with_fuel
+        }
+        limits = {name: asyncio.Semaphore(self.ENRICHMENT_CONCURRENCY[name]) for name in agents}
+
+        async def run_agent(name, func, target, label, client):
+            try:
+                async with limits.get(name, contextlib.nullcontext()):
+                    await func(target, client)
+            except Exception as e:
+                # Check if the enrichment agent encountered errors
+                print(f"❌ Agent Error ({name}) on {label}: {e}")
+
+        if not events:
+            return 0
+
+        # One pooled client per cycle, so every agent reuses keep-alive connections on this loop
+        async with AsyncHttpClient() as client:
+            tasks = [asyncio.create_task(run_agent(name, func, event, f"event {event.id}", client))
+                     for event in events for name, func in agents.items()]
+            tasks += [asyncio.create_task(run_agent(name, func, events, f"{len(events)} events", client))
+                      for name, func in batch_agents.items()]
+
+            _, unfinished = await asyncio.wait(tasks, timeout=self.ENRICHMENT_DEADLINE_SECONDS)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+        return len(unfinished)
+
+    def _prefetch_ims_observations(self, reads):
+        """
+        Fetches the latest readings of the IMS stations nearest to the given fire incidents in one concurrent batch, so IMS enrichment later in the cycle is served from the observation cache. Failures are logged and left to the per-event path.
+        """
+        try:
+            run_with_client(prefetch_ims_observations, [read.latitude for read in reads],
+                            [read.longitude for read in reads])
+        except Exception as e:
+            print(f"⚠️ IMS prefetch failed: {e}")
+
+    def _find_matching_event_in_memory(self, read):
+        """
+        Searches for an existing fire event within the clustering radius of the given incident using the spatial grid index over the in-memory cache, and returns the closest matching event or None if no match is found.
+        """
+        # Only events in the grid cells neighbouring the incident are distance-checked
+        closest, _ = self.active_events_cache.find_nearest(read.latitude, read.longitude)
         return closest
 
     def _create_new_event(self, read):
@@ -187,6 +251,9 @@ class MonitorAgent:
         event.latitude = (event.min_lat + event.max_lat) / 2
         event.longitude = (event.min_lon + event.max_lon) / 2
 
+        # Keep the spatial index in sync with the moved centroid
+        self.active_events_cache.update(event)
+
         # Update intensity values to keep the maximum observed in the event
         if read.frp > event.frp:
             event.frp = read.frp
@@ -197,6 +264,19 @@ class MonitorAgent:
         event.num_points += 1
         event.last_update = datetime.utcnow()
 
+    def _assign_districts(self, events):
+        """
+        Assigns each fire event the district of its nearest fire station using the process-wide station index, in a single batched lookup for all given events.
+        """
+        events = list(events)
+        if not events:
+            return
+
+        districts = get_station_index().districts_for([event.latitude for event in events],
+                                                      [event.longitude for event in events])
+        for event, district in zip(events, districts):
+            event.district = district
+
     def _trigger_commander_agent(self):
         """
         Initiates the Commander Agent to process and respond to enriched fire events by calling its master cycle without parameters.
@@ -207,13 +287,6 @@ class MonitorAgent:
 
     def _calculate_distance(self, lat1, lon1, lat2, lon2):
         """
-        Calculates the great-circle distance in kilometers between two geographic coordinates using the Haversine formula, taking latitude and longitude pairs as input and returning the distance as a float.
+        Calculates the great-circle distance in kilometers between two geographic coordinates using the shared Haversine kernel, taking latitude and longitude pairs as input and returning the distance as a float.
         """
-        # Haversine formula implementation
-        R = 6371.0
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(
-            dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
@@ -1,103 +1,180 @@
+import asyncio
 import csv
-import json
 import os
-from datetime import datetime
-from io import StringIO
+from datetime import datetime, timedelta
 
-import requests
-from shapely.geometry import Point, shape
+import numpy as np
 
 from app.agents.open_weather_map_agent import WeatherService
 from app.extensions import db
+from app.geo.borders import in_country
+from app.models.firms_sources import FirmsSourceState
 from app.models.nasa_fire import FireIncident
+from app.services.db_utils import dialect_insert
+from app.services.http_client import run_with_client
+
+# The FIRMS area API serves at most 10 days per request
+FIRMS_MAX_DAY_RANGE = 10
+# Near-real-time granules often arrive late, so rows up to this many hours older than a source's high-water mark are
+# still ingested; the ones already stored are dropped by ON CONFLICT DO NOTHING
+FIRMS_MARK_OVERLAP_HOURS = float(os.environ.get('FIRMS_MARK_OVERLAP_HOURS', 6))
 
 
 class NasaIngestionService:
     """Service for ingesting and processing fire incident data from NASA FIRMS API. Fetches fire detections from multiple VIIRS satellite sources, filters them spatially within Israel's borders, and stores validated incidents in the database."""
 
     def __init__(self):
-        """Initializes the NASA ingestion service with API credentials, satellite data sources, weather service integration, and Israel's geographic boundary polygon for spatial filtering."""
+        """Initializes the NASA ingestion service with API credentials, satellite data sources and weather service integration."""
         self.api_key = os.environ.get('NASA_FIRMS_KEY')
         self.base_url = "https://firms.modaps.eosdis.nasa.gov/api/area/csv"
         # MODIS_SP available for historical data, VIIRS_NRT sources for real-time detection
         self.sources = ["VIIRS_SNPP_NRT", "VIIRS_NOAA20_NRT", "VIIRS_NOAA21_NRT"]
         self.weather_service = WeatherService()
-        self.israel_polygon = self._load_israel_polygon()
-
-    def _load_israel_polygon(self):
-        """Loads Israel's geographic boundary polygon from the GeoJSON file. Returns a Shapely shape object representing the country's borders for spatial filtering, or None if the file cannot be loaded."""
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        geojson_path = os.path.join(current_dir, '..', 'data', 'israel_borders.geojson')
-        try:
-            with open(geojson_path, 'r', encoding='utf-8') as f:
-                geojson_data = json.load(f)
-                return shape(geojson_data['features'][0]['geometry'])
-        except Exception as e:
-            print(f"Warning: Failed to load Israel polygon: {e}")
-            return None
 
     def fetch_and_save_fires(self, days_back=1):
-        """Fetches fire detection data from NASA FIRMS API for the specified number of days back, processes each satellite source, filters points within Israel's borders, and saves new fire incidents to the database. Returns a dictionary with the operation status and count of newly added records."""
+        """Fetches new fire detections from NASA FIRMS API and bulk-ingests each satellite source. Sources are downloaded concurrently and streamed; each one only requests the smallest day window that covers its high-water mark (days_back is used until a source has one). The CSV is parsed into columns, points outside Israel's borders are dropped in one vectorized test, and the rest are written with a single INSERT ... ON CONFLICT DO NOTHING per source. Returns a dictionary with the operation status and the counts of inserted, duplicate and out-of-border rows."""
         if not self.api_key:
             return {"error": "No API Key"}
 
-        israel_bbox = "34.2654333839,29.5013261988,35.8363969256,33.2774264593"
-        new_records = 0
+        totals = {"new_fires_added": 0, "duplicates_skipped": 0, "outside_borders": 0}
+
+        # Each source is read back from its high-water mark minus the overlap margin, to pick up late granules
+        overlap = timedelta(hours=FIRMS_MARK_OVERLAP_HOURS)
+        cutoffs = {state.source: state.last_detected_at - overlap
+                   for state in FirmsSourceState.query.all() if state.last_detected_at is not None}
+        windows = {source: self._window_days(cutoffs.get(source), days_back) for source in self.sources}
+
+        # Download every satellite source concurrently over the shared pooled client
+        results = run_with_client(self._fetch_sources, windows, cutoffs)
 
-        for source in self.sources:
-            url = f"{self.base_url}/{self.api_key}/{source}/{israel_bbox}/{days_back}"
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                print(f"Error processing {source}: {result}")
+                continue
 
             try:
-                response = requests.get(url)
-                if response.status_code != 200 or response.text.count('\n') <= 1:
+                if result is None:
                     continue
 
-                csv_data = StringIO(response.text)
-                reader = csv.DictReader(csv_data)
-
-                for row in reader:
-                    # Convert latitude and longitude to float for spatial operations
-                    lat = float(row['latitude'])
-                    lon = float(row['longitude'])
-
-                    # Apply spatial filtering to exclude points outside Israel's borders
-                    if self.israel_polygon:
-                        if not self.israel_polygon.contains(Point(lon, lat)):
-                            # Point is in sea or outside borders - skip to next CSV row
-                            continue
-
-                    # Parse acquisition date and time into datetime object
-                    date_str = row['acq_date']
-                    time_str = row['acq_time'].zfill(4)
-                    dt_object = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H%M")
-
-                    # Check if this fire incident already exists in the database
-                    exists = FireIncident.query.filter_by(
-                        latitude=lat,
-                        longitude=lon,
-                        detected_at=dt_object,
-                        source=source
-                    ).first()
-
-                    if not exists:
-                        # Create and add new fire incident record
-                        fire = FireIncident(
-                            latitude=lat,
-                            longitude=lon,
-                            brightness=float(row.get('bright_ti4', 0)),
-                            frp=float(row.get('frp', 0)),
-                            confidence=row.get('confidence', 'n/a'),
-                            source=source,
-                            detected_at=dt_object
-                        )
-                        db.session.add(fire)
-                        new_records += 1
-
-                # Commit all changes for the current satellite source
-                db.session.commit()
+                counts = self._ingest_rows(source, *result)
+                for key, value in counts.items():
+                    totals[key] += value
+                print(f"🛰️ {source} ({windows[source]}d window): {counts['new_fires_added']} new, "
+                      f"{counts['duplicates_skipped']} duplicates, {counts['outside_borders']} outside borders")
 
             except Exception as e:
                 db.session.rollback()
                 print(f"Error processing {source}: {e}")
 
-        return {"status": "success", "new_fires_added": new_records}
+        return {"status": "success", **totals}
+
+    def _window_days(self, cutoff, days_back):
+        """Returns the FIRMS day range to request for a source: days_back before its first ingestion, otherwise the days from its cutoff's date (high-water mark minus the overlap margin) up to today (UTC), capped at the API maximum."""
+        if cutoff is None:
+            return days_back
+        days = (datetime.utcnow().date() - cutoff.date()).days + 1
+        return max(1, min(days, FIRMS_MAX_DAY_RANGE))
+
+    async def _fetch_sources(self, windows, cutoffs, client):
+        """Streams the FIRMS CSV of every satellite source concurrently through the shared async HTTP client. Returns one entry per source in order: (header, rows, stale row count), None for a non-200 response, or the exception raised by the request."""
+        return await asyncio.gather(*(self._fetch_source(source, windows[source], cutoffs.get(source), client)
+                                      for source in self.sources), return_exceptions=True)
+
+    async def _fetch_source(self, source, days, cutoff, client):
+        """Streams one source's CSV and parses it line by line as it arrives, keeping only rows acquired at or after the cutoff (the high-water mark minus the overlap margin, so late granules and other pixels of the same scan are not lost). Returns (header, rows, stale row count), or None for a non-200 response."""
+        israel_bbox = "34.2654333839,29.5013261988,35.8363969256,33.2774264593"
+        url = f"{self.base_url}/{self.api_key}/{source}/{israel_bbox}/{days}"
+        # Acquisition keys compare as strings: "YYYY-MM-DD HHMM"
+        mark_key = cutoff.strftime("%Y-%m-%d %H%M") if cutoff else ""
+
+        header, rows, stale = None, [], 0
+        async with client.stream("GET", url, timeout=60.0) as response:
+            if response.status_code != 200:
+                return None
+
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                row = next(csv.reader([line]))
+                if header is None:
+                    header = row
+                    date_idx, time_idx = header.index('acq_date'), header.index('acq_time')
+                    continue
+                if len(row) != len(header):
+                    continue
+                if f"{row[date_idx]} {row[time_idx].zfill(4)}" < mark_key:
+                    stale += 1
+                    continue
+                rows.append(row)
+
+        if header is None:
+            return None
+        return header, rows, stale
+
+    def _parse_csv_columns(self, header, rows):
+        """Turns parsed FIRMS CSV rows into columnar NumPy arrays: latitude, longitude, brightness (bright_ti4), frp, confidence and detected_at (datetime64 built from acq_date and acq_time)."""
+        columns = list(zip(*rows))
+        if not columns:
+            return None
+        col = {name: columns[i] for i, name in enumerate(header)}
+        n = len(columns[0])
+
+        def numeric(name):
+            return np.array(col[name], dtype=float) if name in col else np.zeros(n)
+
+        # acq_time is HHMM without leading zeros, e.g. "5" for 00:05
+        acq_time = np.array(col['acq_time'], dtype=int)
+        detected_at = (np.array(col['acq_date'], dtype='datetime64[D]').astype('datetime64[m]')
+                       + (acq_time // 100 * 60 + acq_time % 100).astype('timedelta64[m]'))
+
+        return {
+            "latitude": numeric('latitude'),
+            "longitude": numeric('longitude'),
+            "brightness": numeric('bright_ti4'),
+            "frp": numeric('frp'),
+            "confidence": np.array(col.get('confidence', ['n/a'] * n), dtype=object),
+            "detected_at": detected_at
+        }
+
+    def _ingest_rows(self, source, header, rows, stale=0):
+        """Bulk-ingests one source's rows, advances its high-water mark and commits both together. Rows already stored (same location, time and source) are skipped by the unique_fire_detection_constraint; rows older than the mark count as duplicates too. Returns the inserted, duplicate and out-of-border counts."""
+        data = self._parse_csv_columns(header, rows)
+        if data is None:
+            return {"new_fires_added": 0, "duplicates_skipped": stale, "outside_borders": 0}
+
+        # Apply spatial filtering to exclude points outside Israel's borders (sea or neighbouring countries)
+        inside = in_country(data["latitude"], data["longitude"])
+
+        records = [
+            {"latitude": lat, "longitude": lon, "brightness": brightness, "frp": frp, "confidence": confidence,
+             "source": source, "detected_at": detected_at}
+            for lat, lon, brightness, frp, confidence, detected_at in zip(
+                data["latitude"][inside].tolist(), data["longitude"][inside].tolist(),
+                data["brightness"][inside].tolist(), data["frp"][inside].tolist(),
+                data["confidence"][inside].tolist(), data["detected_at"][inside].astype('datetime64[us]').tolist())
+        ]
+
+        inserted = 0
+        if records:
+            table = FireIncident.__table__
+            stmt = dialect_insert(table).on_conflict_do_nothing(
+                index_elements=['latitude', 'longitude', 'detected_at', 'source']
+            ).returning(table.c.id)
+            # RETURNING only yields the rows that were actually inserted
+            inserted = len(db.session.execute(stmt, records).all())
+
+        # The mark covers every row seen, including those outside the borders
+        latest = data["detected_at"].max().astype('datetime64[us]').tolist()
+        state = FirmsSourceState.query.filter_by(source=source).first()
+        if state is None:
+            state = FirmsSourceState(source=source)
+            db.session.add(state)
+        if state.last_detected_at is None or latest > state.last_detected_at:
+            state.last_detected_at = latest
+        db.session.commit()
+
+        return {
+            "new_fires_added": inserted,
+            "duplicates_skipped": len(records) - inserted + stale,
+            "outside_borders": int((~inside).sum())
+        }
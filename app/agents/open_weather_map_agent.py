@@ -1,29 +1,127 @@
+import asyncio
+import math
 import os
+import threading
 import time
 
-import requests
+from app.geo.distance import haversine_km
+
+# Spacing (degrees) of the weather grid; every occupied cell costs one observation, taken at the cell centre
+OWM_GRID_DEG = float(os.environ.get('OWM_GRID_DEG', 0.1))
+# Node observations older than this are fetched again
+OWM_CELL_TTL_SECONDS = float(os.environ.get('OWM_CELL_TTL_SECONDS', 900))
+# How many cells away the nearest cached node may be when a fire cannot be interpolated between cached nodes
+OWM_NEAREST_MAX_CELLS = int(os.environ.get('OWM_NEAREST_MAX_CELLS', 2))
+
+
+class WeatherFieldCache:
+    """Process-wide cache of OpenWeatherMap observations at the centres of the cells of a coarse lat/lon grid, with a time-to-live per node. Wind is stored as u/v components so it can be interpolated between nodes."""
+
+    def __init__(self, grid_deg=OWM_GRID_DEG, ttl_seconds=OWM_CELL_TTL_SECONDS):
+        """Initialize an empty cache with the grid spacing in degrees and the node time-to-live in seconds."""
+        self.grid_deg = grid_deg
+        self.ttl_seconds = ttl_seconds
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Drop every cached node observation."""
+        with self._lock:
+            self._nodes.clear()
+
+    def cell_of(self, lat, lon):
+        """Return the grid node (i, j) of the cell containing a coordinate; its observation is taken at the cell centre."""
+        return math.floor(lat / self.grid_deg), math.floor(lon / self.grid_deg)
+
+    def corners(self, lat, lon):
+        """Return the four cell-centre nodes surrounding a coordinate with their bilinear weights, as a list of ((i, j), weight)."""
+        y = lat / self.grid_deg - 0.5
+        x = lon / self.grid_deg - 0.5
+        i0, j0 = math.floor(y), math.floor(x)
+        fy, fx = y - i0, x - j0
+        return [((i0, j0), (1 - fy) * (1 - fx)), ((i0, j0 + 1), (1 - fy) * fx),
+                ((i0 + 1, j0), fy * (1 - fx)), ((i0 + 1, j0 + 1), fy * fx)]
+
+    def node_coords(self, node):
+        """Return the (lat, lon) of a grid node, the centre of its cell."""
+        return round((node[0] + 0.5) * self.grid_deg, 6), round((node[1] + 0.5) * self.grid_deg, 6)
+
+    def get(self, node):
+        """Return the fresh observation stored for a node, or None."""
+        with self._lock:
+            entry = self._nodes.get(node)
+        if entry and time.time() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def put(self, node, observation):
+        """Store an observation for a node."""
+        with self._lock:
+            self._nodes[node] = (time.time(), observation)
+
+    def nearest(self, lat, lon, max_cells=OWM_NEAREST_MAX_CELLS):
+        """Return the fresh observation of the cached node closest to a coordinate, searching up to max_cells cells away from its own cell, or None."""
+        i0, j0 = self.cell_of(lat, lon)
+        best, best_dist = None, float('inf')
+        for i in range(i0 - max_cells, i0 + max_cells + 1):
+            for j in range(j0 - max_cells, j0 + max_cells + 1):
+                observation = self.get((i, j))
+                if observation is None:
+                    continue
+                dist = haversine_km(lat, lon, *self.node_coords((i, j)))
+                if dist < best_dist:
+                    best, best_dist = observation, dist
+        return best
+
+    def interpolate(self, lat, lon):
+        """Estimate wind speed and direction (through u/v components), temperature and humidity at a coordinate. When every surrounding cell-centre node with a positive weight is cached the values are bilinearly interpolated; otherwise the nearest cached node is used. Returns None when no node nearby has data."""
+        total = 0.0
+        u = v = temp = humidity = 0.0
+        for node, weight in self.corners(lat, lon):
+            if weight == 0:
+                continue
+            observation = self.get(node)
+            if observation is None:
+                total = 0.0
+                break
+            total += weight
+            u += weight * observation['u']
+            v += weight * observation['v']
+            temp += weight * observation['temp']
+            humidity += weight * observation['humidity']
+
+        if total > 0:
+            u, v, temp, humidity = u / total, v / total, temp / total, humidity / total
+        else:
+            # Sparse fires only have their own cell fetched, so they take the observation of the nearest cached node
+            observation = self.nearest(lat, lon)
+            if observation is None:
+                return None
+            u, v, temp, humidity = observation['u'], observation['v'], observation['temp'], observation['humidity']
+        return {
+            'wind_speed': round(math.hypot(u, v), 2),
+            # Meteorological direction: where the wind blows from, clockwise from north
+            'wind_deg': round(math.degrees(math.atan2(-u, -v)) % 360),
+            'temp': round(temp, 2),
+            'humidity': round(humidity)
+        }
+
+
+weather_field_cache = WeatherFieldCache()
 
 
 class WeatherService:
-    """Service for fetching weather data from OpenWeatherMap API and updating fire event objects with current weather conditions including wind speed, wind direction, temperature, and humidity."""
+    """Service for fetching weather data from OpenWeatherMap API and updating fire event objects with current weather conditions including wind speed, wind direction, temperature, and humidity. One observation is fetched per occupied grid cell and interpolated to each fire, so the API quota scales with occupied cells rather than fires and never exceeds one request per fire."""
 
-    def __init__(self):
-        """Initialize the WeatherService with API credentials from environment variables and set the base URL for API requests."""
+    def __init__(self, field_cache=None):
+        """Initialize the WeatherService with API credentials from environment variables, the base URL for API requests and the shared weather field cache."""
         self.api_key = os.environ.get('OPENWEATHER_KEY')
         self.base_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.field_cache = field_cache or weather_field_cache
 
-    def update_weather_for_event(self, fire_event):
-        """Update a FireEvent object with current weather data from OpenWeatherMap API using the event's coordinates, storing wind speed, wind direction, temperature, and humidity directly in the object without committing to database."""
-        start_time = time.time()
-
-        # Validate that the API key is configured
-        if not self.api_key:
-            print("❌ Error: OPENWEATHER_KEY is missing via .env")
-            return None
-
-        # Extract coordinates from the fire event object
-        lat = fire_event.latitude
-        lon = fire_event.longitude
+    async def _fetch_node(self, node, client):
+        """Fetch the current observation at one grid node and store it in the field cache. Returns True on success."""
+        lat, lon = self.node_coords(node)
 
         # Prepare API request parameters with metric units for Celsius temperature
         params = {
@@ -33,32 +131,77 @@ class WeatherService:
             'units': 'metric'
         }
 
-        try:
-            # Send request to OpenWeatherMap API with timeout for safety
-            response = requests.get(self.base_url, params=params, timeout=5)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                # Update the fire event object in memory with weather data
-                fire_event.owm_wind_speed = data['wind']['speed']
-                fire_event.owm_wind_deg = data['wind']['deg']
-                fire_event.owm_temperature = data['main']['temp']
-                fire_event.owm_humidity = data['main']['humidity']
-
-                # Log successful weather update with timing information
-                print(f"✅ Weather updated locally for Event #{fire_event.id}: {fire_event.owm_temperature}°C")
-                total_time = time.time() - start_time
-                print(f"   ⏱️ OWM agent took {total_time:.2f} seconds")
-                return True
-
-            else:
-                print(f"⚠️ Weather API Error: {response.status_code}")
-                return None
+        # Send request to OpenWeatherMap API with timeout for safety (retried by the client on transient errors)
+        response = await client.get(self.base_url, params=params, timeout=5.0)
+        if response.status_code != 200:
+            print(f"⚠️ Weather API Error: {response.status_code} for grid node {lat},{lon}")
+            return False
+
+        data = response.json()
+        speed = data['wind']['speed']
+        direction = math.radians(data['wind'].get('deg', 0))
+        self.field_cache.put(node, {
+            'u': -speed * math.sin(direction),
+            'v': -speed * math.cos(direction),
+            'temp': data['main']['temp'],
+            'humidity': data['main']['humidity']
+        })
+        return True
+
+    def node_coords(self, node):
+        """Return the (lat, lon) of a grid node."""
+        return self.field_cache.node_coords(node)
+
+    async def prefetch(self, coords, client):
+        """Fetch, in one concurrent burst, the cell-centre node of every grid cell containing one of the given (lat, lon) coordinates that is not cached yet. Returns the number of nodes fetched."""
+        missing = {node for node in (self.field_cache.cell_of(lat, lon) for lat, lon in coords)
+                   if self.field_cache.get(node) is None}
+        if not missing:
+            return 0
+
+        results = await asyncio.gather(*(self._fetch_node(node, client) for node in missing), return_exceptions=True)
+        fetched = sum(1 for result in results if result is True)
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            print(f"⚠️ Connection Error to Weather API for {len(failed)} grid nodes: {failed[0]}")
+        return fetched
+
+    async def update_weather_for_events(self, fire_events, client):
+        """Update many FireEvent objects with weather interpolated from the grid field, prefetching the missing grid nodes first, and store wind speed, wind direction, temperature, and humidity directly in the objects without committing to database. Returns the number of events updated."""
+        start_time = time.time()
+        fire_events = list(fire_events)
+
+        # Validate that the API key is configured
+        if not self.api_key:
+            print("❌ Error: OPENWEATHER_KEY is missing via .env")
+            return 0
 
+        fetched = await self.prefetch([(event.latitude, event.longitude) for event in fire_events], client)
+
+        updated = 0
+        for event in fire_events:
+            weather = self.field_cache.interpolate(event.latitude, event.longitude)
+            if weather is None:
+                print(f"⚠️ Weather unavailable for Event #{event.id}")
+                continue
+
+            # Update the fire event object in memory with weather data
+            event.owm_wind_speed = weather['wind_speed']
+            event.owm_wind_deg = weather['wind_deg']
+            event.owm_temperature = weather['temp']
+            event.owm_humidity = weather['humidity']
+            updated += 1
+
+        # Log weather update with timing information
+        print(f"✅ Weather updated locally for {updated}/{len(fire_events)} events from {fetched} new grid nodes")
+        print(f"   ⏱️ OWM agent took {(time.time() - start_time):.2f} seconds")
+        return updated
+
+    async def update_weather_for_event(self, fire_event, client):
+        """Update a single FireEvent object with current weather interpolated from the grid field. Returns True on success and None otherwise."""
+        try:
+            return True if await self.update_weather_for_events([fire_event], client) else None
         except Exception as e:
             # Handle network errors gracefully to prevent system crashes
             print(f"⚠️ Connection Error to Weather API: {e}")
-            total_time = time.time() - start_time
-            print(f"   ⏱️ OWM agent failed after {total_time:.2f} seconds")
             return None
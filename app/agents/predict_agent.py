@@ -1,12 +1,100 @@
-import math
+import hashlib
+import json
 import os
+import threading
 from datetime import datetime
 
+from flask import current_app
 from flask_socketio import SocketIO
 
-from app.agents.llm_agent import LLMAgent
+from app.agents.llm_agent import LLMAgent, split_into_batches
 from app.extensions import db
 from app.models.fire_events import FireEvent
+from app.services.spread_engine import PREDICTION_HORIZONS_HOURS, build_spread_inputs, compute_spread, ellipse_vertices
+from app.services.summary_queue import get_summary_queue
+
+# Decimal places kept when fingerprinting prediction inputs, so float noise does not mark an event as changed
+FINGERPRINT_DECIMALS = int(os.environ.get('PREDICTION_FINGERPRINT_DECIMALS', 2))
+FINGERPRINT_COORD_DECIMALS = 5
+
+# Summary text shown until the background LLM job writes the real summary back
+SUMMARY_PENDING_TEXT = "⏳ Generating prediction summary..."
+# Summary text stored when the LLM call fails
+LLM_SUMMARY_FALLBACK = "⚠️ Temporary issue generating text summary."
+
+# Serializes summary write-backs in this process, so concurrent jobs for one event do not overwrite each other's cache entries
+_write_back_lock = threading.Lock()
+
+
+def _prediction_emitter():
+    """Creates the WebSocket emitter used to broadcast prediction updates, with Redis support if available for multi-worker environments."""
+    redis_url = os.environ.get('REDIS_URL')
+    return SocketIO(message_queue=redis_url) if redis_url else SocketIO()
+
+
+def _emit_prediction_update(emitter, event):
+    """Broadcasts an event's current prediction polygon and summary to connected clients via WebSocket."""
+    emitter.emit('prediction_update', {
+        'event_id': event.id,
+        'prediction_polygon': event.prediction_polygon,
+        'prediction_summary': event.prediction_summary
+    })
+
+
+def write_back_summaries(app, summarize_batch, summary_jobs):
+    """Background summary job: generates the LLM summaries of a batch of (event id, horizon, fingerprint, payload) predictions with one batched call and writes each into its event's prediction cache. If a prediction is still the one shown on its event, the summary also replaces the live text and is broadcast via prediction_update. Results for predictions that were superseded in the meantime are discarded, and predictions the LLM failed on get the fallback text."""
+    with app.app_context():
+        try:
+            summaries = summarize_batch([payload for _, _, _, payload in summary_jobs])
+        except Exception as e:
+            print(f"      ⚠️ LLM error for {len(summary_jobs)} prediction summaries, continuing without text summary. Details: {e}")
+            summaries = {}
+
+        with _write_back_lock:
+            _store_summaries(summary_jobs, summaries)
+
+
+def _store_summaries(summary_jobs, summaries):
+    """Writes generated summaries (dict of summary_id to text) back into the prediction caches and live summaries of their events, broadcasting the ones that are currently shown. Must run inside an application context."""
+    jobs_by_event = {}
+    for job in summary_jobs:
+        jobs_by_event.setdefault(job[0], []).append(job)
+
+    # The row locks keep write-backs from other worker processes from interleaving on databases that support it
+    events = FireEvent.query.filter(FireEvent.id.in_(jobs_by_event)).with_for_update().all()
+    current_events = []
+    for event in events:
+        cache = dict(event.prediction_cache or {})
+        for _, target_hours, fingerprint, payload in jobs_by_event[event.id]:
+            summary = summaries.get(payload["summary_id"], LLM_SUMMARY_FALLBACK)
+            key = str(float(target_hours))
+            cached = cache.get(key)
+            is_cached = cached is not None and cached.get("fingerprint") == fingerprint
+            is_current = event.prediction_fingerprint == fingerprint
+            if not is_cached and not is_current:
+                print(f"      💤 Event {event.id}: Prediction for {target_hours} hours changed before its summary arrived. Discarding.")
+                continue
+
+            if is_cached:
+                cache[key] = dict(cached, prediction_summary=summary)
+            if is_current:
+                event.prediction_summary = summary
+                current_events.append(event)
+        # Assign a new dict so SQLAlchemy detects the change to the JSON column
+        event.prediction_cache = cache
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"   ❌ Predictor Error (Summary Commit Fail): {e}")
+        return
+
+    if current_events:
+        emitter = _prediction_emitter()
+        for event in current_events:
+            _emit_prediction_update(emitter, event)
+            print("emitted prediction summary for event", event.id)
 
 
 class FirePredictorAgent:
@@ -15,27 +103,133 @@ class FirePredictorAgent:
     def __init__(self):
         """Initializes the FirePredictorAgent with an LLM agent for generating human-readable prediction summaries."""
         self.llm_agent = LLMAgent()
+        # Results of the last predict_horizons() call: the events it covered, each horizon's prediction record per event id, and the events recomputed per horizon
+        self._events = []
+        self._horizon_predictions = {}
+        self._recomputed_events = {}
 
     def run_cycle(self, target_hours=1.0):
         """Scans the database for active fire events, calculates fire spread predictions for the specified time horizon using the Rothermel model, updates event records with prediction polygons and risk assessments, and broadcasts results to connected clients via WebSocket."""
         print(f"\n🔮 Predictor Agent: Waking up and calculating prediction for {target_hours} hours ahead...")
 
+        if self.predict_horizons([target_hours]):
+            self.apply_horizon(target_hours)
+
+    def predict_horizons(self, horizons=PREDICTION_HORIZONS_HOURS):
+        """Calculates fire spread predictions for all active fire events and all given time horizons in one vectorized pass. Event and horizon pairs whose input fingerprint matches the stored prediction reuse it; the rest are computed by the spread engine and stored in the event's prediction cache only, leaving the live prediction fields untouched until apply_horizon(). LLM summaries are queued as background jobs after the commit, so this never waits on the LLM. Returns the active events; apply_horizon() then puts one horizon's predictions on them."""
+        horizons = [float(h) for h in horizons]
+
         # Query all active fire events that require prediction
         events_to_predict = FireEvent.query.filter(
             FireEvent.is_active == True
         ).all()
 
+        self._events = events_to_predict
+        self._horizon_predictions = {h: {} for h in horizons}
+        self._recomputed_events = {h: [] for h in horizons}
+
         if not events_to_predict:
             print("   💤 No active events requiring prediction at this time.")
-            return
+            return []
 
-        print(f"   🚀 Found {len(events_to_predict)} active events. Starting calculation...")
+        print(f"   🚀 Found {len(events_to_predict)} active events. Starting calculation for horizons {horizons}...")
 
-        events_updated = 0
+        # Events whose inputs are unchanged since their last prediction for a horizon reuse the stored result
+        dirty_events = []
+        dirty_fingerprints = []
+        dirty_inputs = []
+        summary_jobs = []
+        predictions_reused = 0
         for event in events_to_predict:
-            success = self._calculate_and_update(event, target_hours)
-            if success:
-                events_updated += 1
+            cache = event.prediction_cache or {}
+            stale = {}
+            for h in horizons:
+                fingerprint = self._prediction_fingerprint(event, h)
+                cached = cache.get(str(h))
+                if cached and cached.get("fingerprint") == fingerprint:
+                    self._horizon_predictions[h][event.id] = cached
+                    predictions_reused += 1
+                    # Summaries that never arrived or failed are requested again
+                    if cached["prediction_summary"] in (SUMMARY_PENDING_TEXT, LLM_SUMMARY_FALLBACK):
+                        summary_jobs.append((event.id, h, fingerprint, self._build_llm_payload(event, cached, h)))
+                else:
+                    stale[h] = fingerprint
+            if not stale:
+                continue
+
+            try:
+                dirty_inputs.append(self._spread_inputs(event))
+            except Exception as e:
+                print(f"      ⚠️ Calculation error for event {event.id}: {e}")
+                continue
+            dirty_events.append(event)
+            dirty_fingerprints.append(stale)
+
+        predictions_computed = 0
+        if dirty_events:
+            spread = compute_spread(build_spread_inputs(dirty_inputs), horizons)
+
+            for i, (event, stale) in enumerate(zip(dirty_events, dirty_fingerprints)):
+                for j, h in enumerate(horizons):
+                    if h not in stale:
+                        continue
+                    record = self._spread_record(event, spread, i, j, h, stale[h])
+                    summary_jobs.append((event.id, h, stale[h], self._build_llm_payload(event, record, h)))
+                    self._store_cached_prediction(event, h, record)
+                    self._horizon_predictions[h][event.id] = record
+                    self._recomputed_events[h].append(event)
+                    predictions_computed += 1
+
+        print(f"   ♻️ Predictor: {predictions_computed} predictions recomputed, {predictions_reused} unchanged predictions reused.")
+
+        if predictions_computed > 0:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"   ❌ Predictor Error (Commit Fail): {e}")
+                return events_to_predict
+
+        # Summaries are queued only once the predictions they describe are committed
+        self._enqueue_summaries(summary_jobs)
+        return events_to_predict
+
+    def _enqueue_summaries(self, summary_jobs):
+        """Queues background LLM summary jobs for the given (event id, horizon, fingerprint, payload) tuples, packed into batches under the LLM token budget so each batch costs one LLM call. A prediction whose summary job is already pending is not queued twice."""
+        if not summary_jobs:
+            return
+
+        app = current_app._get_current_object()
+        summary_queue = get_summary_queue()
+        jobs_by_id = {job[3]["summary_id"]: job for job in summary_jobs}
+
+        queued = 0
+        batches = split_into_batches([job[3] for job in summary_jobs])
+        for batch in batches:
+            jobs = [jobs_by_id[payload["summary_id"]] for payload in batch]
+            queued += summary_queue.submit_batch([(job[:3], job) for job in jobs], write_back_summaries, app,
+                                                 self.llm_agent.summarize_predictions_batch)
+        print(f"   📝 Predictor: {queued} prediction summaries queued for the LLM in {len(batches)} batches.")
+
+    def apply_horizon(self, target_hours):
+        """Puts the predictions computed by predict_horizons() for the given horizon on the fire events that are still active, saves them, and broadcasts the recomputed ones to connected clients via WebSocket."""
+        target_hours = float(target_hours)
+        if target_hours not in self._horizon_predictions:
+            self.predict_horizons([target_hours])
+
+        predictions = self._horizon_predictions.get(target_hours, {})
+        events_updated = 0
+        for event in self._events:
+            record = predictions.get(event.id)
+            if record is None or not event.is_active:
+                continue
+
+            # The stored copy may already carry a summary written back by a background job
+            cached = (event.prediction_cache or {}).get(str(target_hours))
+            if cached and cached.get("fingerprint") == record["fingerprint"]:
+                record = cached
+            self._apply_prediction_record(event, record)
+            events_updated += 1
 
         # Save all updated predictions to the database
         if events_updated > 0:
@@ -44,18 +238,13 @@ class FirePredictorAgent:
                 db.session.commit()
                 print("   ✅ Predictions saved successfully!")
 
-                # Retrieve Redis URL for distributed WebSocket communication
-                redis_url = os.environ.get('REDIS_URL')
+                emitter = _prediction_emitter()
 
-                # Create WebSocket emitter with Redis support if available for multi-worker environments
-                emitter = SocketIO(message_queue=redis_url) if redis_url else SocketIO()
-
-                for event in events_to_predict:
-                    emitter.emit('prediction_update', {
-                        'event_id': event.id,
-                        'prediction_polygon': event.prediction_polygon,
-                        'prediction_summary': event.prediction_summary
-                    })
+                # Only recomputed events are re-emitted; clients already hold the reused predictions
+                for event in self._recomputed_events.get(target_hours, []):
+                    if not event.is_active:
+                        continue
+                    _emit_prediction_update(emitter, event)
                     print("emitted prediction update for event", event.id)
                     # Introduce a brief delay to prevent overwhelming the server
                     emitter.sleep(1)
@@ -65,146 +254,121 @@ class FirePredictorAgent:
                 print(f"   ❌ Predictor Error (Commit Fail): {e}")
 
     def _calculate_and_update(self, event, target_hours):
-        """Calculates fire spread predictions for a single event using the Rothermel model with environmental data, applies time-decay for long-range forecasts, and updates the event with prediction polygon, risk level, and LLM-generated summary text."""
+        """Calculates fire spread predictions for a single event using the Rothermel model with environmental data, applies time-decay for long-range forecasts, and updates the event with prediction polygon and risk level. The summary is left pending for a background LLM job."""
         try:
-            # Retrieve environmental data with IMS as priority and OWM as fallback
-            wind_speed = event.ims_wind_speed if (event.ims_wind_speed is not None and event.ims_wind_speed >= 0) else (event.owm_wind_speed or 0)
-            wind_dir = event.ims_wind_dir if (event.ims_wind_dir is not None and event.ims_wind_dir >= 0) else (event.owm_wind_deg or 0)
-            temp = event.ims_temp if (event.ims_temp is not None and event.ims_temp > -100) else (event.owm_temperature or 25)
-            humidity = event.ims_humidity if (event.ims_humidity is not None and event.ims_humidity >= 0) else (event.owm_humidity or 50)
-
-            rain = event.ims_rain or 0.0
-            gust = event.ims_wind_gust or wind_speed
-            fuel_load = event.fuel_load or 1.0
-            slope = event.topo_slope or 0
-            aspect = event.topo_aspect or 0
-
-            # If rain is detected, halt fire spread calculation and set minimal polygon
-            if rain > 0.5:
-                print(f"      🌧️ Event {event.id}: Rain detected. Setting point polygon.")
-                event.pred_ros = 0
-                event.pred_risk_level = "LOW"
-                event.pred_direction = 0
-                event.pred_flame_length = 0
-                event.prediction_polygon = self._generate_point_geojson(event.latitude, event.longitude)
-                event.prediction_updated_at = datetime.utcnow()
-                return True
-
-            # Apply calibrated Rothermel model to calculate rate of spread in meters per hour
-            effective_wind_kmh = (wind_speed * 0.6 + gust * 0.4) * 3.6
-
-            wind_factor = 1.0 + (0.1 * effective_wind_kmh)
-            if wind_factor > 4.5:
-                wind_factor = 4.5
-
-            solar_factor = 1.2 if 90 < aspect < 270 else 1.0
-            dryness = 1.0
-            if humidity < 20: dryness += 0.5
-            if temp > 30: dryness += 0.3
-            total_dryness = dryness * solar_factor
-
-            slope_factor = math.exp(0.069 * slope)
-
-            base_ros = fuel_load * 40.0
-
-            # Calculate spread rates in meters per hour for head, flank, and back of fire
-            ros_head = base_ros * wind_factor * slope_factor * total_dryness
-            ros_flank = ros_head * 0.35
-            ros_back = ros_head * 0.05
-
-            # Determine flame length and classify risk level based on fire intensity
-            flame_length = 0.07 * (ros_head ** 0.5)
-            risk_level = "MODERATE"
-            if flame_length > 3.0:
-                risk_level = "EXTREME"
-            elif flame_length > 1.5:
-                risk_level = "HIGH"
-
-            # Calculate fire spread direction and generate prediction geometry as GeoJSON
-            spread_azimuth = (wind_dir + 180) % 360
-
-            # Apply time-decay mechanism to prevent exaggerated polygons for long-term predictions
-            effective_hours = target_hours
-            if target_hours > 3.0:
-                effective_hours = 3.0 + ((target_hours - 3.0) * 0.5)
-
-            # Calculate distances the fire will travel in each direction based on effective time
-            head_distance = ros_head * effective_hours
-            back_distance = ros_back * effective_hours
-            flank_distance = ros_flank * effective_hours
-
-            polygon = self._generate_ellipse_geojson(
-                event.latitude, event.longitude, spread_azimuth,
-                head_distance, back_distance, flank_distance
-            )
-
-            # Update event object with calculated prediction data
-            event.pred_ros = ros_head
-            event.pred_direction = spread_azimuth
-            event.pred_flame_length = flame_length
-            event.pred_risk_level = risk_level
-            event.prediction_polygon = polygon
-            event.prediction_updated_at = datetime.utcnow()
-
-            # Generate human-readable prediction summary using LLM agent
-            try:
-                prediction_data = self._build_llm_payload(event)
-                prediction_data["predictions"]["time_horizon_hours"] = target_hours
-
-                readable_prediction = self.llm_agent.summarize_predictions([prediction_data])
-                event.prediction_summary = readable_prediction
-            except Exception as e:
-                print(f"      ⚠️ LLM error for event {event.id}, continuing without text summary. Details: {e}")
-                event.prediction_summary = "⚠️ Temporary issue generating text summary."
-
-            print(
-                f"      ✅ Event {event.id}: Prediction for {target_hours} hours completed (ROS={int(ros_head)}m/h, Risk={risk_level})")
+            spread = compute_spread(build_spread_inputs([self._spread_inputs(event)]), [target_hours])
+            record = self._spread_record(event, spread, 0, 0, target_hours,
+                                         self._prediction_fingerprint(event, target_hours))
+            self._apply_prediction_record(event, record)
             return True
 
         except Exception as e:
             print(f"      ⚠️ Calculation error for event {event.id}: {e}")
             return False
 
-    def _generate_ellipse_geojson(self, lat, lon, azimuth, head_m, back_m, flank_m):
-        """Generates an elliptical polygon in GeoJSON format representing the predicted fire spread area, calculated from the origin coordinates, spread direction azimuth, and distances traveled in head, back, and flank directions."""
-        major_axis = (head_m + back_m) / 2.0
-        minor_axis = flank_m
-        center_offset = (head_m - back_m) / 2.0
-        azimuth_rad = math.radians(azimuth)
-
-        offset_y = center_offset * math.cos(azimuth_rad)
-        offset_x = center_offset * math.sin(azimuth_rad)
-
-        points = []
-        num_points = 16
-        for i in range(num_points):
-            angle = 2 * math.pi * i / num_points
-            x = minor_axis * math.cos(angle)
-            y = major_axis * math.sin(angle)
-
-            # Rotate point coordinates by azimuth angle
-            rot_x = x * math.cos(-azimuth_rad) - y * math.sin(-azimuth_rad)
-            rot_y = x * math.sin(-azimuth_rad) + y * math.cos(-azimuth_rad)
-
-            final_x = offset_x + rot_x
-            final_y = offset_y + rot_y
+    def _spread_record(self, event, spread, index, horizon_index, target_hours, fingerprint):
+        """Returns the prediction record of one event x horizon result of the spread engine (rate of spread, direction, flame length, risk level and prediction polygon) tagged with its input fingerprint and a pending summary, without touching the event. Events halted by rain get a point polygon."""
+        record = {
+            "fingerprint": fingerprint,
+            "prediction_updated_at": datetime.utcnow().isoformat(),
+            "prediction_summary": SUMMARY_PENDING_TEXT
+        }
 
-            # Convert from meters to degrees for geographic coordinates
-            delta_lat = final_y / 111000.0
-            delta_lon = final_x / (111000.0 * math.cos(math.radians(lat)))
+        # If rain is detected, the fire does not spread and the polygon collapses to the origin
+        if spread["rain_stop"][index]:
+            print(f"      🌧️ Event {event.id}: Rain detected. Setting point polygon.")
+            record.update({
+                "pred_ros": 0,
+                "pred_risk_level": "LOW",
+                "pred_direction": 0,
+                "pred_flame_length": 0,
+                "prediction_polygon": self._generate_point_geojson(event.latitude, event.longitude)
+            })
+            return record
+
+        ros_head = float(spread["ros_head"][index])
+        risk_level = str(spread["risk_level"][index])
+        record.update({
+            "pred_ros": ros_head,
+            "pred_direction": float(spread["direction"][index]),
+            "pred_flame_length": float(spread["flame_length"][index]),
+            "pred_risk_level": risk_level,
+            "prediction_polygon": {"type": "Polygon",
+                                   "coordinates": [spread["vertices"][index, horizon_index].tolist()]}
+        })
+
+        print(
+            f"      ✅ Event {event.id}: Prediction for {target_hours} hours completed (ROS={int(ros_head)}m/h, Risk={risk_level})")
+        return record
+
+    def _resolve_inputs(self, event):
+        """Returns the environmental inputs of the spread model for an event, taking IMS station data as priority and OpenWeatherMap data as fallback, with neutral defaults for missing values."""
+        wind_speed = event.ims_wind_speed if (event.ims_wind_speed is not None and event.ims_wind_speed >= 0) else (event.owm_wind_speed or 0)
+        wind_dir = event.ims_wind_dir if (event.ims_wind_dir is not None and event.ims_wind_dir >= 0) else (event.owm_wind_deg or 0)
+        temp = event.ims_temp if (event.ims_temp is not None and event.ims_temp > -100) else (event.owm_temperature or 25)
+        humidity = event.ims_humidity if (event.ims_humidity is not None and event.ims_humidity >= 0) else (event.owm_humidity or 50)
+
+        return {
+            "wind_speed": wind_speed,
+            "wind_dir": wind_dir,
+            "temp": temp,
+            "humidity": humidity,
+            "rain": event.ims_rain or 0.0,
+            "gust": event.ims_wind_gust or wind_speed,
+            "fuel_load": event.fuel_load or 1.0,
+            "slope": event.topo_slope or 0,
+            "aspect": event.topo_aspect or 0
+        }
 
-            points.append([lon + delta_lon, lat + delta_lat])
+    def _prediction_fingerprint(self, event, target_hours):
+        """Returns a hash of everything a prediction depends on: the resolved weather, fuel and terrain inputs (rounded so float noise does not count as a change), the fuel type shown in the summary, the fire centroid and the time horizon."""
+        inputs = {key: round(float(value), FINGERPRINT_DECIMALS) for key, value in self._resolve_inputs(event).items()}
+        inputs["fuel_type"] = getattr(event, 'fuel_type', None)
+        inputs["centroid"] = [round(event.latitude, FINGERPRINT_COORD_DECIMALS),
+                              round(event.longitude, FINGERPRINT_COORD_DECIMALS)]
+        inputs["target_hours"] = float(target_hours)
+
+        encoded = json.dumps(inputs, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _spread_inputs(self, event):
+        """Returns the spread engine input record of an event: its centroid and resolved model inputs as floats."""
+        inputs = {key: float(value) for key, value in self._resolve_inputs(event).items()}
+        inputs["lat"] = float(event.latitude)
+        inputs["lon"] = float(event.longitude)
+        return inputs
+
+    def _apply_prediction_record(self, event, record):
+        """Copies a prediction record onto the event's live prediction fields and marks it as the event's current prediction."""
+        event.prediction_fingerprint = record["fingerprint"]
+        # Records cached before the computation time was stored keep the event's timestamp
+        if record.get("prediction_updated_at"):
+            event.prediction_updated_at = datetime.fromisoformat(record["prediction_updated_at"])
+        event.pred_ros = record["pred_ros"]
+        event.pred_direction = record["pred_direction"]
+        event.pred_flame_length = record["pred_flame_length"]
+        event.pred_risk_level = record["pred_risk_level"]
+        event.prediction_polygon = record["prediction_polygon"]
+        event.prediction_summary = record["prediction_summary"]
+
+    def _store_cached_prediction(self, event, target_hours, record):
+        """Stores a freshly computed prediction record in the event's cache under its horizon."""
+        # Assign a new dict so SQLAlchemy detects the change to the JSON column
+        cache = dict(getattr(event, 'prediction_cache', None) or {})
+        cache[str(float(target_hours))] = record
+        event.prediction_cache = cache
 
-        # Close the polygon by repeating the first point
-        points.append(points[0])
-        return {"type": "Polygon", "coordinates": [points]}
+    def _generate_ellipse_geojson(self, lat, lon, azimuth, head_m, back_m, flank_m):
+        """Generates an elliptical polygon in GeoJSON format representing the predicted fire spread area, calculated from the origin coordinates, spread direction azimuth, and distances traveled in head, back, and flank directions."""
+        vertices = ellipse_vertices(lat, lon, azimuth, head_m, back_m, flank_m)
+        return {"type": "Polygon", "coordinates": [vertices.tolist()]}
 
     def _generate_point_geojson(self, lat, lon):
         """Creates a minimal point-based polygon in GeoJSON format for fire events where no spread is expected, such as when rain is detected."""
         return {"type": "Polygon", "coordinates": [[[lon, lat], [lon, lat], [lon, lat], [lon, lat]]]}
 
-    def _build_llm_payload(self, event):
-        """Constructs a structured payload dictionary containing fire event data, environmental conditions, and prediction results for LLM processing and summary generation."""
+    def _build_llm_payload(self, event, record=None, target_hours=None):
+        """Constructs a structured payload dictionary containing fire event data, environmental conditions, and prediction results for LLM processing and summary generation. Prediction results are taken from the given prediction record instead of the event's current fields when one is passed."""
         wind_speed = event.ims_wind_speed if event.ims_wind_speed is not None else (event.owm_wind_speed or 0)
         wind_dir = event.ims_wind_dir if event.ims_wind_dir is not None else (event.owm_wind_deg or 0)
         temp = event.ims_temp if event.ims_temp is not None else (event.owm_temperature or 25)
@@ -227,4 +391,18 @@ class FirePredictorAgent:
             }
         }
 
+        if record is not None:
+            payload["predictions"].update({
+                "rate_of_spread_meters_per_hour": record["pred_ros"],
+                "flame_length_meters": record["pred_flame_length"],
+                "spread_direction_azimuth": record["pred_direction"],
+                "risk_level": record["pred_risk_level"],
+                "prediction_timestamp": record.get("prediction_updated_at",
+                                                   payload["predictions"]["prediction_timestamp"])
+            })
+        if target_hours is not None:
+            payload["predictions"]["time_horizon_hours"] = target_hours
+            # Identifies the event x horizon prediction in batched summary responses
+            payload["summary_id"] = f"{event.id}:{target_hours}"
+
         return payload
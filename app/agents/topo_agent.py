@@ -1,100 +1,139 @@
-import math
+import asyncio
 import time
 
-import requests
+import numpy as np
 
-# Create global session for improved performance with single handshake to the server
-topo_session = requests.Session()
-topo_session.headers.update({"User-Agent": "FireCommand-Topo-Agent"})
+from app.geo.terrain import slope_aspect_deg
+from app.services.dem_store import get_dem_store
 
 # External API URL for topography data
 TOPO_API_URL = "https://api.opentopodata.org/v1/srtm30m"
+TOPO_HEADERS = {"User-Agent": "FireCommand-Topo-Agent"}
+
+# Offset (degrees) of the four neighbouring stencil points around each fire center
+TOPO_STENCIL_OFFSET = 0.0003
+# OpenTopoData accepts up to 100 locations per request, i.e. 20 five-point event stencils
+TOPO_MAX_LOCATIONS = 100
+TOPO_BATCH_EVENTS = TOPO_MAX_LOCATIONS // 5
+
+
+def _stencil_points(fire_event):
+    """Returns the five 'lat,lon' stencil points of a fire event: center, north, south, east and west."""
+    lat = fire_event.latitude
+    lon = fire_event.longitude
+    offset = TOPO_STENCIL_OFFSET
+    return [
+        f"{lat},{lon}",
+        f"{lat + offset},{lon}",
+        f"{lat - offset},{lon}",
+        f"{lat},{lon + offset}",
+        f"{lat},{lon - offset}"
+    ]
+
+
+def compute_slope_aspect(elevations):
+    """
+    Computes slope and aspect for many five-point stencils at once. Takes an (n, 5) array of elevations ordered center, north, south, east, west, and returns two arrays: slope in degrees (rounded to 0.1) and aspect in degrees from north (rounded to 1, 0 where the east-west gradient is flat).
+    """
+    elevations = np.asarray(elevations, dtype=float)
+
+    # Calculate slope and aspect using elevation gradients in x and y directions
+    dz_dx = (elevations[:, 3] - elevations[:, 4]) / 60.0
+    dz_dy = (elevations[:, 1] - elevations[:, 2]) / 60.0
+    slope_deg, aspect_deg = slope_aspect_deg(dz_dx, dz_dy)
 
+    return np.round(slope_deg, 1), np.round(aspect_deg, 0)
 
-def enrich_with_topography(fire_event):
+
+async def enrich_events_with_topography(fire_events, client):
     """
-    Enriches a fire event object with topographic data including elevation, slope, and aspect by querying the OpenTopoData API. The function updates the fire_event object in-memory without committing to the database, and implements retry logic with exponential backoff for rate-limited requests.
+    Enriches many fire events with elevation, slope and aspect, from the local DEM store when it covers them and otherwise by packing up to TOPO_BATCH_EVENTS five-point stencils into each OpenTopoData request. Batches go through the shared async HTTP client, which serializes requests to the rate-limited host and retries a 429 for the whole batch with jittered backoff. Updates the events in memory without committing to the database.
     """
+    fire_events = list(fire_events)
+    if not fire_events:
+        return
+
     start_time = time.time()
-    print(f"⛰️ Topo Agent: Working on Event #{fire_event.id}...")
-
-    try:
-        # Extract coordinates from the fire event object
-        lat = fire_event.latitude
-        lon = fire_event.longitude
-
-        # Prepare center point and four surrounding points for slope and aspect calculation
-        offset = 0.0003
-        points = [
-            f"{lat},{lon}",
-            f"{lat + offset},{lon}",
-            f"{lat - offset},{lon}",
-            f"{lat},{lon + offset}",
-            f"{lat},{lon - offset}"
-        ]
-
-        # Set maximum number of retry attempts in case of rate limit
-        max_retries = 3
-
-        for attempt in range(1, max_retries + 1):
-            # Use persistent session for better performance
-            response = topo_session.get(f"{TOPO_API_URL}?locations={'|'.join(points)}", timeout=10)
-
-            # Handle rate limiting with exponential backoff strategy
-            if response.status_code == 429:
-                print(f"   ⚠️ Topo Rate Limit (429). Waiting 1s before retry {attempt}/{max_retries}...")
-                time.sleep(0.5)
-                continue
-
-            if response.status_code != 200:
-                print(f"⚠️ Topo API Error: Status {response.status_code}")
-                break
-
-            data = response.json()
-            if 'results' not in data:
-                print("⚠️ Topo API returned invalid JSON")
-                break
-
-            elevations = [r['elevation'] for r in data['results']]
-
-            # Validate that all elevation values are present (can be None for sea or unmapped areas)
-            if any(e is None for e in elevations):
-                print("⚠️ Topo API returned None for elevation values")
-                break
-
-            z_center = elevations[0]
-
-            # Calculate slope using elevation gradients in x and y directions
-            dz_dx = (elevations[3] - elevations[4]) / 60.0
-            dz_dy = (elevations[1] - elevations[2]) / 60.0
-            slope_deg = round(math.degrees(math.atan(math.sqrt(dz_dx ** 2 + dz_dy ** 2))), 1)
-
-            # Calculate aspect (direction of slope) in degrees from north
-            aspect_deg = 0
-            if dz_dx != 0:
-                aspect_deg = math.degrees(math.atan2(dz_dy, -dz_dx))
-                if aspect_deg < 0:
-                    aspect_deg += 90
-                else:
-                    aspect_deg = 360 - aspect_deg + 90
-                aspect_deg = round(aspect_deg % 360, 0)
-
-            # Update the fire event object in memory
-            fire_event.topo_elevation = z_center
-            fire_event.topo_slope = slope_deg
-            fire_event.topo_aspect = aspect_deg
-
-            print(f"✅ Topo Updated locally: Elev={z_center}, Slope={slope_deg}")
-            print(f"   ⏱️ Topo agent took {(time.time() - start_time):.2f} seconds")
-
-            # Successfully enriched, exit the function
+
+    # Offline lookup first; only events outside DEM coverage go to the API
+    store = get_dem_store()
+    if store is not None:
+        fire_events = _enrich_from_dem(store, fire_events)
+        if not fire_events:
+            print(f"   ⏱️ Topo agent took {(time.time() - start_time):.4f} seconds (local DEM)")
             return
 
-        # Reached maximum retry attempts without success
-        print(f"❌ Topo Agent failed after {max_retries} attempts.")
-        print(f"   ⏱️ Topo agent time (Failed): {(time.time() - start_time):.2f} seconds")
+    batches = [fire_events[i:i + TOPO_BATCH_EVENTS] for i in range(0, len(fire_events), TOPO_BATCH_EVENTS)]
+    print(f"⛰️ Topo Agent: Working on {len(fire_events)} events in {len(batches)} batched requests...")
+
+    results = await asyncio.gather(*(_enrich_batch(batch, client) for batch in batches), return_exceptions=True)
+
+    updated = 0
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            print(f"❌ Topo Agent Failed (Exception) for events {[event.id for event in batch]}: {result}")
+        else:
+            updated += result
+
+    print(f"✅ Topo Updated locally: {updated}/{len(fire_events)} events")
+    print(f"   ⏱️ Topo agent took {(time.time() - start_time):.2f} seconds")
+
+
+def _enrich_from_dem(store, fire_events):
+    """Fills elevation, slope and aspect of the events covered by the local DEM store in one vectorized lookup, and returns the events it could not cover."""
+    elevations, slopes, aspects = store.sample([event.latitude for event in fire_events],
+                                               [event.longitude for event in fire_events])
+
+    uncovered = []
+    for event, elevation, slope, aspect in zip(fire_events, elevations, slopes, aspects):
+        if np.isnan(elevation) or np.isnan(slope):
+            uncovered.append(event)
+            continue
+        event.topo_elevation = round(float(elevation), 1)
+        event.topo_slope = round(float(slope), 1)
+        event.topo_aspect = round(float(aspect), 0)
 
-    except Exception as e:
-        print(f"❌ Topo Agent Failed (Exception): {e}")
-        print(f"   ⏱️ Topo agent time (Failed): {(time.time() - start_time):.2f} seconds")
+    print(f"⛰️ Topo Agent: {len(fire_events) - len(uncovered)}/{len(fire_events)} events from the local DEM")
+    return uncovered
 
+
+async def _enrich_batch(batch, client):
+    """Fetches the stencils of one batch of events in a single request, computes slope and aspect for the whole batch, and returns the number of events updated."""
+    points = [point for event in batch for point in _stencil_points(event)]
+
+    response = await client.get(TOPO_API_URL, params={"locations": "|".join(points)},
+                                headers=TOPO_HEADERS, timeout=10.0)
+
+    if response.status_code != 200:
+        print(f"⚠️ Topo API Error: Status {response.status_code} for a batch of {len(batch)} events")
+        return 0
+
+    data = response.json()
+    if len(data.get('results', [])) != len(points):
+        print("⚠️ Topo API returned invalid JSON")
+        return 0
+
+    # Missing elevations (sea or unmapped areas) become NaN and mark the event as invalid
+    elevations = np.array([np.nan if r['elevation'] is None else r['elevation'] for r in data['results']],
+                          dtype=float).reshape(len(batch), 5)
+    valid = ~np.isnan(elevations).any(axis=1)
+    slopes, aspects = compute_slope_aspect(elevations)
+
+    for event, ok, stencil, slope, aspect in zip(batch, valid, elevations, slopes, aspects):
+        if not ok:
+            print(f"⚠️ Topo API returned None for elevation values of Event #{event.id}")
+            continue
+
+        # Update the fire event object in memory
+        event.topo_elevation = float(stencil[0])
+        event.topo_slope = float(slope)
+        event.topo_aspect = float(aspect)
+
+    return int(valid.sum())
+
+
+async def enrich_with_topography(fire_event, client):
+    """
+    Enriches a single fire event object with topographic data including elevation, slope, and aspect; a one-event batch of enrich_events_with_topography.
+    """
+    await enrich_events_with_topography([fire_event], client)
@@ -10,6 +10,7 @@ from app.agents.monitor_agent import MonitorAgent
 from app.agents.nasa_agent import NasaIngestionService
 from app.agents.open_weather_map_agent import WeatherService
 from app.extensions import db
+from app.services.http_client import run_with_client
 
 # Create the Blueprint
 api = Blueprint('api', __name__)
@@ -55,7 +56,7 @@ def test_owm():
     service = WeatherService()
 
     # Update weather data for event ID 1
-    success = service.update_weather_for_event(1)
+    success = run_with_client(service.update_weather_for_event, 1)
 
     # Return response to browser indicating success or failure
     if success:
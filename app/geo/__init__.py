@@ -0,0 +1,4 @@
+"""
+Shared geospatial helpers used by the agents: great-circle distance kernels, in-memory spatial indexes
+for clustering fire detections and looking up nearby fire events, terrain derivatives and the in-country border filter.
+"""
@@ -0,0 +1,61 @@
+"""
+In-country filter over Israel's border polygon.
+The polygon is loaded from app/data/israel_borders.geojson and prepared once per process; points are tested in bulk
+with Shapely 2's vectorized predicates, after a cheap bounding-box pre-reject that skips the exact test for points
+that are clearly outside.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+BORDERS_GEOJSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data',
+                                    'israel_borders.geojson')
+
+_israel_polygon = None
+_israel_polygon_loaded = False
+_israel_polygon_lock = threading.Lock()
+
+
+def get_israel_polygon():
+    """Returns the prepared Shapely polygon of Israel's borders, loading it on first use, or None if the GeoJSON file cannot be loaded."""
+    global _israel_polygon, _israel_polygon_loaded
+
+    with _israel_polygon_lock:
+        if not _israel_polygon_loaded:
+            _israel_polygon_loaded = True
+            try:
+                with open(BORDERS_GEOJSON_PATH, 'r', encoding='utf-8') as f:
+                    geojson_data = json.load(f)
+                polygon = shape(geojson_data['features'][0]['geometry'])
+                # Prepared geometry builds the spatial index used by repeated containment tests
+                shapely.prepare(polygon)
+                _israel_polygon = polygon
+            except Exception as e:
+                print(f"Warning: Failed to load Israel polygon: {e}")
+    return _israel_polygon
+
+
+def in_country(lats, lons):
+    """Returns a boolean NumPy array marking which coordinates lie inside Israel's borders. Points outside the polygon's bounding box are rejected without the exact test. If the border polygon is unavailable every point is accepted, so callers degrade to no filtering."""
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    polygon = get_israel_polygon()
+    if polygon is None:
+        return np.ones(lats.shape, dtype=bool)
+
+    lon_min, lat_min, lon_max, lat_max = polygon.bounds
+    inside = (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+    if inside.any():
+        inside[inside] = shapely.contains_xy(polygon, lons[inside], lats[inside])
+    return inside
+
+
+def is_in_country(lat, lon):
+    """Returns True if a single coordinate lies inside Israel's borders."""
+    return bool(in_country([lat], [lon])[0])
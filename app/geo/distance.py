@@ -0,0 +1,60 @@
+"""
+Great-circle distance helpers shared by the agents and models.
+All coordinates are in decimal degrees and all distances are returned in kilometers. The NumPy kernels accept
+sequences or arrays and evaluate every pair in a single vectorized pass instead of nested Python loops.
+"""
+
+import math
+
+import numpy as np
+
+# Mean Earth radius in kilometers (spherical model used across the system)
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Calculates the great-circle distance in kilometers between two geographic coordinates using the Haversine formula, taking latitude and longitude pairs in decimal degrees and returning the distance as a float."""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(
+        dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_matrix(lats1, lons1, lats2, lons2):
+    """Calculates the many-to-many great-circle distance matrix in kilometers between two sets of coordinates, returning a NumPy array of shape (len(lats1), len(lats2)) where cell [i, j] is the distance from point i of the first set to point j of the second."""
+    lat1 = np.radians(np.asarray(lats1, dtype=float))[:, np.newaxis]
+    lon1 = np.radians(np.asarray(lons1, dtype=float))[:, np.newaxis]
+    lat2 = np.radians(np.asarray(lats2, dtype=float))[np.newaxis, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=float))[np.newaxis, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def unit_vectors(lats, lons):
+    """Converts coordinates in degrees to 3D unit vectors on the sphere, where straight-line (chord) distance grows monotonically with great-circle distance, so a KD-tree over them ranks neighbours by true great-circle distance."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def nearest_neighbors(lats, lons, ref_lats, ref_lons):
+    """Finds, for every query coordinate, the closest reference coordinate by great-circle distance. Returns a tuple (indices, distances_km) of NumPy arrays aligned with the queries; with no reference points the indices are -1 and the distances are infinite. Ties resolve to the first reference point, like a linear scan."""
+    num_queries = len(lats)
+    if len(ref_lats) == 0 or num_queries == 0:
+        return np.full(num_queries, -1, dtype=int), np.full(num_queries, np.inf)
+
+    distances = haversine_matrix(lats, lons, ref_lats, ref_lons)
+    indices = np.argmin(distances, axis=1)
+    return indices, distances[np.arange(num_queries), indices]
+
+
+def nearest_neighbor(lat, lon, ref_lats, ref_lons):
+    """Finds the closest reference coordinate to a single query point, returning a tuple (index, distance_km), or (None, inf) when there are no reference points."""
+    indices, distances = nearest_neighbors([lat], [lon], ref_lats, ref_lons)
+    if indices[0] < 0:
+        return None, float('inf')
+    return int(indices[0]), float(distances[0])
@@ -0,0 +1,130 @@
+"""
+Uniform latitude/longitude grid index for fast radius lookups over objects that expose `latitude` and `longitude`
+attributes (fire events, detections, stations). The cell size equals the search radius, so a radius query only
+has to inspect the neighbouring cells instead of every indexed object.
+"""
+
+import math
+
+from app.geo.distance import EARTH_RADIUS_KM, haversine_km
+
+# Small safety margin (degrees) so floating point rounding never drops a candidate on a cell boundary
+_CELL_MARGIN_DEG = 1e-9
+
+
+class GridIndex:
+    """
+    Spatial index that buckets objects into square lat/lon cells sized to the search radius. Behaves like an ordered collection (append, iteration, len) so it can replace a plain list cache, and returns the same closest match as a linear Haversine scan over the objects in insertion order.
+    """
+
+    def __init__(self, radius_km, items=()):
+        """Initializes an empty grid whose cell edge (in degrees of latitude) covers the given search radius in kilometers, then indexes any initial items in the order given."""
+        self.radius_km = radius_km
+        self.cell_deg = math.degrees(radius_km / EARTH_RADIUS_KM)
+
+        self._cells = {}  # (row, col) -> {id(item): item}
+        self._entries = {}  # id(item) -> (cell, insertion sequence, item)
+        self._next_seq = 0
+
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        """Returns the number of indexed objects."""
+        return len(self._entries)
+
+    def __iter__(self):
+        """Iterates over indexed objects in insertion order, matching the behaviour of the list cache it replaces."""
+        ordered = sorted(self._entries.values(), key=lambda entry: entry[1])
+        return iter([entry[2] for entry in ordered])
+
+    def __contains__(self, item):
+        """Returns True if the given object is currently indexed."""
+        return id(item) in self._entries
+
+    def _cell_of(self, lat, lon):
+        """Maps a coordinate to its (row, col) grid cell."""
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def append(self, item):
+        """Adds an object to the index using its current latitude and longitude. Objects that are already indexed are relocated instead of duplicated."""
+        if id(item) in self._entries:
+            self.update(item)
+            return
+
+        cell = self._cell_of(item.latitude, item.longitude)
+        self._cells.setdefault(cell, {})[id(item)] = item
+        self._entries[id(item)] = (cell, self._next_seq, item)
+        self._next_seq += 1
+
+    def update(self, item):
+        """Moves an already indexed object to the cell of its current coordinates (e.g. after an event centroid shifted). Objects that are not indexed are ignored."""
+        entry = self._entries.get(id(item))
+        if entry is None:
+            return
+
+        old_cell, seq, _ = entry
+        new_cell = self._cell_of(item.latitude, item.longitude)
+        if new_cell == old_cell:
+            return
+
+        bucket = self._cells[old_cell]
+        del bucket[id(item)]
+        if not bucket:
+            del self._cells[old_cell]
+
+        self._cells.setdefault(new_cell, {})[id(item)] = item
+        self._entries[id(item)] = (new_cell, seq, item)
+
+    def _candidate_cells(self, lat, lon):
+        """Yields the grid cells that can contain objects within the search radius of the coordinate, widening the longitude span with latitude and handling the antimeridian."""
+        dlat = self.cell_deg + _CELL_MARGIN_DEG
+
+        # Longitude half-width that is guaranteed to contain the radius at the most poleward latitude of the window
+        cos_max = math.cos(math.radians(min(90.0, abs(lat) + dlat)))
+        ratio = math.sin(self.radius_km / (2 * EARTH_RADIUS_KM)) / cos_max if cos_max > 0 else float('inf')
+        full_width = ratio >= 1.0
+        dlon = 180.0 if full_width else math.degrees(2 * math.asin(ratio)) + _CELL_MARGIN_DEG
+
+        row_lo, row_hi = math.floor((lat - dlat) / self.cell_deg), math.floor((lat + dlat) / self.cell_deg)
+
+        # Near the poles (or for huge radii) fall back to scanning every occupied cell in the latitude band
+        if full_width:
+            for cell in list(self._cells):
+                if row_lo <= cell[0] <= row_hi:
+                    yield cell
+            return
+
+        lon_windows = [(lon - dlon, lon + dlon)]
+        if lon - dlon < -180.0:
+            lon_windows.append((lon - dlon + 360.0, 180.0))
+        if lon + dlon > 180.0:
+            lon_windows.append((-180.0, lon + dlon - 360.0))
+
+        for lon_lo, lon_hi in lon_windows:
+            col_lo, col_hi = math.floor(lon_lo / self.cell_deg), math.floor(lon_hi / self.cell_deg)
+            for row in range(row_lo, row_hi + 1):
+                for col in range(col_lo, col_hi + 1):
+                    if (row, col) in self._cells:
+                        yield row, col
+
+    def find_nearest(self, lat, lon):
+        """Returns a (item, distance_km) tuple for the closest indexed object strictly within the search radius of the coordinate, or (None, inf) if there is none. Ties are broken by insertion order, exactly like a linear scan."""
+        best_item, best_dist, best_seq = None, float('inf'), None
+        seen = set()
+
+        for cell in self._candidate_cells(lat, lon):
+            if cell in seen:
+                continue
+            seen.add(cell)
+
+            for item in self._cells[cell].values():
+                dist = haversine_km(lat, lon, item.latitude, item.longitude)
+                if dist >= self.radius_km:
+                    continue
+
+                seq = self._entries[id(item)][1]
+                if dist < best_dist or (dist == best_dist and seq < best_seq):
+                    best_item, best_dist, best_seq = item, dist, seq
+
+        return best_item, best_dist
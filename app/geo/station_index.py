@@ -0,0 +1,85 @@
+"""
+Process-wide nearest-station lookup used to assign fire events to districts.
+The station table is loaded once into a KD-tree over unit vectors and reused by every lookup; the snapshot is dropped
+whenever a Station row is inserted, updated or deleted in this process, and refreshed after a TTL so changes made by
+other processes (e.g. a database reset from the web server) are eventually picked up.
+"""
+
+import threading
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sqlalchemy import event
+
+from app.geo.distance import unit_vectors
+from app.models.resources import Station
+
+# Maximum age of the in-memory station snapshot before it is reloaded from the database
+STATION_INDEX_TTL_SECONDS = 3600
+
+_station_index = None
+_station_index_lock = threading.Lock()
+
+
+class StationIndex:
+    """
+    Immutable snapshot of the fire station table holding a KD-tree over the station coordinates, answering batched nearest-station and district lookups without touching the database.
+    """
+
+    def __init__(self, stations):
+        """Builds the snapshot from an iterable of Station rows, copying the plain column values so the index never holds on to ORM objects."""
+        self.ids = [station.id for station in stations]
+        self.names = [station.name for station in stations]
+        self.districts = [station.district for station in stations]
+        self.lats = [station.latitude for station in stations]
+        self.lons = [station.longitude for station in stations]
+        self.tree = cKDTree(unit_vectors(self.lats, self.lons)) if self.ids else None
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        """Returns the number of stations in the snapshot."""
+        return len(self.ids)
+
+    def nearest_indices(self, lats, lons):
+        """Returns the index of the closest station for every query coordinate (-1 when the snapshot is empty)."""
+        if self.tree is None or not len(lats):
+            return np.full(len(lats), -1, dtype=int)
+        _, indices = self.tree.query(unit_vectors(lats, lons))
+        return indices
+
+    def districts_for(self, lats, lons):
+        """Returns the district name of the closest station for every query coordinate, or None when no stations are loaded (so callers leave the district unset and resolve it on a later cycle)."""
+        return [self.districts[i] if i >= 0 else None for i in self.nearest_indices(lats, lons)]
+
+    def district_for(self, lat, lon):
+        """Returns the district name of the station closest to a single coordinate."""
+        return self.districts_for([lat], [lon])[0]
+
+
+def get_station_index():
+    """Returns the process-wide station index, loading it from the database on first use or after it was invalidated or expired. Must be called inside an application context."""
+    global _station_index
+
+    index = _station_index
+    if index is not None and time.time() - index.loaded_at < STATION_INDEX_TTL_SECONDS:
+        return index
+
+    with _station_index_lock:
+        index = _station_index
+        if index is None or time.time() - index.loaded_at >= STATION_INDEX_TTL_SECONDS:
+            index = StationIndex(Station.query.all())
+            _station_index = index
+            print(f"🗺️ Station index loaded with {len(index)} stations.")
+    return index
+
+
+def invalidate_station_index(*_args):
+    """Drops the cached station snapshot so the next lookup reloads it. Accepts and ignores SQLAlchemy event arguments so it can be registered as a mapper listener."""
+    global _station_index
+    _station_index = None
+
+
+# Any station change made through the ORM in this process invalidates the snapshot
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Station, _event_name, invalidate_station_index)
@@ -0,0 +1,20 @@
+"""
+Terrain derivatives shared by the topography agent and the local DEM store.
+Gradients are dimensionless rise over run (meters per meter): dz_dx towards the east and dz_dy towards the north.
+"""
+
+import numpy as np
+
+
+def slope_aspect_deg(dz_dx, dz_dy):
+    """Converts elevation gradients to slope in degrees and aspect in degrees from north (0 where the east-west gradient is flat). Accepts scalars or arrays and returns unrounded NumPy values."""
+    dz_dx = np.asarray(dz_dx, dtype=float)
+    dz_dy = np.asarray(dz_dy, dtype=float)
+
+    slope = np.degrees(np.arctan(np.hypot(dz_dx, dz_dy)))
+
+    aspect = np.degrees(np.arctan2(dz_dy, -dz_dx))
+    aspect = np.where(aspect < 0, aspect + 90, 360 - aspect + 90) % 360
+    aspect = np.where(dz_dx != 0, aspect, 0.0)
+
+    return slope, aspect
@@ -1,9 +1,9 @@
-import math
 from datetime import datetime
 
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.extensions import db
+from app.geo.distance import haversine_km
 
 
 class FireEvent(db.Model):
@@ -30,6 +30,7 @@ class FireEvent(db.Model):
     frp = db.Column(db.Float)  # Maximum measured value
     confidence = db.Column(db.String(20))  # Of the most reliable/recent report
     source = db.Column(db.String(50))
+    district = db.Column(db.String(50))  # District of the nearest station, stored when the event is created or moved
 
     # --- Times and Status ---
     detected_at = db.Column(db.DateTime, nullable=False)  # Time of the first report
@@ -70,6 +71,9 @@ class FireEvent(db.Model):
     pred_risk_level = db.Column(db.String(20))  # LOW, MODERATE, HIGH, EXTREME
     prediction_updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     prediction_summary = db.Column(db.Text)
+    # Per-horizon prediction results keyed by the fingerprint of the inputs they were computed from
+    prediction_cache = db.Column(JSONB)
+    prediction_fingerprint = db.Column(db.String(64))  # Fingerprint of the prediction currently shown on the event
 
     # --- Commander Agent ---
     demand_perimeter_m = db.Column(db.Float)  # Required defense line (in meters) for the current predicted polygon
@@ -82,45 +86,26 @@ class FireEvent(db.Model):
     @staticmethod
     def _calculate_distance(lat1, lon1, lat2, lon2):
         """
-        Calculates the great-circle distance in kilometers between two geographic coordinates using the Haversine formula, taking latitude and longitude in decimal degrees and returning the air distance.
+        Calculates the great-circle distance in kilometers between two geographic coordinates using the shared Haversine kernel, taking latitude and longitude in decimal degrees and returning the air distance.
         """
-        # Earth's radius in kilometers
-        R = 6371.0
-        # Calculate differences in radians
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        # Apply Haversine formula
-        a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(
-            dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
 
     def to_dict(self):
         """
-        Converts the fire event to a dictionary representation for API responses, including computed district based on proximity to the nearest fire station, prediction polygon, and tactical summaries.
+        Converts the fire event to a dictionary representation for API responses, including the stored district of the nearest fire station, prediction polygon, and tactical summaries.
         """
-        # Local import to prevent circular dependency
-        from app.models.resources import Station
-        all_stations = Station.query.all()
-
-        # Find the district of the fire by determining the closest station
-        district = "UNKNOWN"
-        closest_station = None
-        min_dist = float('inf')
-        for station in all_stations:
-            dist = self._calculate_distance(self.latitude, self.longitude, station.latitude, station.longitude)
-            if dist < min_dist:
-                min_dist = dist
-                closest_station = station
-        if closest_station:
-            district = closest_station.district
+        district = self.district
+        if not district:
+            # Legacy rows created before the district was stored fall back to the cached station index
+            from app.geo.station_index import get_station_index
+            district = get_station_index().district_for(self.latitude, self.longitude)
 
         return {
             "event_id": self.id,
             "lat": self.latitude,
             "lon": self.longitude,
             "intensity": self.frp,
-            "district": district,
+            "district": district or "UNKNOWN",
             "created_at": self.created_at.isoformat(),
             "prediction_polygon": self.prediction_polygon,
             "prediction_summary": getattr(self, 'prediction_summary', "Computing prediction..."),
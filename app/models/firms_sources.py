@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class FirmsSourceState(db.Model):
+    """Ingestion progress of one NASA FIRMS satellite source. Stores the high-water mark (the latest acquisition time ingested from the source), so later cycles only request the smallest day window that can contain new detections."""
+    __tablename__ = 'firms_source_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(50), unique=True, nullable=False)
+    # Latest acq_date/acq_time seen from this source
+    last_detected_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
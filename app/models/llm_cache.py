@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class LlmCacheEntry(db.Model):
+    """Persistent cache of LLM responses. Each row stores the response text for a content-addressed key (a hash of the task type, model chain and normalized prompt payload), with creation and last-use timestamps for TTL expiry and LRU eviction."""
+    __tablename__ = 'llm_response_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)
+    task_type = db.Column(db.String(30), nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
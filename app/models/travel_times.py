@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class TravelTimeEntry(db.Model):
+    """Persistent cache of road travel times returned by the routing engine. Each row stores the driving duration from a station coordinate to a fire location snapped to a spatial grid cell, with fetch and last-use timestamps for TTL expiry and LRU eviction."""
+    __tablename__ = 'travel_time_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Origin (station coordinate, stations never move)
+    origin_lat = db.Column(db.Float, nullable=False)
+    origin_lon = db.Column(db.Float, nullable=False)
+    # Destination (fire location snapped to the cache grid)
+    dest_lat = db.Column(db.Float, nullable=False)
+    dest_lon = db.Column(db.Float, nullable=False)
+    # Driving duration in seconds (Null if the routing engine found no road)
+    duration_s = db.Column(db.Float, nullable=True)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('origin_lat', 'origin_lon', 'dest_lat', 'dest_lon', name='unique_travel_time_pair'),
+    )
@@ -0,0 +1,16 @@
+"""
+Database helpers shared by services that need dialect-specific SQL features.
+The production database is PostgreSQL (Neon) while the test suite runs on SQLite, so statements such as
+INSERT ... ON CONFLICT are built with the matching SQLAlchemy dialect.
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+
+def dialect_insert(table):
+    """Returns an INSERT construct for the given table built with the dialect of the active database engine, so callers can use on_conflict_do_nothing / on_conflict_do_update on both PostgreSQL and SQLite."""
+    if db.engine.dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    return postgresql.insert(table)
@@ -0,0 +1,220 @@
+"""
+Local digital elevation model (DEM) store for offline elevation, slope and aspect lookups, as a local alternative
+to the OpenTopoData API.
+
+Tiles are standard SRTM .hgt files in DEM_TILES_PATH, named after their south-west corner (e.g. N31E034.hgt covers
+latitudes 31-32 and longitudes 34-35). Each file is a square grid of big-endian int16 heights in meters (3601 x 3601
+for 1 arc-second, 1201 x 1201 for 3 arc-second), row 0 on the northern edge, with -32768 marking voids. Tiles are
+memory-mapped, so a lookup only reads the few pages it touches.
+
+Optional precomputed grids next to each tile (N31E034.slope.npy and N31E034.aspect.npy, float32, same shape) are
+built once with DemStore.precompute_slope_aspect() and memory-mapped on load; without them, slope and aspect are
+derived on the fly from a bilinearly sampled five-point stencil.
+"""
+
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from app.geo.distance import EARTH_RADIUS_KM
+from app.geo.terrain import slope_aspect_deg
+
+# Directory holding the SRTM .hgt tiles (and optional precomputed slope/aspect grids)
+DEM_TILES_PATH = os.environ.get('DEM_TILES_PATH', os.path.join('data', 'dem'))
+# SRTM marker for missing heights
+SRTM_VOID = -32768
+# Meters per degree of latitude on the spherical Earth model used across the system
+METERS_PER_DEGREE = EARTH_RADIUS_KM * 1000.0 * math.pi / 180.0
+
+TILE_NAME_PATTERN = re.compile(r'^([NS])(\d{2})([EW])(\d{3})\.hgt$', re.IGNORECASE)
+
+_dem_store = None
+_dem_store_loaded = False
+_dem_store_lock = threading.Lock()
+
+
+class DemTile:
+    """
+    One memory-mapped one-degree SRTM tile with bilinear height sampling and optional precomputed slope/aspect grids.
+    """
+
+    def __init__(self, lat0, lon0, heights, path=None, slope=None, aspect=None):
+        """Initializes the tile from its south-west corner (integer degrees), its square height grid, the .hgt file path and the optional slope/aspect grids."""
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.heights = heights
+        self.path = path
+        self.slope = slope
+        self.aspect = aspect
+        self.size = heights.shape[0]
+        self.step_deg = 1.0 / (self.size - 1)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps an SRTM .hgt file and, when present, its precomputed slope/aspect grids."""
+        match = TILE_NAME_PATTERN.match(os.path.basename(path))
+        if not match:
+            raise ValueError(f"Not an SRTM tile name: {path}")
+        lat_sign, lat_deg, lon_sign, lon_deg = match.groups()
+        lat0 = int(lat_deg) * (1 if lat_sign.upper() == 'N' else -1)
+        lon0 = int(lon_deg) * (1 if lon_sign.upper() == 'E' else -1)
+
+        size = int(round(math.sqrt(os.path.getsize(path) / 2)))
+        heights = np.memmap(path, dtype='>i2', mode='r', shape=(size, size))
+
+        prefix = path[:-len('.hgt')]
+        slope = aspect = None
+        if os.path.exists(f"{prefix}.slope.npy") and os.path.exists(f"{prefix}.aspect.npy"):
+            slope = np.load(f"{prefix}.slope.npy", mmap_mode='r')
+            aspect = np.load(f"{prefix}.aspect.npy", mmap_mode='r')
+        return cls(lat0, lon0, heights, path=path, slope=slope, aspect=aspect)
+
+    def _grid_position(self, lats, lons):
+        """Returns the fractional (row, col) grid position of each coordinate inside the tile."""
+        row = (self.lat0 + 1 - lats) * (self.size - 1)
+        col = (lons - self.lon0) * (self.size - 1)
+        return row, col
+
+    def _bilinear(self, grid, lats, lons):
+        """Bilinearly interpolates the grid at the given coordinates; any void or NaN corner yields NaN."""
+        row, col = self._grid_position(lats, lons)
+        r0 = np.clip(np.floor(row).astype(int), 0, self.size - 2)
+        c0 = np.clip(np.floor(col).astype(int), 0, self.size - 2)
+        fr = row - r0
+        fc = col - c0
+
+        corners = [np.asarray(grid[r0 + dr, c0 + dc], dtype=float) for dr in (0, 1) for dc in (0, 1)]
+        for corner in corners:
+            corner[corner == SRTM_VOID] = np.nan
+        z00, z01, z10, z11 = corners
+
+        return (z00 * (1 - fr) * (1 - fc) + z01 * (1 - fr) * fc +
+                z10 * fr * (1 - fc) + z11 * fr * fc)
+
+    def _nearest(self, grid, lats, lons):
+        """Returns the grid value of the cell nearest to each coordinate."""
+        row, col = self._grid_position(lats, lons)
+        r = np.clip(np.rint(row).astype(int), 0, self.size - 1)
+        c = np.clip(np.rint(col).astype(int), 0, self.size - 1)
+        return np.asarray(grid[r, c], dtype=float)
+
+    def elevation(self, lats, lons):
+        """Returns the bilinearly interpolated height in meters at each coordinate (NaN over voids)."""
+        return self._bilinear(self.heights, lats, lons)
+
+    def precompute_slope_aspect(self):
+        """Derives slope and aspect for every cell from central differences over the true cell spacing, saves them as float32 .npy grids next to the tile and memory-maps them."""
+        z = np.asarray(self.heights, dtype=float)
+        z[z == SRTM_VOID] = np.nan
+        padded = np.pad(z, 1, mode='edge')
+
+        cell_lats = self.lat0 + 1 - np.arange(self.size) * self.step_deg
+        dy_m = 2 * self.step_deg * METERS_PER_DEGREE
+        dx_m = dy_m * np.cos(np.radians(cell_lats))[:, np.newaxis]
+
+        # Row 0 is the northern edge, so north is the previous row
+        dz_dy = (padded[:-2, 1:-1] - padded[2:, 1:-1]) / dy_m
+        dz_dx = (padded[1:-1, 2:] - padded[1:-1, :-2]) / dx_m
+        slope, aspect = slope_aspect_deg(dz_dx, dz_dy)
+
+        prefix = self.path[:-len('.hgt')]
+        np.save(f"{prefix}.slope.npy", slope.astype(np.float32))
+        np.save(f"{prefix}.aspect.npy", aspect.astype(np.float32))
+        self.slope = np.load(f"{prefix}.slope.npy", mmap_mode='r')
+        self.aspect = np.load(f"{prefix}.aspect.npy", mmap_mode='r')
+
+
+class DemStore:
+    """
+    Collection of memory-mapped DEM tiles answering vectorized elevation, slope and aspect queries for any set of coordinates.
+    """
+
+    def __init__(self, tiles):
+        """Initializes the store from a list of DemTile objects, keyed by their south-west corner."""
+        self.tiles = {(tile.lat0, tile.lon0): tile for tile in tiles}
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps every SRTM .hgt tile found in the directory."""
+        tiles = [DemTile.load(os.path.join(path, name)) for name in sorted(os.listdir(path))
+                 if TILE_NAME_PATTERN.match(name)]
+        return cls(tiles)
+
+    def precompute_slope_aspect(self):
+        """Builds the slope/aspect grids of every tile (a one-off build step)."""
+        for tile in self.tiles.values():
+            tile.precompute_slope_aspect()
+
+    def _tile_groups(self, lats, lons):
+        """Yields (tile, point indices) for every tile containing at least one of the coordinates."""
+        keys = np.stack([np.floor(lats), np.floor(lons)], axis=1).astype(int)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, (lat0, lon0) in enumerate(unique_keys):
+            tile = self.tiles.get((int(lat0), int(lon0)))
+            if tile is not None:
+                yield tile, np.flatnonzero(inverse == k)
+
+    def elevation(self, lats, lons):
+        """Returns the interpolated height in meters at each coordinate, NaN outside coverage or over voids."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        result = np.full(len(lats), np.nan)
+        for tile, idx in self._tile_groups(lats, lons):
+            result[idx] = tile.elevation(lats[idx], lons[idx])
+        return result
+
+    def sample(self, lats, lons):
+        """Returns elevation (m), slope (degrees) and aspect (degrees from north) arrays for the coordinates, NaN where not covered. Uses the precomputed grids when a tile has them (slope interpolated, aspect from the nearest cell), otherwise a five-point stencil one grid cell wide."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        elevation = np.full(len(lats), np.nan)
+        slope = np.full(len(lats), np.nan)
+        aspect = np.full(len(lats), np.nan)
+
+        for tile, idx in self._tile_groups(lats, lons):
+            t_lats, t_lons = lats[idx], lons[idx]
+            elevation[idx] = tile.elevation(t_lats, t_lons)
+
+            if tile.slope is not None:
+                slope[idx] = tile._bilinear(tile.slope, t_lats, t_lons)
+                aspect[idx] = tile._nearest(tile.aspect, t_lats, t_lons)
+                continue
+
+            # Stencil neighbours may fall in adjacent tiles, so they are sampled through the whole store
+            step = tile.step_deg
+            north = self.elevation(t_lats + step, t_lons)
+            south = self.elevation(t_lats - step, t_lons)
+            east = self.elevation(t_lats, t_lons + step)
+            west = self.elevation(t_lats, t_lons - step)
+
+            dy_m = 2 * step * METERS_PER_DEGREE
+            dx_m = dy_m * np.cos(np.radians(t_lats))
+            slope[idx], aspect[idx] = slope_aspect_deg((east - west) / dx_m, (north - south) / dy_m)
+
+        # A void anywhere in the stencil invalidates the derived values
+        invalid = np.isnan(elevation) | np.isnan(slope)
+        slope[invalid] = np.nan
+        aspect[invalid] = np.nan
+        return elevation, slope, aspect
+
+
+def get_dem_store():
+    """Returns the process-wide DEM store, memory-mapping the tiles in DEM_TILES_PATH on first use. Returns None when the directory holds no tiles or cannot be loaded, so callers fall back to the API."""
+    global _dem_store, _dem_store_loaded
+
+    with _dem_store_lock:
+        if not _dem_store_loaded:
+            _dem_store_loaded = True
+            try:
+                if os.path.isdir(DEM_TILES_PATH):
+                    store = DemStore.load(DEM_TILES_PATH)
+                    if store.tiles:
+                        _dem_store = store
+                        print(f"⛰️ Local DEM store loaded {len(store.tiles)} tiles from {DEM_TILES_PATH}.")
+            except Exception as e:
+                print(f"⚠️ Local DEM store unavailable, falling back to the topography API: {e}")
+    return _dem_store
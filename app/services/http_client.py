@@ -0,0 +1,204 @@
+"""
+Shared asynchronous HTTP client layer for the enrichment agents and the NASA fetcher.
+Wraps a single pooled httpx.AsyncClient (keep-alive connections reused across requests), bounds the number of
+in-flight requests per upstream host with semaphores, spaces out requests to hosts with a published request rate, and
+retries transient failures (connection errors, timeouts,
+429 and 5xx responses) with jittered exponential backoff, so one event loop can drive hundreds of enrichments at once.
+"""
+
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+# Connection pool sizing for the shared client
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('HTTP_MAX_KEEPALIVE_CONNECTIONS', 20))
+# Default per-request timeout in seconds (connect timeout is capped separately)
+HTTP_DEFAULT_TIMEOUT_SECONDS = float(os.environ.get('HTTP_DEFAULT_TIMEOUT_SECONDS', 10.0))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('HTTP_CONNECT_TIMEOUT_SECONDS', 3.0))
+# Retry policy: attempts after the first request, base delay and delay cap for the exponential backoff
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_BASE_SECONDS = float(os.environ.get('HTTP_BACKOFF_BASE_SECONDS', 0.5))
+HTTP_BACKOFF_MAX_SECONDS = float(os.environ.get('HTTP_BACKOFF_MAX_SECONDS', 8.0))
+
+# Response statuses that are worth retrying
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Maximum concurrent requests per upstream host, sized to each API's rate limits
+HOST_CONCURRENCY = {
+    "api.openweathermap.org": 8,  # OpenWeatherMap
+    "api.opentopodata.org": 1,  # OpenTopoData public API (one request at a time, see HOST_MIN_INTERVAL_SECONDS)
+    "api.ims.gov.il": 4,  # Israel Meteorological Service
+    "ic.imagery1.arcgis.com": 4,  # ESRI Sentinel-2 Land Cover
+    "firms.modaps.eosdis.nasa.gov": 3  # NASA FIRMS
+}
+# Limit for hosts that are not listed above
+DEFAULT_HOST_CONCURRENCY = int(os.environ.get('HTTP_DEFAULT_HOST_CONCURRENCY', 8))
+# Minimum time between the starts of two requests to a host (seconds), for APIs that publish a request rate
+HOST_MIN_INTERVAL_SECONDS = {
+    "api.opentopodata.org": 1.0  # OpenTopoData public API (1 request per second)
+}
+
+
+class AsyncHttpClient:
+    """
+    Pooled asynchronous HTTP client with per-host concurrency semaphores, per-host minimum request intervals, per-request timeouts and retries with jittered exponential backoff. Use it as an async context manager, one instance per event loop.
+    """
+
+    def __init__(self, host_limits=None, default_host_limit=DEFAULT_HOST_CONCURRENCY, timeout=HTTP_DEFAULT_TIMEOUT_SECONDS,
+                 max_retries=HTTP_MAX_RETRIES, backoff_base=HTTP_BACKOFF_BASE_SECONDS,
+                 backoff_max=HTTP_BACKOFF_MAX_SECONDS, transport=None, host_intervals=None):
+        """Initializes the client configuration: per-host concurrency limits, the default request timeout in seconds, the retry count and backoff bounds, an optional httpx transport (used by tests) and the per-host minimum intervals between request starts in seconds."""
+        self.host_limits = dict(HOST_CONCURRENCY if host_limits is None else host_limits)
+        self.default_host_limit = default_host_limit
+        self.host_intervals = dict(HOST_MIN_INTERVAL_SECONDS if host_intervals is None else host_intervals)
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT_SECONDS))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._transport = transport
+        self._client = None
+        self._semaphores = {}
+        self._throttle_locks = {}
+        self._last_request_at = {}
+
+    async def __aenter__(self):
+        """Opens the pooled httpx client for the current event loop."""
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS),
+            transport=self._transport,
+            follow_redirects=True
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Closes the pooled connections."""
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the underlying httpx client and releases its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _semaphore(self, host):
+        """Returns the semaphore bounding in-flight requests to the given host, creating it on first use."""
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.default_host_limit))
+        return self._semaphores[host]
+
+    async def _throttle(self, host):
+        """Waits until the host's minimum interval has passed since the previous request to it started, then records this request's start. Hosts without an interval pass straight through."""
+        interval = self.host_intervals.get(host)
+        if not interval:
+            return
+
+        if host not in self._throttle_locks:
+            self._throttle_locks[host] = asyncio.Lock()
+        async with self._throttle_locks[host]:
+            delay = self._last_request_at.get(host, float('-inf')) + interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request_at[host] = time.monotonic()
+
+    def _backoff_delay(self, attempt, response=None):
+        """Returns the delay before the given retry attempt: a 'full jitter' random delay under an exponentially growing cap, or the server's Retry-After header when it asks for longer."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if response is not None:
+            try:
+                delay = max(delay, min(self.backoff_max, float(response.headers.get("Retry-After", 0))))
+            except ValueError:
+                pass
+        return delay
+
+    async def request(self, method, url, timeout=None, retries=None, retry_statuses=RETRY_STATUSES, **kwargs):
+        """Sends a request through the pooled client, holding the host's semaphore only while the request is in flight and spacing request starts by the host's minimum interval. Retries connection errors, timeouts and retryable statuses with jittered exponential backoff; returns the last response (which may still carry an error status) or raises the last transport error once retries are exhausted."""
+        if self._client is None:
+            raise RuntimeError("AsyncHttpClient must be used inside 'async with'.")
+
+        retries = self.max_retries if retries is None else retries
+        if timeout is not None and not isinstance(timeout, httpx.Timeout):
+            timeout = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT_SECONDS))
+        host = urlsplit(url).hostname
+        semaphore = self._semaphore(host)
+
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                async with semaphore:
+                    await self._throttle(host)
+                    response = await self._client.request(method, url, timeout=timeout or self.timeout, **kwargs)
+                if response.status_code not in retry_statuses or attempt == retries:
+                    return response
+                print(f"   🔄 HTTP {response.status_code} from {urlsplit(url).hostname} (attempt {attempt + 1}/{retries + 1}). Backing off...")
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                print(f"   🔄 HTTP {type(e).__name__} for {urlsplit(url).hostname} (attempt {attempt + 1}/{retries + 1}). Backing off...")
+
+            await asyncio.sleep(self._backoff_delay(attempt, response))
+
+    async def get(self, url, **kwargs):
+        """Sends a GET request with retries; see request()."""
+        return await self.request("GET", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method, url, timeout=None, retries=None, retry_statuses=RETRY_STATUSES, **kwargs):
+        """Opens a streamed request and yields the response before its body is read, so large downloads can be parsed incrementally. Connection errors and retryable statuses are retried with backoff until the headers arrive; the host's semaphore is held until the body has been consumed."""
+        if self._client is None:
+            raise RuntimeError("AsyncHttpClient must be used inside 'async with'.")
+
+        retries = self.max_retries if retries is None else retries
+        if timeout is not None and not isinstance(timeout, httpx.Timeout):
+            timeout = httpx.Timeout(timeout, connect=min(timeout, HTTP_CONNECT_TIMEOUT_SECONDS))
+        host = urlsplit(url).hostname
+        semaphore = self._semaphore(host)
+
+        for attempt in range(retries + 1):
+            await semaphore.acquire()
+            try:
+                await self._throttle(host)
+                request = self._client.build_request(method, url, timeout=timeout or self.timeout, **kwargs)
+                response = await self._client.send(request, stream=True)
+            except httpx.TransportError as e:
+                semaphore.release()
+                if attempt == retries:
+                    raise
+                print(f"   🔄 HTTP {type(e).__name__} for {urlsplit(url).hostname} (attempt {attempt + 1}/{retries + 1}). Backing off...")
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+            except BaseException:
+                semaphore.release()
+                raise
+
+            if response.status_code in retry_statuses and attempt < retries:
+                await response.aclose()
+                semaphore.release()
+                print(f"   🔄 HTTP {response.status_code} from {urlsplit(url).hostname} (attempt {attempt + 1}/{retries + 1}). Backing off...")
+                await asyncio.sleep(self._backoff_delay(attempt, response))
+                continue
+            break
+
+        # Errors raised while the caller reads the body are not retried
+        try:
+            yield response
+        finally:
+            await response.aclose()
+            semaphore.release()
+
+
+def run_with_client(func, *args, **kwargs):
+    """Runs the coroutine function func(*args, client=..., **kwargs) to completion on a fresh event loop with its own pooled client, for synchronous callers such as API routes."""
+
+    async def runner():
+        async with AsyncHttpClient() as client:
+            return await func(*args, client=client, **kwargs)
+
+    return asyncio.run(runner())
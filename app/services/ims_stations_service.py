@@ -1,10 +1,33 @@
 import csv
-import math
 import os
+import threading
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from app.geo.distance import EARTH_RADIUS_KM, unit_vectors
 
 CSV_PATH = "stations.csv"
 stations_cache = []
 
+# Station used when stations.csv is unavailable
+DEFAULT_STATION = {"id": 24, "name": "Bet Dagan Default", "lat": 32.0, "lon": 34.8}
+
+_station_tree = None
+_station_tree_lock = threading.Lock()
+
+
+def _get_station_tree():
+    """Returns the KD-tree over the loaded stations' unit vectors, building it once on first use (None when no stations are loaded)."""
+    global _station_tree
+
+    load_stations()
+    with _station_tree_lock:
+        if _station_tree is None and stations_cache:
+            _station_tree = cKDTree(unit_vectors([s['lat'] for s in stations_cache],
+                                                  [s['lon'] for s in stations_cache]))
+    return _station_tree
+
 
 def load_stations():
     """
@@ -47,26 +70,34 @@ def load_stations():
     print(f"✅ Loaded {len(stations_cache)} stations from CSV.")
 
 
-def get_nearest_station(lat, lon):
+def get_nearest_stations(lats, lons, k=1):
     """
-    Finds the nearest weather station to given coordinates using Euclidean distance.
-    Takes latitude and longitude as inputs and returns a dictionary with the closest station's id, name, lat, and lon.
+    Finds the k nearest weather stations to each of the given coordinates with one KD-tree query over unit vectors, so the ranking follows true great-circle distance.
+    Takes sequences of latitudes and longitudes and returns, per coordinate, a list of up to k station dictionaries (id, name, lat, lon, distance_km) ordered from nearest to farthest.
     """
-    load_stations()
+    tree = _get_station_tree()
 
     # Return default Bet Dagan station if no stations are available
-    if not stations_cache:
-        return {"id": 24, "name": "Bet Dagan Default", "lat": 32.0, "lon": 34.8}
+    if tree is None:
+        return [[dict(DEFAULT_STATION)] for _ in range(len(lats))]
+    if not len(lats):
+        return []
+
+    k = min(k, len(stations_cache))
+    chords, indices = tree.query(unit_vectors(lats, lons), k=list(range(1, k + 1)))
 
-    nearest = None
-    min_dist = float('inf')
+    # Chord length on the unit sphere -> great-circle distance
+    distances_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chords / 2, 0.0, 1.0))
 
-    for station in stations_cache:
-        # Calculate Euclidean distance between fire location and station
-        dist = math.sqrt((station['lat'] - lat) ** 2 + (station['lon'] - lon) ** 2)
+    return [
+        [{**stations_cache[i], "distance_km": float(d)} for i, d in zip(row_indices, row_distances)]
+        for row_indices, row_distances in zip(indices, distances_km)
+    ]
 
-        if dist < min_dist:
-            min_dist = dist
-            nearest = station
 
-    return nearest
+def get_nearest_station(lat, lon):
+    """
+    Finds the nearest weather station to given coordinates by great-circle distance using the station KD-tree.
+    Takes latitude and longitude as inputs and returns a dictionary with the closest station's id, name, lat, lon and distance_km.
+    """
+    return get_nearest_stations([lat], [lon], k=1)[0][0]
@@ -0,0 +1,162 @@
+"""
+Local land-cover raster cache for the Fuel Agent, replacing per-point ESRI `identify` calls.
+
+The ESRI Sentinel-2 10m land-cover layer is stored on disk as square tiles of LANDCOVER_TILE_DEG degrees, each a raw
+uint8 file of LANDCOVER_TILE_PIXELS x LANDCOVER_TILE_PIXELS class values (row 0 on the northern edge, 0 = no data),
+named `<lat index>_<lon index>.u8` after the tile's south-west corner divided by the tile size. Tiles are memory-
+mapped, so a point lookup is an array index, and they are filled lazily - or up front for a whole bounding box - with
+one `exportImage` request per tile. Land cover barely changes over a season, so a warm cache needs no network at all.
+"""
+
+import asyncio
+import math
+import os
+import threading
+
+import numpy as np
+
+# Directory holding the cached land-cover tiles
+LANDCOVER_CACHE_PATH = os.environ.get('LANDCOVER_CACHE_PATH', os.path.join('data', 'landcover'))
+# Tile size in degrees and pixels per tile side (0.1 degrees / 1024 pixels is roughly 10 meters per pixel)
+LANDCOVER_TILE_DEG = float(os.environ.get('LANDCOVER_TILE_DEG', 0.1))
+LANDCOVER_TILE_PIXELS = int(os.environ.get('LANDCOVER_TILE_PIXELS', 1024))
+# Pixel value for cells with no land-cover data (ESRI classes start at 1)
+LANDCOVER_NO_DATA = 0
+
+ESRI_EXPORT_URL = "https://ic.imagery1.arcgis.com/arcgis/rest/services/Sentinel2_10m_LandCover/ImageServer/exportImage"
+
+_landcover_cache = None
+_landcover_cache_lock = threading.Lock()
+
+
+class LandCoverCache:
+    """
+    Tiled, memory-mapped store of land-cover class values with vectorized point lookups and lazy tile filling from the ESRI image service.
+    """
+
+    def __init__(self, path=LANDCOVER_CACHE_PATH, tile_deg=LANDCOVER_TILE_DEG, tile_pixels=LANDCOVER_TILE_PIXELS):
+        """Initializes the cache over a tile directory with the tile size in degrees and the pixels per tile side."""
+        self.path = path
+        self.tile_deg = tile_deg
+        self.tile_pixels = tile_pixels
+        self._tiles = {}
+
+    def _tile_file(self, key):
+        """Returns the file path of the tile with the given (lat index, lon index) key."""
+        return os.path.join(self.path, f"{key[0]}_{key[1]}.u8")
+
+    def _positions(self, lats, lons):
+        """Returns the tile keys (n x 2) and the pixel row/column of each coordinate inside its tile."""
+        lat_units = np.asarray(lats, dtype=float) / self.tile_deg
+        lon_units = np.asarray(lons, dtype=float) / self.tile_deg
+        keys = np.stack([np.floor(lat_units), np.floor(lon_units)], axis=1).astype(int)
+
+        rows = np.floor((1.0 - (lat_units - keys[:, 0])) * self.tile_pixels).astype(int)
+        cols = np.floor((lon_units - keys[:, 1]) * self.tile_pixels).astype(int)
+        return keys, np.clip(rows, 0, self.tile_pixels - 1), np.clip(cols, 0, self.tile_pixels - 1)
+
+    def _tile(self, key):
+        """Returns the memory-mapped tile for the key, or None when it is not cached yet."""
+        if key not in self._tiles:
+            tile_file = self._tile_file(key)
+            if not os.path.exists(tile_file):
+                return None
+            self._tiles[key] = np.memmap(tile_file, dtype=np.uint8, mode='r',
+                                         shape=(self.tile_pixels, self.tile_pixels))
+        return self._tiles[key]
+
+    def missing_tiles(self, lats, lons):
+        """Returns the keys of the tiles covering the coordinates that are not cached yet."""
+        keys, _, _ = self._positions(lats, lons)
+        return [key for key in {tuple(int(v) for v in k) for k in keys} if self._tile(key) is None]
+
+    def tiles_for_bbox(self, lon_min, lat_min, lon_max, lat_max):
+        """Returns the keys of every tile intersecting the bounding box."""
+        lat_range = range(math.floor(lat_min / self.tile_deg), math.floor(lat_max / self.tile_deg) + 1)
+        lon_range = range(math.floor(lon_min / self.tile_deg), math.floor(lon_max / self.tile_deg) + 1)
+        return [(lat_key, lon_key) for lat_key in lat_range for lon_key in lon_range]
+
+    def lookup(self, lats, lons):
+        """Returns the land-cover class of every coordinate as a uint8 array, LANDCOVER_NO_DATA where the tile is not cached."""
+        keys, rows, cols = self._positions(lats, lons)
+        classes = np.full(len(keys), LANDCOVER_NO_DATA, dtype=np.uint8)
+        if not len(keys):
+            return classes
+
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, key in enumerate(unique_keys):
+            tile = self._tile((int(key[0]), int(key[1])))
+            if tile is not None:
+                idx = np.flatnonzero(inverse == k)
+                classes[idx] = tile[rows[idx], cols[idx]]
+        return classes
+
+    async def fill_tiles(self, keys, client):
+        """Downloads the given tiles concurrently through the shared async HTTP client (bounded per host by the client) and writes them to disk. Returns the number of tiles stored."""
+        if not keys:
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        results = await asyncio.gather(*(self._fill_tile(key, client) for key in keys), return_exceptions=True)
+
+        stored = 0
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Land-cover tile {key} failed: {result}")
+            else:
+                stored += result
+        return stored
+
+    async def _fill_tile(self, key, client):
+        """Exports one tile as raw band-sequential uint8 class values and atomically writes it to the cache. Returns 1 on success and 0 on an unusable response."""
+        lat_min, lon_min = key[0] * self.tile_deg, key[1] * self.tile_deg
+        params = {
+            "bbox": f"{lon_min},{lat_min},{lon_min + self.tile_deg},{lat_min + self.tile_deg}",
+            "bboxSR": 4326,
+            "imageSR": 4326,
+            "size": f"{self.tile_pixels},{self.tile_pixels}",
+            "format": "bsq",
+            "pixelType": "U8",
+            "noData": LANDCOVER_NO_DATA,
+            # Raw class values, not the colormapped rendering, and no blending between classes
+            "renderingRule": '{"rasterFunction":"None"}',
+            "interpolation": "RSP_NearestNeighbor",
+            "f": "image"
+        }
+        response = await client.get(ESRI_EXPORT_URL, params=params, timeout=60.0)
+
+        expected_size = self.tile_pixels * self.tile_pixels
+        if response.status_code != 200 or len(response.content) != expected_size:
+            print(f"⚠️ Land-cover export for tile {key} returned {response.status_code} "
+                  f"({len(response.content)} of {expected_size} bytes)")
+            return 0
+
+        tile_file = self._tile_file(key)
+        with open(f"{tile_file}.tmp", 'wb') as f:
+            f.write(response.content)
+        os.replace(f"{tile_file}.tmp", tile_file)
+        return 1
+
+    async def ensure(self, lats, lons, client):
+        """Fills any tile the coordinates need that is not cached yet (lazy warm-up)."""
+        missing = self.missing_tiles(lats, lons)
+        if missing:
+            stored = await self.fill_tiles(missing, client)
+            print(f"🗺️ Land-cover cache: filled {stored}/{len(missing)} missing tiles.")
+
+    async def prefill_bbox(self, lon_min, lat_min, lon_max, lat_max, client):
+        """Bulk-exports every uncached tile in the bounding box (e.g. the whole country), so later lookups need no network."""
+        missing = [key for key in self.tiles_for_bbox(lon_min, lat_min, lon_max, lat_max) if self._tile(key) is None]
+        stored = await self.fill_tiles(missing, client)
+        print(f"🗺️ Land-cover cache: bulk export stored {stored}/{len(missing)} tiles.")
+        return stored
+
+
+def get_landcover_cache():
+    """Returns the process-wide land-cover cache over LANDCOVER_CACHE_PATH."""
+    global _landcover_cache
+
+    with _landcover_cache_lock:
+        if _landcover_cache is None:
+            _landcover_cache = LandCoverCache()
+    return _landcover_cache
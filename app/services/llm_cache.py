@@ -0,0 +1,190 @@
+"""
+Content-addressed cache for LLM responses.
+Prompts are rebuilt from near-identical data on every cycle and sent at a fixed low temperature, so a response is
+reused whenever the task type, model chain and normalized payload match. Normalization drops volatile keys (such as
+timestamps) and rounds noisy floats, so small numeric jitter still hits the cache. Entries live in Redis when
+REDIS_URL is configured and in the `llm_response_cache` table otherwise, with TTL expiry and least-recently-used
+eviction beyond a size limit in both backends.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+from app.extensions import db
+from app.models.llm_cache import LlmCacheEntry
+from app.services.db_utils import dialect_insert
+
+# Backend: 'redis', 'database' or 'off'; by default Redis when REDIS_URL is set, the database otherwise
+LLM_CACHE_BACKEND = os.environ.get('LLM_CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'database')
+# Entries older than this are treated as missing
+LLM_CACHE_TTL_HOURS = float(os.environ.get('LLM_CACHE_TTL_HOURS', 6))
+# Upper bound on stored responses; the least recently used ones are evicted beyond it
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 5000))
+# Decimal places kept for floats in cache keys, with tighter precision for coordinates
+LLM_CACHE_FLOAT_DECIMALS = int(os.environ.get('LLM_CACHE_FLOAT_DECIMALS', 1))
+LLM_CACHE_KEY_DECIMALS = {"lat": 3, "lon": 3}
+# Payload keys that change on every cycle without changing the answer
+LLM_CACHE_VOLATILE_KEYS = frozenset({"prediction_timestamp", "summary_id"})
+
+REDIS_KEY_PREFIX = "llm_cache:"
+REDIS_LRU_KEY = "llm_cache:lru"
+
+_llm_cache = None
+_llm_cache_loaded = False
+_llm_cache_lock = threading.Lock()
+
+
+def normalize_payload(value, decimals=LLM_CACHE_FLOAT_DECIMALS, key=None):
+    """Returns a copy of a JSON-like payload with volatile keys removed and floats rounded (coordinates to LLM_CACHE_KEY_DECIMALS, everything else to the given decimals), so equivalent payloads normalize identically."""
+    if isinstance(value, dict):
+        return {k: normalize_payload(v, decimals, k) for k, v in value.items() if k not in LLM_CACHE_VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [normalize_payload(v, decimals, key) for v in value]
+    if isinstance(value, float):
+        rounded = round(value, LLM_CACHE_KEY_DECIMALS.get(key, decimals))
+        # -0.0 and 0.0 must hash alike
+        return rounded + 0.0
+    return value
+
+
+def cache_key(task_type, model, payload):
+    """Builds the content address of an LLM request: a SHA-256 hash of the task type, the model (or model chain) and the normalized payload."""
+    material = {"task_type": task_type, "model": model, "payload": normalize_payload(payload)}
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class DatabaseLlmCache:
+    """
+    LLM response cache backed by the application database, with TTL expiry and least-recently-used eviction.
+    """
+
+    def __init__(self, ttl_hours=LLM_CACHE_TTL_HOURS, max_entries=LLM_CACHE_MAX_ENTRIES):
+        """Initializes the cache with the entry time-to-live in hours and the maximum number of stored responses."""
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+
+    def get_many(self, keys):
+        """Returns a dictionary mapping the given keys to their fresh cached responses, marking the hits as recently used. Missing or expired keys are absent."""
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        table = LlmCacheEntry.__table__
+        cutoff = datetime.utcnow() - self.ttl
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.cache_key, table.c.response)
+                .where(table.c.cache_key.in_(keys))
+                .where(table.c.created_at >= cutoff)
+            ).all()
+
+            # Refresh recency so frequently used responses survive LRU eviction
+            if rows:
+                conn.execute(update(table).where(table.c.id.in_([row.id for row in rows]))
+                             .values(last_used_at=datetime.utcnow()))
+
+        return {row.cache_key: row.response for row in rows}
+
+    def put_many(self, task_type, responses):
+        """Stores a dictionary mapping keys to response texts for the given task type, replacing existing entries, then evicts expired and least recently used entries beyond the size limit."""
+        if not responses:
+            return
+
+        now = datetime.utcnow()
+        rows = [{"cache_key": key, "task_type": task_type, "response": response, "created_at": now,
+                 "last_used_at": now} for key, response in responses.items()]
+
+        stmt = dialect_insert(LlmCacheEntry.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['cache_key'],
+            set_={"response": stmt.excluded.response, "created_at": stmt.excluded.created_at,
+                  "last_used_at": stmt.excluded.last_used_at}
+        )
+
+        with db.engine.begin() as conn:
+            conn.execute(stmt, rows)
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Deletes expired entries and, if the table is still above the size limit, the least recently used entries beyond it."""
+        table = LlmCacheEntry.__table__
+        conn.execute(delete(table).where(table.c.created_at < datetime.utcnow() - self.ttl))
+
+        overflow = conn.execute(select(func.count()).select_from(table)).scalar() - self.max_entries
+        if overflow > 0:
+            oldest_ids = select(table.c.id).order_by(table.c.last_used_at.asc()).limit(overflow).scalar_subquery()
+            conn.execute(delete(table).where(table.c.id.in_(oldest_ids)))
+            print(f"   🧹 LLM cache: evicted {overflow} least recently used entries.")
+
+
+class RedisLlmCache:
+    """
+    LLM response cache backed by Redis. Entries expire through Redis TTLs; a sorted set of last-use times drives least-recently-used eviction beyond the size limit.
+    """
+
+    def __init__(self, client, ttl_hours=LLM_CACHE_TTL_HOURS, max_entries=LLM_CACHE_MAX_ENTRIES):
+        """Initializes the cache with a redis-py client, the entry time-to-live in hours and the maximum number of stored responses."""
+        self.client = client
+        self.ttl_seconds = int(ttl_hours * 3600)
+        self.max_entries = max_entries
+
+    def get_many(self, keys):
+        """Returns a dictionary mapping the given keys to their cached responses, marking the hits as recently used. Missing or expired keys are absent."""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+
+        values = self.client.mget([REDIS_KEY_PREFIX + key for key in keys])
+        hits = {key: value.decode("utf-8") if isinstance(value, bytes) else value
+                for key, value in zip(keys, values) if value is not None}
+        if hits:
+            now = time.time()
+            self.client.zadd(REDIS_LRU_KEY, {key: now for key in hits})
+        return hits
+
+    def put_many(self, task_type, responses):
+        """Stores a dictionary mapping keys to response texts with the cache TTL, then evicts the least recently used entries beyond the size limit. The task type is not needed by this backend."""
+        if not responses:
+            return
+
+        now = time.time()
+        pipe = self.client.pipeline()
+        for key, response in responses.items():
+            pipe.set(REDIS_KEY_PREFIX + key, response, ex=self.ttl_seconds)
+        pipe.zadd(REDIS_LRU_KEY, {key: now for key in responses})
+        # Recency records of entries that already expired through their TTL are dropped as well
+        pipe.zremrangebyscore(REDIS_LRU_KEY, "-inf", now - self.ttl_seconds)
+        pipe.execute()
+
+        overflow = self.client.zcard(REDIS_LRU_KEY) - self.max_entries
+        if overflow > 0:
+            oldest = [key.decode("utf-8") if isinstance(key, bytes) else key
+                      for key, _ in self.client.zpopmin(REDIS_LRU_KEY, overflow)]
+            self.client.delete(*[REDIS_KEY_PREFIX + key for key in oldest])
+            print(f"   🧹 LLM cache: evicted {overflow} least recently used entries.")
+
+
+def get_llm_cache():
+    """Returns the process-wide LLM response cache for the configured backend, creating it on first use, or None if caching is turned off or the backend cannot be set up."""
+    global _llm_cache, _llm_cache_loaded
+
+    with _llm_cache_lock:
+        if not _llm_cache_loaded:
+            _llm_cache_loaded = True
+            if LLM_CACHE_BACKEND == 'redis':
+                try:
+                    import redis
+                    _llm_cache = RedisLlmCache(redis.Redis.from_url(os.environ['REDIS_URL']))
+                except Exception as e:
+                    print(f"⚠️ LLM cache: Redis backend unavailable ({e}). Falling back to the database.")
+                    _llm_cache = DatabaseLlmCache()
+            elif LLM_CACHE_BACKEND == 'database':
+                _llm_cache = DatabaseLlmCache()
+    return _llm_cache
@@ -0,0 +1,274 @@
+"""
+Health-aware router over the LLM provider endpoints.
+Every (provider, API key, model) combination is an endpoint with its own circuit breaker. Provider clients are built
+once per process and shared by all agents. Endpoints that recently returned 429 or kept failing are skipped until
+their cool-down passes, so an outage costs one failed attempt per endpoint rather than one per request. Optionally,
+a request is hedged: if the first endpoint has not answered within a short delay, a second provider is asked as well
+and the first valid answer wins.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Consecutive failures that open an endpoint's circuit, and how long it then stays open (seconds)
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('LLM_BREAKER_FAILURE_THRESHOLD', 2))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.environ.get('LLM_BREAKER_COOLDOWN_SECONDS', 60))
+# Cool-down after a 429 (rate limited) answer, which opens the circuit immediately
+LLM_RATE_LIMIT_COOLDOWN_SECONDS = float(os.environ.get('LLM_RATE_LIMIT_COOLDOWN_SECONDS', 30))
+# Per-request timeout for provider calls (seconds)
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.environ.get('LLM_REQUEST_TIMEOUT_SECONDS', 30))
+# Hedged requests: off by default; the backup provider is asked once the first one has been silent this long
+LLM_HEDGE_ENABLED = os.environ.get('LLM_HEDGE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+LLM_HEDGE_DELAY_SECONDS = float(os.environ.get('LLM_HEDGE_DELAY_SECONDS', 2.0))
+# Threads running hedged requests
+LLM_ROUTER_WORKERS = int(os.environ.get('LLM_ROUTER_WORKERS', 8))
+
+# Groq model chain per task type: small fast models for high-volume prediction summaries, large ones for dispatch JSON
+GROQ_MODELS_BY_TASK = {
+    "prediction": ["llama-3.1-8b-instant", "qwen/qwen3-32b"],
+    "dispatch": ["llama-3.3-70b-versatile", "openai/gpt-oss-120b"]
+}
+GEMINI_MODEL = 'gemini-3.1-flash-lite'
+
+_llm_router = None
+_llm_router_lock = threading.Lock()
+
+
+def models_for_task(task_type):
+    """Returns the Groq model chain used for a task type (dispatch models for unknown types)."""
+    return GROQ_MODELS_BY_TASK.get(task_type, GROQ_MODELS_BY_TASK["dispatch"])
+
+
+def is_rate_limit_error(error):
+    """Returns True if a provider exception reports HTTP 429 (Groq errors carry status_code, Google API errors carry code)."""
+    return getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of one endpoint. The circuit opens after consecutive failures (or at once on a rate limit) and rejects calls until its cool-down passes; the next call is then a trial that closes the circuit on success or reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD, cooldown_seconds=LLM_BREAKER_COOLDOWN_SECONDS,
+                 rate_limit_cooldown_seconds=LLM_RATE_LIMIT_COOLDOWN_SECONDS, clock=time.monotonic):
+        """Initializes a closed breaker with the failure threshold, the cool-downs in seconds and a clock function (injectable for tests)."""
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+        self.clock = clock
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns True if the endpoint may be called now."""
+        with self._lock:
+            return self.clock() >= self.open_until
+
+    def record_success(self):
+        """Closes the circuit after a successful call."""
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self, rate_limited=False):
+        """Counts a failed call, opening the circuit once the threshold is reached or immediately on a rate limit."""
+        with self._lock:
+            self.failures += 1
+            if rate_limited:
+                self.open_until = self.clock() + self.rate_limit_cooldown_seconds
+            elif self.failures >= self.failure_threshold:
+                self.open_until = self.clock() + self.cooldown_seconds
+
+
+class LlmEndpoint:
+    """
+    One callable LLM endpoint (a provider, API key and model) with its circuit breaker. The call function takes (prompt, is_json) and returns the response text.
+    """
+
+    def __init__(self, name, provider, model, call, breaker=None):
+        """Initializes the endpoint with a display name, provider name, model name, call function and an optional breaker."""
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.call = call
+        self.breaker = breaker or CircuitBreaker()
+
+
+class LlmRouter:
+    """
+    Routes prompts over ordered LLM endpoints per task type, skipping endpoints whose circuit is open and optionally hedging the first attempt across two providers.
+    """
+
+    def __init__(self, endpoints_by_task, hedge=LLM_HEDGE_ENABLED, hedge_delay_seconds=LLM_HEDGE_DELAY_SECONDS,
+                 max_workers=LLM_ROUTER_WORKERS):
+        """Initializes the router with a dict mapping task type to its ordered list of endpoints (key None holds the default list), the hedging switch and delay, and the size of the thread pool used for hedged requests."""
+        self.endpoints_by_task = endpoints_by_task
+        self.hedge = hedge
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def is_active(self):
+        """True if the router has at least one endpoint."""
+        return any(self.endpoints_by_task.values())
+
+    def endpoints_for(self, task_type):
+        """Returns the ordered endpoints for a task type."""
+        return self.endpoints_by_task.get(task_type, self.endpoints_by_task.get(None, []))
+
+    def _pool(self):
+        """Returns the thread pool used for hedged requests, creating it on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def complete(self, prompt, task_type="dispatch", is_json=False, context_name="LLM", validate=None):
+        """Returns the first valid response to the prompt from the task's endpoints, or None if every available endpoint failed. Endpoints with an open circuit are skipped. A response is valid if it is non-empty and passes the optional validate(text) check."""
+        candidates = [endpoint for endpoint in self.endpoints_for(task_type) if endpoint.breaker.allow()]
+        if not candidates:
+            print(f"      ⛔ {context_name}: All LLM endpoints are cooling down.")
+            return None
+
+        if self.hedge and len(candidates) > 1:
+            primary = candidates[0]
+            # Prefer a backup on another provider, so one provider's outage cannot sink both requests
+            backup = next((endpoint for endpoint in candidates[1:] if endpoint.provider != primary.provider),
+                          candidates[1])
+            response = self._hedged(primary, backup, prompt, is_json, context_name, validate)
+            if response is not None:
+                return response
+            candidates = [endpoint for endpoint in candidates if endpoint not in (primary, backup)]
+
+        for endpoint in candidates:
+            # The circuit may have opened while earlier endpoints were tried
+            if not endpoint.breaker.allow():
+                continue
+            response = self._attempt(endpoint, prompt, is_json, context_name, validate)
+            if response is not None:
+                return response
+        return None
+
+    def _attempt(self, endpoint, prompt, is_json, context_name, validate):
+        """Calls one endpoint and records the outcome on its breaker. Returns the response text, or None on an error or invalid response."""
+        try:
+            print(f"      🔄 {context_name}: Trying {endpoint.name}...")
+            response = endpoint.call(prompt, is_json)
+        except Exception as e:
+            rate_limited = is_rate_limit_error(e)
+            endpoint.breaker.record_failure(rate_limited=rate_limited)
+            print(f"      ⚠️ {context_name}: {'Rate limited' if rate_limited else 'Error'} on {endpoint.name}: {e}")
+            return None
+
+        if not response or (validate is not None and not validate(response)):
+            endpoint.breaker.record_failure()
+            print(f"      ⚠️ {context_name}: Invalid response from {endpoint.name}.")
+            return None
+
+        endpoint.breaker.record_success()
+        print(f"      🟢 {context_name}: Success using {endpoint.name}")
+        return response
+
+    def _hedged(self, primary, backup, prompt, is_json, context_name, validate):
+        """Sends the prompt to the primary endpoint and, if it has not answered within the hedge delay, to the backup as well. Returns the first valid response, or None if both fail."""
+        pool = self._pool()
+        pending = {pool.submit(self._attempt, primary, prompt, is_json, context_name, validate)}
+        done, pending = wait(pending, timeout=self.hedge_delay_seconds)
+        for future in done:
+            if future.result() is not None:
+                return future.result()
+
+        print(f"      🏁 {context_name}: Hedging with {backup.name}...")
+        pending.add(pool.submit(self._attempt, backup, prompt, is_json, context_name, validate))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result() is not None:
+                    # The slower request is left to finish in the background; its answer is discarded
+                    return future.result()
+        return None
+
+
+def _groq_call(client, model):
+    """Returns a call function sending prompts to one Groq model through a shared client."""
+    from groq.types.chat import ChatCompletionUserMessageParam
+
+    def call(prompt, is_json):
+        """Sends the prompt to the Groq model and returns the response text."""
+        kwargs = {"temperature": 0.1}
+        if is_json:
+            kwargs["response_format"] = {"type": "json_object"}
+        chat_completion = client.chat.completions.create(
+            messages=[ChatCompletionUserMessageParam(role="user", content=prompt)],
+            model=model,
+            **kwargs
+        )
+        return chat_completion.choices[0].message.content
+
+    return call
+
+
+def _gemini_call(gemini_model):
+    """Returns a call function sending prompts to a shared Gemini model."""
+
+    def call(prompt, is_json):
+        """Sends the prompt to Gemini and returns the response text."""
+        generation_config = {"temperature": 0.1}
+        if is_json:
+            generation_config["response_mime_type"] = "application/json"
+        response = gemini_model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            request_options={"timeout": LLM_REQUEST_TIMEOUT_SECONDS}
+        )
+        return response.text
+
+    return call
+
+
+def build_llm_router(groq_keys, gemini_key):
+    """Builds the router for the configured providers: one pooled Groq client per API key with one endpoint per model of each task's chain, followed by Gemini as the final fallback for every task."""
+    groq_clients = []
+    if groq_keys:
+        from groq import Groq
+        # Retries are left to the router, which moves on to a healthy endpoint instead of waiting on a rate-limited one
+        groq_clients = [Groq(api_key=key, max_retries=0, timeout=LLM_REQUEST_TIMEOUT_SECONDS) for key in groq_keys]
+
+    gemini_endpoint = None
+    if gemini_key:
+        import google.generativeai as genai
+        genai.configure(api_key=gemini_key)
+        gemini_endpoint = LlmEndpoint(f"Gemini ({GEMINI_MODEL})", "gemini", GEMINI_MODEL,
+                                      _gemini_call(genai.GenerativeModel(GEMINI_MODEL)))
+
+    # Endpoints are shared between task types using the same model, so they share health state
+    groq_endpoints = {}
+    endpoints_by_task = {}
+    for task_type in list(GROQ_MODELS_BY_TASK) + [None]:
+        endpoints = []
+        for key_index, client in enumerate(groq_clients):
+            for model in models_for_task(task_type):
+                if (key_index, model) not in groq_endpoints:
+                    groq_endpoints[key_index, model] = LlmEndpoint(f"Groq Key #{key_index + 1} ({model})", "groq",
+                                                                   model, _groq_call(client, model))
+                endpoints.append(groq_endpoints[key_index, model])
+        if gemini_endpoint is not None:
+            endpoints.append(gemini_endpoint)
+        endpoints_by_task[task_type] = endpoints
+
+    return LlmRouter(endpoints_by_task)
+
+
+def get_llm_router(groq_keys, gemini_key):
+    """Returns the process-wide LLM router, building its provider clients on first use."""
+    global _llm_router
+
+    with _llm_router_lock:
+        if _llm_router is None:
+            _llm_router = build_llm_router(groq_keys, gemini_key)
+    return _llm_router
@@ -0,0 +1,261 @@
+"""
+Offline routing engine that answers many-to-many driving time queries from a preprocessed road graph, as a local
+alternative to the public OSRM server.
+
+The graph is stored as a directory of NumPy arrays that are memory-mapped on load:
+    node_lat.npy, node_lon.npy  - node coordinates in decimal degrees (float64, N)
+    indptr.npy, indices.npy     - CSR adjacency of the directed road graph (int32, N + 1 and E)
+    weights.npy                 - edge traversal time in seconds (float64, E)
+    source_nodes.npy            - optional: graph nodes of the fire stations (int64, K)
+    source_times.npy            - optional: precomputed travel seconds from every station node to every node
+                                  (float32, N x K, inf where unreachable)
+
+Stations never move, so their one-to-all travel times are precomputed once when the graph is built and a table
+query for station origins is a memory-mapped array lookup. Any other origin is answered with multi-source Dijkstra
+(SciPy csgraph, in C) from the smaller side of the table, on the reversed graph when searching from the destinations.
+"""
+
+import math
+import os
+import threading
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from app.geo.distance import haversine_matrix
+
+# Routing backend used by the Commander Agent: "osrm" (public HTTP server) or "local" (this engine)
+ROUTING_BACKEND = os.environ.get('ROUTING_BACKEND', 'osrm').lower()
+# Directory holding the preprocessed road graph arrays
+ROAD_GRAPH_PATH = os.environ.get('ROAD_GRAPH_PATH', os.path.join('data', 'road_graph'))
+# Searches stop beyond this travel time; anything further is reported as unreachable (longest horizon is 12 hours)
+LOCAL_ROUTER_MAX_SECONDS = float(os.environ.get('LOCAL_ROUTER_MAX_SECONDS', 13 * 3600))
+# Off-road access speed used to cover the gap between a coordinate and its snapped road node
+LOCAL_ROUTER_ACCESS_SPEED_KMH = 20.0
+# Snapping grid cell size (degrees) and how many rings of cells are searched before a point counts as off-network
+SNAP_CELL_DEG = 0.01
+SNAP_MAX_RINGS = 3
+# Number of Dijkstra sources solved per batch, bounding the (batch x nodes) distance buffer
+DIJKSTRA_BATCH_SIZE = 16
+
+GRAPH_FILES = ('node_lat', 'node_lon', 'indptr', 'indices', 'weights')
+PRECOMPUTED_FILES = ('source_nodes', 'source_times')
+
+_local_router = None
+_local_router_loaded = False
+_local_router_lock = threading.Lock()
+
+
+class RoadGraph:
+    """
+    Directed road graph in CSR form with node coordinates and a grid-bucketed node lookup for snapping coordinates to the network.
+    """
+
+    def __init__(self, node_lat, node_lon, indptr, indices, weights, source_nodes=None, source_times=None):
+        """Wraps the given graph arrays (possibly memory-mapped), including optional precomputed station travel times, and builds the snapping grid over the node coordinates."""
+        self.node_lat = node_lat
+        self.node_lon = node_lon
+        self.num_nodes = len(node_lat)
+        self.forward = csr_matrix((weights, indices, indptr), shape=(self.num_nodes, self.num_nodes))
+        self._reverse = None
+        self._set_sources(source_nodes, source_times)
+        self._build_snap_grid()
+
+    @classmethod
+    def load(cls, path):
+        """Loads a graph directory written by save(), memory-mapping every array so start-up does not copy the graph into RAM."""
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in GRAPH_FILES}
+        for name in PRECOMPUTED_FILES:
+            file_path = os.path.join(path, f"{name}.npy")
+            if os.path.exists(file_path):
+                arrays[name] = np.load(file_path, mmap_mode='r')
+        return cls(**arrays)
+
+    @classmethod
+    def from_edges(cls, node_lats, node_lons, edge_from, edge_to, edge_seconds):
+        """Builds a graph from node coordinates and a directed edge list (node indices and traversal seconds), keeping the fastest edge when the same pair appears more than once."""
+        num_nodes = len(node_lats)
+        edge_seconds = np.maximum(np.asarray(edge_seconds, dtype=np.float64), 0.1)
+
+        # Sort edges by (from, to, seconds) so the first occurrence of each pair is the fastest
+        order = np.lexsort((edge_seconds, np.asarray(edge_to), np.asarray(edge_from)))
+        edge_from, edge_to, edge_seconds = (np.asarray(edge_from)[order], np.asarray(edge_to)[order],
+                                            edge_seconds[order])
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = (edge_from[1:] != edge_from[:-1]) | (edge_to[1:] != edge_to[:-1])
+        edge_from, edge_to, edge_seconds = edge_from[keep], edge_to[keep], edge_seconds[keep]
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+        np.add.at(indptr, edge_from + 1, 1)
+        indptr = np.cumsum(indptr, dtype=np.int32)
+
+        return cls(np.asarray(node_lats, dtype=np.float64), np.asarray(node_lons, dtype=np.float64),
+                   indptr, edge_to.astype(np.int32), edge_seconds)
+
+    def save(self, path):
+        """Writes the graph arrays to a directory in the layout expected by load()."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {
+            'node_lat': np.asarray(self.node_lat, dtype=np.float64),
+            'node_lon': np.asarray(self.node_lon, dtype=np.float64),
+            'indptr': self.forward.indptr.astype(np.int32),
+            'indices': self.forward.indices.astype(np.int32),
+            'weights': self.forward.data.astype(np.float64),
+        }
+        if self.source_times is not None:
+            arrays['source_nodes'] = np.asarray(self.source_nodes, dtype=np.int64)
+            arrays['source_times'] = np.asarray(self.source_times, dtype=np.float32)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+    def _set_sources(self, source_nodes, source_times):
+        """Registers precomputed one-to-all travel times and the lookup from graph node to its column."""
+        self.source_nodes = source_nodes
+        self.source_times = source_times
+        self.source_column = {} if source_nodes is None else {int(n): k for k, n in enumerate(source_nodes)}
+
+    def precompute_sources(self, coords, max_seconds=LOCAL_ROUTER_MAX_SECONDS):
+        """Snaps the given (lon, lat) station coordinates to the graph and precomputes their travel seconds to every node, so later table queries from these stations are pure array lookups. Run this when building the graph, then save()."""
+        snapped = [self.snap(lat, lon)[0] for lon, lat in coords]
+        source_nodes = np.unique(np.array([n for n in snapped if n >= 0], dtype=np.int64))
+
+        source_times = np.empty((self.num_nodes, len(source_nodes)), dtype=np.float32)
+        for b0 in range(0, len(source_nodes), DIJKSTRA_BATCH_SIZE):
+            batch = source_nodes[b0:b0 + DIJKSTRA_BATCH_SIZE]
+            source_times[:, b0:b0 + len(batch)] = dijkstra(self.forward, directed=True, indices=batch,
+                                                           limit=max_seconds).T
+        self._set_sources(source_nodes, source_times)
+
+    @property
+    def reverse(self):
+        """Transposed graph (edges pointing backwards), built on first use for searches that start at the destinations."""
+        if self._reverse is None:
+            self._reverse = self.forward.transpose().tocsr()
+        return self._reverse
+
+    def _cell_keys(self, lats, lons):
+        """Maps coordinates to integer snapping-grid cell keys."""
+        rows = np.floor(np.asarray(lats) / SNAP_CELL_DEG).astype(np.int64)
+        cols = np.floor(np.asarray(lons) / SNAP_CELL_DEG).astype(np.int64)
+        return rows * 100000 + cols
+
+    def _build_snap_grid(self):
+        """Sorts node indices by grid cell so the nodes of any cell are a contiguous slice found with a binary search."""
+        keys = self._cell_keys(self.node_lat, self.node_lon)
+        self._snap_order = np.argsort(keys, kind='stable')
+        self._snap_keys = keys[self._snap_order]
+
+    def _nodes_in_cell(self, key):
+        """Returns the node indices inside one snapping-grid cell."""
+        lo = np.searchsorted(self._snap_keys, key, side='left')
+        hi = np.searchsorted(self._snap_keys, key, side='right')
+        return self._snap_order[lo:hi]
+
+    def snap(self, lat, lon):
+        """Finds the nearest graph node to a coordinate, searching outward ring by ring through the snapping grid. Returns (node index, distance_km), or (-1, inf) if no node lies within the searched rings."""
+        row, col = math.floor(lat / SNAP_CELL_DEG), math.floor(lon / SNAP_CELL_DEG)
+
+        for ring in range(SNAP_MAX_RINGS + 1):
+            candidates = [
+                self._nodes_in_cell((row + dr) * 100000 + (col + dc))
+                for dr in range(-ring, ring + 1)
+                for dc in range(-ring, ring + 1)
+            ]
+            candidates = np.concatenate(candidates)
+            if len(candidates):
+                # Check one extra ring before accepting, since a closer node may sit just across a cell edge
+                ring_candidates = [
+                    self._nodes_in_cell((row + dr) * 100000 + (col + dc))
+                    for dr in range(-ring - 1, ring + 2)
+                    for dc in range(-ring - 1, ring + 2)
+                    if max(abs(dr), abs(dc)) == ring + 1
+                ]
+                candidates = np.concatenate([candidates] + ring_candidates)
+                dists = haversine_matrix([lat], [lon], self.node_lat[candidates], self.node_lon[candidates])[0]
+                best = int(np.argmin(dists))
+                return int(candidates[best]), float(dists[best])
+
+        return -1, float('inf')
+
+
+class LocalRouter:
+    """
+    Many-to-many travel time engine over a RoadGraph, returning tables in the same shape as the OSRM Table API (seconds, None where unreachable).
+    """
+
+    def __init__(self, graph, max_seconds=LOCAL_ROUTER_MAX_SECONDS):
+        """Initializes the router with a loaded road graph and the search time limit in seconds."""
+        self.graph = graph
+        self.max_seconds = max_seconds
+
+    def _snap_all(self, coords):
+        """Snaps (lon, lat) coordinates to graph nodes, returning node indices and the off-road access time in seconds for each."""
+        nodes, access_seconds = [], []
+        for lon, lat in coords:
+            node, dist_km = self.graph.snap(lat, lon)
+            nodes.append(node)
+            access_seconds.append(dist_km / LOCAL_ROUTER_ACCESS_SPEED_KMH * 3600.0)
+        return np.array(nodes, dtype=np.int64), np.array(access_seconds)
+
+    def _search(self, graph, start_nodes, target_nodes):
+        """Runs batched multi-source Dijkstra from the unique start nodes and returns a (starts x targets) array of travel seconds (inf where unreachable)."""
+        unique_starts, inverse = np.unique(start_nodes, return_inverse=True)
+        result = np.empty((len(unique_starts), len(target_nodes)))
+
+        for b0 in range(0, len(unique_starts), DIJKSTRA_BATCH_SIZE):
+            batch = unique_starts[b0:b0 + DIJKSTRA_BATCH_SIZE]
+            dist = dijkstra(graph, directed=True, indices=batch, limit=self.max_seconds)
+            result[b0:b0 + len(batch)] = dist[:, target_nodes]
+
+        return result[inverse]
+
+    def table(self, sources, destinations):
+        """Computes the travel time table between (lon, lat) sources and destinations, returning a nested list of seconds indexed [source][destination] with None for pairs that are off-network or beyond the search limit."""
+        src_nodes, src_access = self._snap_all(sources)
+        dst_nodes, dst_access = self._snap_all(destinations)
+
+        seconds = np.full((len(sources), len(destinations)), np.inf)
+        src_ok, dst_ok = src_nodes >= 0, dst_nodes >= 0
+
+        if src_ok.any() and dst_ok.any():
+            dst_valid = dst_nodes[dst_ok]
+
+            # Station origins: read the precomputed one-to-all times for the destination nodes
+            columns = np.array([self.graph.source_column.get(int(n), -1) for n in src_nodes])
+            precomputed = src_ok & (columns >= 0)
+            if precomputed.any():
+                block = np.asarray(self.graph.source_times[dst_valid][:, columns[precomputed]], dtype=np.float64).T
+                seconds[np.ix_(precomputed, dst_ok)] = block
+
+            # Any other origin: search from whichever side has fewer distinct nodes
+            searched = src_ok & ~precomputed
+            if searched.any():
+                src_valid = src_nodes[searched]
+                if len(np.unique(src_valid)) <= len(np.unique(dst_valid)):
+                    block = self._search(self.graph.forward, src_valid, dst_valid)
+                else:
+                    block = self._search(self.graph.reverse, dst_valid, src_valid).T
+                seconds[np.ix_(searched, dst_ok)] = block
+
+        seconds = seconds + src_access[:, np.newaxis] + dst_access[np.newaxis, :]
+        return [[float(v) if np.isfinite(v) and v <= self.max_seconds else None for v in row] for row in seconds]
+
+
+def get_local_router():
+    """Returns the process-wide local router when ROUTING_BACKEND is "local", loading the road graph from ROAD_GRAPH_PATH on first use. Returns None for the HTTP backend or if the graph cannot be loaded; a failed load is not retried within the process."""
+    global _local_router, _local_router_loaded
+
+    if ROUTING_BACKEND != 'local':
+        return None
+
+    with _local_router_lock:
+        if not _local_router_loaded:
+            _local_router_loaded = True
+            try:
+                graph = RoadGraph.load(ROAD_GRAPH_PATH)
+                _local_router = LocalRouter(graph)
+                print(f"🛣️ Local router loaded road graph with {graph.num_nodes} nodes from {ROAD_GRAPH_PATH}.")
+            except Exception as e:
+                print(f"⚠️ Local router unavailable, falling back to OSRM HTTP: {e}")
+    return _local_router
@@ -0,0 +1,123 @@
+"""
+Vectorized fire-spread engine behind the predictor agent.
+Evaluates the calibrated Rothermel-style spread model for many fire events at once: event inputs come in as a NumPy
+structured array (one record per event, fields in SPREAD_INPUT_DTYPE) and head/flank/back rates of spread, flame
+length, risk class, spread direction and the spread ellipse vertices are returned for every event x horizon pair in
+a single pass, without per-event Python loops.
+"""
+
+import numpy as np
+
+# Time horizons (in hours) evaluated by the command cycle
+PREDICTION_HORIZONS_HOURS = (1.0, 2.0, 3.0, 6.0, 12.0)
+
+# One record per fire event: its centroid and the resolved weather, fuel and terrain inputs of the model
+SPREAD_INPUT_DTYPE = np.dtype([
+    ("lat", "f8"), ("lon", "f8"),
+    ("wind_speed", "f8"), ("wind_dir", "f8"), ("gust", "f8"),
+    ("temp", "f8"), ("humidity", "f8"), ("rain", "f8"),
+    ("fuel_load", "f8"), ("slope", "f8"), ("aspect", "f8")
+])
+
+# Rain (mm) above which the fire is assumed not to spread
+RAIN_STOP_MM = 0.5
+# Upper clamp of the wind factor
+MAX_WIND_FACTOR = 4.5
+# Flank and back spread rates as fractions of the head rate
+FLANK_RATIO = 0.35
+BACK_RATIO = 0.05
+# Horizon (hours) after which further time counts at half weight, to avoid exaggerated long-range polygons
+DECAY_AFTER_HOURS = 3.0
+
+# Risk classes by flame length (meters); LOW is reserved for events halted by rain
+RISK_LEVELS = np.array(["LOW", "MODERATE", "HIGH", "EXTREME"])
+HIGH_FLAME_LENGTH_M = 1.5
+EXTREME_FLAME_LENGTH_M = 3.0
+
+# Vertices of the spread ellipse, before the closing vertex
+ELLIPSE_POINTS = 16
+METERS_PER_DEGREE_LAT = 111000.0
+
+
+def build_spread_inputs(records):
+    """Packs an iterable of per-event input dicts (keys named after the SPREAD_INPUT_DTYPE fields) into a structured NumPy array for compute_spread()."""
+    records = list(records)
+    inputs = np.zeros(len(records), dtype=SPREAD_INPUT_DTYPE)
+    for name in SPREAD_INPUT_DTYPE.names:
+        inputs[name] = [record[name] for record in records]
+    return inputs
+
+
+def effective_hours(horizons):
+    """Returns the time-decayed spread durations for the given horizons: hours beyond DECAY_AFTER_HOURS count at half weight."""
+    horizons = np.asarray(horizons, dtype=float)
+    return np.where(horizons > DECAY_AFTER_HOURS, DECAY_AFTER_HOURS + (horizons - DECAY_AFTER_HOURS) * 0.5, horizons)
+
+
+def ellipse_vertices(lat, lon, azimuth, head_m, back_m, flank_m):
+    """Returns the closed spread ellipse as [lon, lat] vertices with shape (..., ELLIPSE_POINTS + 1, 2). The ellipse is elongated along the spread azimuth (degrees from north), reaches head_m meters ahead of the origin, back_m meters behind it and flank_m meters to each side. All arguments broadcast against each other."""
+    lat, lon, azimuth, head_m, back_m, flank_m = (np.asarray(value, dtype=float)[..., np.newaxis]
+                                                  for value in (lat, lon, azimuth, head_m, back_m, flank_m))
+    major_axis = (head_m + back_m) / 2.0
+    minor_axis = flank_m
+    center_offset = (head_m - back_m) / 2.0
+    azimuth_rad = np.radians(azimuth)
+    sin_az, cos_az = np.sin(azimuth_rad), np.cos(azimuth_rad)
+
+    angles = 2 * np.pi * np.arange(ELLIPSE_POINTS) / ELLIPSE_POINTS
+    x = minor_axis * np.cos(angles)
+    y = major_axis * np.sin(angles)
+
+    # Rotate by the azimuth (clockwise from north) and shift the center towards the head
+    east_m = center_offset * sin_az + x * cos_az + y * sin_az
+    north_m = center_offset * cos_az - x * sin_az + y * cos_az
+
+    vertices = np.stack([
+        lon + east_m / (METERS_PER_DEGREE_LAT * np.cos(np.radians(lat))),
+        lat + north_m / METERS_PER_DEGREE_LAT
+    ], axis=-1)
+    # Close the ring by repeating the first vertex
+    return np.concatenate([vertices, vertices[..., :1, :]], axis=-2)
+
+
+def compute_spread(inputs, horizons=PREDICTION_HORIZONS_HOURS):
+    """Evaluates the spread model for every event in the structured inputs array and every horizon. Returns a dict of arrays: per event 'ros_head', 'ros_flank' and 'ros_back' (meters per hour), 'flame_length' (meters), 'risk_level', 'direction' (spread azimuth) and 'rain_stop' (True where rain halts the spread), and 'vertices' with shape (events, horizons, ELLIPSE_POINTS + 1, 2). Events halted by rain get zero spread, a LOW risk and a degenerate ellipse at their origin."""
+    inputs = np.asarray(inputs, dtype=SPREAD_INPUT_DTYPE)
+    rain_stop = inputs["rain"] > RAIN_STOP_MM
+
+    effective_wind_kmh = (inputs["wind_speed"] * 0.6 + inputs["gust"] * 0.4) * 3.6
+    wind_factor = np.minimum(1.0 + 0.1 * effective_wind_kmh, MAX_WIND_FACTOR)
+
+    aspect = inputs["aspect"]
+    solar_factor = np.where((aspect > 90) & (aspect < 270), 1.2, 1.0)
+    dryness = 1.0 + np.where(inputs["humidity"] < 20, 0.5, 0.0) + np.where(inputs["temp"] > 30, 0.3, 0.0)
+    slope_factor = np.exp(0.069 * inputs["slope"])
+    base_ros = inputs["fuel_load"] * 40.0
+
+    ros_head = np.where(rain_stop, 0.0, base_ros * wind_factor * slope_factor * dryness * solar_factor)
+    ros_flank = ros_head * FLANK_RATIO
+    ros_back = ros_head * BACK_RATIO
+
+    flame_length = 0.07 * np.sqrt(ros_head)
+    risk_index = 1 + (flame_length > HIGH_FLAME_LENGTH_M).astype(int) + (flame_length > EXTREME_FLAME_LENGTH_M).astype(int)
+    risk_level = RISK_LEVELS[np.where(rain_stop, 0, risk_index)]
+
+    # The fire spreads downwind, opposite to the direction the wind blows from
+    direction = np.where(rain_stop, 0.0, (inputs["wind_dir"] + 180) % 360)
+
+    hours = effective_hours(horizons)[np.newaxis, :]
+    vertices = ellipse_vertices(
+        inputs["lat"][:, np.newaxis], inputs["lon"][:, np.newaxis], direction[:, np.newaxis],
+        ros_head[:, np.newaxis] * hours, ros_back[:, np.newaxis] * hours, ros_flank[:, np.newaxis] * hours
+    )
+
+    return {
+        "ros_head": ros_head,
+        "ros_flank": ros_flank,
+        "ros_back": ros_back,
+        "flame_length": flame_length,
+        "risk_level": risk_level,
+        "direction": direction,
+        "rain_stop": rain_stop,
+        "vertices": vertices
+    }
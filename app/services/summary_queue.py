@@ -0,0 +1,111 @@
+"""
+Background job queue for LLM summaries.
+LLM round trips (several seconds each, longer when the provider fallback chain kicks in) run on a small bounded
+worker pool instead of the prediction and dispatch hot path. Jobs are keyed, so a job that is already queued or
+running is not submitted twice, and the backlog is capped: when it is full new jobs are dropped and their callers
+retry on a later cycle. A batch job covers several keyed items (e.g. many predictions summarized by one prompt),
+each of which counts as pending until the batch finishes.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Worker threads running summary jobs concurrently
+SUMMARY_WORKERS = int(os.environ.get('SUMMARY_WORKERS', 4))
+# Maximum number of queued or running jobs
+SUMMARY_MAX_PENDING = int(os.environ.get('SUMMARY_MAX_PENDING', 200))
+
+_summary_queue = None
+_summary_queue_lock = threading.Lock()
+
+
+class SummaryJobQueue:
+    """
+    Bounded pool of worker threads running keyed background jobs. The pool is started on the first submitted job.
+    """
+
+    def __init__(self, max_workers=SUMMARY_WORKERS, max_pending=SUMMARY_MAX_PENDING):
+        """Initializes the queue with the number of worker threads and the cap on queued or running jobs."""
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """Schedules func(*args, **kwargs) on the worker pool under the given key. Returns False without scheduling it if a job with the same key is already pending or the backlog is full."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                print(f"   ⚠️ Summary queue full ({self.max_pending} pending jobs). Dropping job {key}.")
+                return False
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="summary")
+            self._pending[key] = self._executor.submit(self._run, [key], func, args, kwargs)
+        return True
+
+    def submit_batch(self, keyed_items, func, *args):
+        """Schedules one job func(*args, items) for the given (key, item) pairs, leaving out items whose key is already pending. Items beyond the backlog cap are dropped. Returns the number of items scheduled."""
+        with self._lock:
+            keys = []
+            items = []
+            for key, item in keyed_items:
+                if key in self._pending or key in keys:
+                    continue
+                if len(self._pending) + len(keys) >= self.max_pending:
+                    print(f"   ⚠️ Summary queue full ({self.max_pending} pending jobs). Dropping job {key}.")
+                    continue
+                keys.append(key)
+                items.append(item)
+            if not keys:
+                return 0
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="summary")
+            future = self._executor.submit(self._run, keys, func, args + (items,), {})
+            for key in keys:
+                self._pending[key] = future
+        return len(keys)
+
+    def _run(self, keys, func, args, kwargs):
+        """Runs one job, logging its failure instead of raising, and removes its keys from the pending jobs."""
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"   ⚠️ Summary job {keys[0] if len(keys) == 1 else keys} failed: {e}")
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._pending.pop(key, None)
+
+    def is_pending(self, key):
+        """Returns True if a job with the given key is queued or running."""
+        with self._lock:
+            return key in self._pending
+
+    def wait(self, timeout=None):
+        """Blocks until the currently pending jobs finish or the timeout (seconds) expires. Returns the number of jobs still unfinished."""
+        with self._lock:
+            futures = set(self._pending.values())
+        _, not_done = wait(futures, timeout=timeout)
+        return len(not_done)
+
+    def shutdown(self, wait_for_jobs=True):
+        """Stops the worker pool, optionally waiting for the pending jobs to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait_for_jobs)
+
+
+def get_summary_queue():
+    """Returns the process-wide summary job queue, creating it on first use."""
+    global _summary_queue
+
+    with _summary_queue_lock:
+        if _summary_queue is None:
+            _summary_queue = SummaryJobQueue()
+    return _summary_queue
@@ -0,0 +1,108 @@
+"""
+Persistent travel-time cache for the Commander Agent's routing requests.
+Durations are keyed on (station coordinate, fire location snapped to a configurable grid) and stored in the
+`travel_time_cache` table, so repeated time horizons and repeated master cycles reuse matrix cells across worker
+restarts and only the missing station/fire pairs are sent to the routing server.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+from app.extensions import db
+from app.models.travel_times import TravelTimeEntry
+from app.services.db_utils import dialect_insert
+
+# Grid size (degrees) used to snap fire locations; 0.005° is roughly 500 meters over Israel
+OSRM_CACHE_GRID_DEG = float(os.environ.get('OSRM_CACHE_GRID_DEG', 0.005))
+# Entries older than this are treated as missing and refreshed from the routing server
+OSRM_CACHE_TTL_HOURS = float(os.environ.get('OSRM_CACHE_TTL_HOURS', 24 * 7))
+# Upper bound on stored pairs; the least recently used rows are evicted beyond it
+OSRM_CACHE_MAX_ENTRIES = int(os.environ.get('OSRM_CACHE_MAX_ENTRIES', 50000))
+
+
+class TravelTimeCache:
+    """
+    Read-through store for road travel durations with spatial quantization of destinations, TTL expiry and least-recently-used eviction, backed by the application database.
+    """
+
+    def __init__(self, grid_deg=OSRM_CACHE_GRID_DEG, ttl_hours=OSRM_CACHE_TTL_HOURS,
+                 max_entries=OSRM_CACHE_MAX_ENTRIES):
+        """Initializes the cache with the destination grid size in degrees, the entry time-to-live in hours and the maximum number of stored pairs."""
+        self.grid_deg = grid_deg
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+
+    def _snap(self, value):
+        """Snaps a destination coordinate to the center line of its grid cell, rounded to remove floating point noise from the key."""
+        return round(round(value / self.grid_deg) * self.grid_deg, 6)
+
+    def key_for(self, origin_lat, origin_lon, dest_lat, dest_lon):
+        """Builds the cache key for a station-to-fire pair: the exact station coordinate and the snapped fire coordinate."""
+        return (round(origin_lat, 6), round(origin_lon, 6), self._snap(dest_lat), self._snap(dest_lon))
+
+    def get_many(self, keys):
+        """Looks up the given keys and returns a dictionary of the fresh hits mapping key to duration in seconds (None when the stored answer is 'no road'). Hits are marked as recently used; missing or expired keys are simply absent."""
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        table = TravelTimeEntry.__table__
+        cutoff = datetime.utcnow() - self.ttl
+
+        with db.engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.origin_lat, table.c.origin_lon, table.c.dest_lat, table.c.dest_lon,
+                       table.c.duration_s)
+                .where(table.c.origin_lat.in_({k[0] for k in keys}))
+                .where(table.c.dest_lat.in_({k[2] for k in keys}))
+                .where(table.c.fetched_at >= cutoff)
+            ).all()
+
+            hits, hit_ids = {}, []
+            for row in rows:
+                key = (row.origin_lat, row.origin_lon, row.dest_lat, row.dest_lon)
+                if key in keys:
+                    hits[key] = row.duration_s
+                    hit_ids.append(row.id)
+
+            # Refresh recency so frequently used pairs survive LRU eviction
+            if hit_ids:
+                conn.execute(update(table).where(table.c.id.in_(hit_ids)).values(last_used_at=datetime.utcnow()))
+
+        return hits
+
+    def put_many(self, durations):
+        """Stores a dictionary mapping cache keys to durations in seconds (None for 'no road'), replacing existing rows for the same keys, then evicts expired and least recently used rows beyond the size limit."""
+        if not durations:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {"origin_lat": k[0], "origin_lon": k[1], "dest_lat": k[2], "dest_lon": k[3],
+             "duration_s": duration, "fetched_at": now, "last_used_at": now}
+            for k, duration in durations.items()
+        ]
+
+        stmt = dialect_insert(TravelTimeEntry.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['origin_lat', 'origin_lon', 'dest_lat', 'dest_lon'],
+            set_={"duration_s": stmt.excluded.duration_s, "fetched_at": stmt.excluded.fetched_at,
+                  "last_used_at": stmt.excluded.last_used_at}
+        )
+
+        with db.engine.begin() as conn:
+            conn.execute(stmt, rows)
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Deletes expired rows and, if the table is still above the size limit, the least recently used rows beyond it."""
+        table = TravelTimeEntry.__table__
+        conn.execute(delete(table).where(table.c.fetched_at < datetime.utcnow() - self.ttl))
+
+        overflow = conn.execute(select(func.count()).select_from(table)).scalar() - self.max_entries
+        if overflow > 0:
+            oldest_ids = select(table.c.id).order_by(table.c.last_used_at.asc()).limit(overflow).scalar_subquery()
+            conn.execute(delete(table).where(table.c.id.in_(oldest_ids)))
+            print(f"   🧹 Travel-time cache: evicted {overflow} least recently used entries.")
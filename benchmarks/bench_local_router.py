@@ -0,0 +1,91 @@
+"""
+Benchmark for the offline routing engine: builds a synthetic lattice road graph over Israel, saves and memory-maps
+it like a real preprocessed graph, and times a many-to-many travel time table (default 300 sources x 50 targets).
+
+Usage:
+    python benchmarks/bench_local_router.py --rows 600 --cols 300 --stations 120 --sources 300 --targets 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.geo.distance import haversine_km  # noqa: E402
+from app.services.local_router import LocalRouter, RoadGraph  # noqa: E402
+
+# Bounding box of Israel (lon_min, lat_min, lon_max, lat_max) covered by the synthetic lattice
+ISRAEL_BBOX = (34.27, 29.50, 35.83, 33.28)
+
+
+def build_lattice_graph(rows, cols, seed):
+    """Builds a bidirectional 4-neighbour lattice over the bounding box with randomized road speeds between 40 and 90 km/h."""
+    rng = np.random.default_rng(seed)
+    lon_min, lat_min, lon_max, lat_max = ISRAEL_BBOX
+    lats = np.repeat(np.linspace(lat_min, lat_max, rows), cols)
+    lons = np.tile(np.linspace(lon_min, lon_max, cols), rows)
+
+    node_ids = np.arange(rows * cols).reshape(rows, cols)
+    horizontal = np.stack([node_ids[:, :-1].ravel(), node_ids[:, 1:].ravel()], axis=1)
+    vertical = np.stack([node_ids[:-1, :].ravel(), node_ids[1:, :].ravel()], axis=1)
+    pairs = np.concatenate([horizontal, vertical])
+    pairs = np.concatenate([pairs, pairs[:, ::-1]])
+
+    step_km = np.array([haversine_km(lats[a], lons[a], lats[b], lons[b]) for a, b in pairs[:1000]]).mean()
+    speeds_kmh = rng.uniform(40.0, 90.0, len(pairs))
+    seconds = step_km / speeds_kmh * 3600.0
+
+    return RoadGraph.from_edges(lats, lons, pairs[:, 0], pairs[:, 1], seconds)
+
+
+def main():
+    """Builds, saves and memory-maps the synthetic graph, then times the travel time table query."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=600)
+    parser.add_argument("--cols", type=int, default=300)
+    parser.add_argument("--sources", type=int, default=300)
+    parser.add_argument("--targets", type=int, default=50)
+    parser.add_argument("--stations", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    graph = build_lattice_graph(args.rows, args.cols, args.seed)
+    print(f"🛣️ Synthetic graph: {graph.num_nodes} nodes, {graph.forward.nnz} directed edges")
+
+    rng = np.random.default_rng(args.seed)
+    lon_min, lat_min, lon_max, lat_max = ISRAEL_BBOX
+    # Resources are parked at stations, so the sources are drawn from a smaller set of station coordinates
+    stations = [(rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)) for _ in range(args.stations)]
+    sources = [stations[i] for i in rng.integers(0, len(stations), args.sources)]
+    targets = [(rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)) for _ in range(args.targets)]
+
+    start = time.perf_counter()
+    graph.precompute_sources(stations)
+    print(f"🏗️ Precomputed travel times for {len(stations)} stations in {time.perf_counter() - start:.1f}s (build step)")
+
+    with tempfile.TemporaryDirectory() as graph_dir:
+        graph.save(graph_dir)
+
+        start = time.perf_counter()
+        router = LocalRouter(RoadGraph.load(graph_dir))
+        print(f"📂 Memory-mapped graph loaded in {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        table = router.table(sources, targets)
+        elapsed = time.perf_counter() - start
+        reachable = sum(1 for row in table for v in row if v is not None)
+        print(f"⚡ {args.sources}x{args.targets} table from stations in {elapsed:.3f}s ({reachable} reachable pairs)")
+
+        # Origins that are not precomputed stations fall back to multi-source Dijkstra
+        start = time.perf_counter()
+        router.table(targets[:5], targets)
+        print(f"🐢 5x{args.targets} table from arbitrary origins in {time.perf_counter() - start:.3f}s (Dijkstra)")
+
+
+if __name__ == "__main__":
+    main()
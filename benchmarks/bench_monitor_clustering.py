@@ -0,0 +1,152 @@
+"""
+Benchmark for MonitorAgent event clustering: clusters synthetic VIIRS-like detections against a set of active fire
+events using the spatial grid index, and compares the result and speed against the original linear Haversine scan.
+
+Usage:
+    python benchmarks/bench_monitor_clustering.py --detections 50000 --events 5000 --linear-sample 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.agents.monitor_agent import MonitorAgent  # noqa: E402
+
+# Bounding box of Israel (lon_min, lat_min, lon_max, lat_max) used for the synthetic scene
+ISRAEL_BBOX = (34.27, 29.50, 35.83, 33.28)
+
+
+class SyntheticRead:
+    """Lightweight stand-in for a FireIncident row with the fields the clustering loop reads."""
+
+    def __init__(self, id, lat, lon):
+        """Initialize a synthetic detection with id, coordinates and fixed intensity values."""
+        self.id = id
+        self.latitude = lat
+        self.longitude = lon
+        self.brightness = 320.0
+        self.frp = random.uniform(1.0, 50.0)
+        self.confidence = "n"
+        self.source = "VIIRS_SNPP_NRT"
+        self.detected_at = None
+
+
+def _random_point(rng):
+    """Returns a uniformly random (lat, lon) inside the benchmark bounding box."""
+    lon_min, lat_min, lon_max, lat_max = ISRAEL_BBOX
+    return rng.uniform(lat_min, lat_max), rng.uniform(lon_min, lon_max)
+
+
+def build_scene(num_events, num_detections, seed):
+    """Builds seed detections for the initial events and a stream of new detections, half of them jittered around existing events and half scattered uniformly."""
+    rng = random.Random(seed)
+    event_reads = [SyntheticRead(i, *_random_point(rng)) for i in range(num_events)]
+
+    detections = []
+    for i in range(num_detections):
+        if i % 2 == 0:
+            anchor = rng.choice(event_reads)
+            lat = anchor.latitude + rng.uniform(-0.03, 0.03)
+            lon = anchor.longitude + rng.uniform(-0.03, 0.03)
+        else:
+            lat, lon = _random_point(rng)
+        detections.append(SyntheticRead(num_events + i, lat, lon))
+
+    return event_reads, detections
+
+
+def _linear_find(monitor, events, read):
+    """Reference implementation: the original full Haversine scan over the in-memory event list."""
+    closest, min_dist = None, float('inf')
+    for event in events:
+        dist = monitor._calculate_distance(read.latitude, read.longitude, event.latitude, event.longitude)
+        if dist < monitor.CLUSTER_RADIUS_KM and dist < min_dist:
+            min_dist = dist
+            closest = event
+    return closest
+
+
+def run_indexed(event_reads, detections):
+    """Clusters the detections with the grid-indexed MonitorAgent and returns (assignments, seconds)."""
+    monitor = MonitorAgent.__new__(MonitorAgent)
+    monitor.CLUSTER_RADIUS_KM = 2.5
+    monitor.active_events_cache = [monitor._create_new_event(r) for r in event_reads]
+    events_order = list(monitor.active_events_cache)
+
+    assignments = []
+    start = time.perf_counter()
+    for read in detections:
+        matched = monitor._find_matching_event_in_memory(read)
+        if matched:
+            monitor._update_existing_event(matched, read)
+        else:
+            matched = monitor._create_new_event(read)
+            monitor.active_events_cache.append(matched)
+            events_order.append(matched)
+        assignments.append(matched)
+    elapsed = time.perf_counter() - start
+
+    position = {id(e): i for i, e in enumerate(events_order)}
+    return [position[id(e)] for e in assignments], elapsed
+
+
+def run_linear(event_reads, detections):
+    """Clusters the detections with the original linear scan and returns (assignments, seconds)."""
+    monitor = MonitorAgent.__new__(MonitorAgent)
+    monitor.CLUSTER_RADIUS_KM = 2.5
+    monitor.active_events_cache = []
+    events = [monitor._create_new_event(r) for r in event_reads]
+
+    assignments = []
+    start = time.perf_counter()
+    for read in detections:
+        matched = _linear_find(monitor, events, read)
+        if matched:
+            monitor._update_existing_event(matched, read)
+        else:
+            matched = monitor._create_new_event(read)
+            events.append(matched)
+        assignments.append(matched)
+    elapsed = time.perf_counter() - start
+
+    position = {id(e): i for i, e in enumerate(events)}
+    return [position[id(e)] for e in assignments], elapsed
+
+
+def main():
+    """Parses arguments, runs both clustering strategies and prints timings and an equivalence check."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detections", type=int, default=50000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--linear-sample", type=int, default=2000,
+                        help="Number of detections to run through the slow linear scan for comparison")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    event_reads, detections = build_scene(args.events, args.detections, args.seed)
+    print(f"🔥 Scene: {args.events} active events, {args.detections} new detections")
+
+    indexed_assignments, indexed_time = run_indexed(event_reads, detections)
+    print(f"⚡ Grid index: {indexed_time:.2f}s total ({indexed_time / args.detections * 1e6:.1f} µs/detection)")
+
+    sample = detections[:args.linear_sample]
+    linear_assignments, linear_time = run_linear(event_reads, sample)
+    per_detection = linear_time / max(1, len(sample))
+    print(f"🐢 Linear scan: {linear_time:.2f}s for {len(sample)} detections "
+          f"(~{per_detection * args.detections:.0f}s extrapolated to {args.detections})")
+
+    sample_indexed, _ = run_indexed(event_reads, sample)
+    if sample_indexed == linear_assignments:
+        print(f"✅ Grid index and linear scan produced identical clustering on {len(sample)} detections.")
+    else:
+        mismatches = sum(1 for a, b in zip(sample_indexed, linear_assignments) if a != b)
+        print(f"❌ Clustering mismatch on {mismatches} of {len(sample)} detections!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from app.models.nasa_fire import FireIncident
 from app.models.fire_events import FireEvent
 from app.models.resources import Station, Resource
 from app.models.commander_logs import CommandLog
+from app.models.travel_times import TravelTimeEntry
+from app.models.firms_sources import FirmsSourceState
+from app.models.llm_cache import LlmCacheEntry
 from app.services.seed_resources import seed_real_israel_stations
 
 app = create_app()
@@ -1,4 +1,15 @@
+import json
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pulp
+
+import app.agents.commander_agent as commander_module
+import app.agents.llm_agent as llm_module
 from app.agents.commander_agent import CommanderAgent
+from app.extensions import db
+from app.models.commander_logs import CommandLog
 from app.models.fire_events import FireEvent
 from app.models.resources import Resource
 
@@ -126,3 +137,92 @@ def test_starvation_prevention(app):
     # Verify that only ROTEM can handle the large fire, so it must be assigned there
     assert rotem_truck.assigned_event_id == 3, "Failure: The system starved the large fire!"
     assert saar_truck.assigned_event_id == 4, "Failure: The system didn't send SAAR to the small fire!"
+
+
+def test_district_summaries_are_generated_concurrently(app, monkeypatch):
+    """Tests that district dispatch summaries are requested from the LLM concurrently and each district's commander_update is emitted as soon as its summary is ready: the North summary only completes once the South update has been broadcast. Afterwards the tactical summaries of both fires and one operations log row per district are saved."""
+    for event_id in (1, 2):
+        db.session.add(FireEvent(id=event_id, latitude=32.0, longitude=35.0, detected_at=datetime.utcnow(),
+                                 is_active=True))
+    db.session.commit()
+
+    south_emitted = threading.Event()
+    north_saw_south = []
+
+    emitter = MagicMock()
+    emitter.emit.side_effect = lambda event, data: (south_emitted.set()
+                                                    if data.get("district_name") == "South" else None)
+    monkeypatch.setattr("flask_socketio.SocketIO", lambda *args, **kwargs: emitter)
+
+    class FakeLLMAgent:
+        """LLM agent stub returning one tactical summary per district, with the North answer held back until the South update is out."""
+
+        def summarize_dispatch(self, district_name, dispatch_data):
+            """Returns the structured summary of a district, waiting for the South broadcast first when called for North."""
+            if district_name == "North":
+                north_saw_south.append(south_emitted.wait(timeout=5))
+            event_id = dispatch_data["event_id"]
+            return json.dumps({"district_name": district_name, "district_overview": "ok",
+                               "fires_allocation": [{"event_id": event_id,
+                                                     "tactical_summary": f"plan for {event_id}"}]})
+
+    monkeypatch.setattr(llm_module, "LLMAgent", FakeLLMAgent)
+
+    CommanderAgent()._generate_and_save_district_summaries({"North": {"event_id": 1}, "South": {"event_id": 2}})
+
+    assert north_saw_south == [True]
+    assert [call.args[1]["district_name"] for call in emitter.emit.call_args_list] == ["South", "North"]
+
+    db.session.expire_all()
+    assert db.session.get(FireEvent, 1).tactical_summary == "plan for 1"
+    assert db.session.get(FireEvent, 2).tactical_summary == "plan for 2"
+    assert sorted(log.district_name for log in CommandLog.query.all()) == ["North", "South"]
+
+
+def test_sparse_model_skips_unreachable_and_dominated_pairs(app):
+    """Tests that the MILP only gets variables for useful pairs: a SAAR arriving after the time horizon is left out, and of the SAARs that arrive in time only the fastest is kept, since one SAAR covers the small fire and a slower one could never beat it. The ROTEM, a different resource type, stays in the model."""
+    commander = CommanderAgent()
+    fire = FireEvent(id=1, demand_perimeter_m=80.0)
+    saars = [Resource(id=101 + i, resource_type='SAAR', status='AVAILABLE') for i in range(4)]
+    rotem = Resource(id=110, resource_type='ROTEM', status='AVAILABLE')
+
+    eta_matrix = {101: {1: 0.1}, 102: {1: 0.2}, 103: {1: 0.3}, 104: {1: 1.5}, 110: {1: 0.5}}
+    pairs = commander._feasible_pairs([fire], saars + [rotem], eta_matrix, 1.0, {1: 80.0})
+
+    assert set(pairs) == {(101, 1), (110, 1)}
+    assert pairs[101, 1] == commander.get_net_yield('SAAR', fire, 0.1, 1.0)
+
+
+def test_dispatch_solver_limits_and_horizon_retry(app, monkeypatch):
+    """Tests that CBC is run with the configured time limit and MIP gap, that a horizon too short to cover the demand dispatches nothing, and that the next, longer horizon dispatches both SAARs the fire needs."""
+    solver_options = []
+    real_cbc = pulp.PULP_CBC_CMD
+
+    def recording_cbc(**kwargs):
+        """Records the solver options before creating the real CBC command."""
+        solver_options.append(kwargs)
+        return real_cbc(**kwargs)
+
+    monkeypatch.setattr(pulp, "PULP_CBC_CMD", recording_cbc)
+
+    commander = CommanderAgent()
+    fire = FireEvent(id=1, demand_perimeter_m=300.0)
+    saars = [Resource(id=101, resource_type='SAAR', status='AVAILABLE'),
+             Resource(id=102, resource_type='SAAR', status='AVAILABLE')]
+    eta_matrix = {101: {1: 0.2}, 102: {1: 0.4}}
+
+    def dispatch(horizon_hours):
+        """Runs the optimization for the test district at the given time horizon."""
+        return commander.step4_optimize_and_dispatch(
+            unsolved_fires=[fire], math_survivors=saars, eta_matrix=eta_matrix, time_horizon_hours=horizon_hours,
+            fire_demands={1: 300.0}, allocated_in_this_cycle=set(), available_supply={"SAAR": saars},
+            llm_summary={}, district_name="Test_District")
+
+    # One hour is not enough for two SAARs to build 300 meters, two hours need both of them
+    assert dispatch(1.0) is False
+    assert all(saar.status == 'AVAILABLE' for saar in saars)
+
+    assert dispatch(2.0) is True
+    assert solver_options[-1]["timeLimit"] == commander_module.MILP_TIME_LIMIT_SECONDS
+    assert solver_options[-1]["gapRel"] == commander_module.MILP_GAP_REL
+    assert all(saar.assigned_event_id == 1 for saar in saars)
@@ -0,0 +1,125 @@
+import random
+
+from shapely.geometry import Point
+
+from app.extensions import db
+from app.geo.borders import get_israel_polygon, in_country, is_in_country
+from app.geo.distance import haversine_km, haversine_matrix, nearest_neighbor, nearest_neighbors
+from app.geo.grid_index import GridIndex
+from app.geo.station_index import get_station_index, invalidate_station_index
+from app.models.resources import Station
+
+
+class MockPoint:
+    """Minimal object exposing latitude and longitude attributes, used to populate spatial indexes in tests."""
+
+    def __init__(self, lat, lon):
+        """Initialize a mock point with the given coordinates."""
+        self.latitude = lat
+        self.longitude = lon
+
+
+def _linear_nearest(points, lat, lon, radius_km):
+    """Reference linear scan returning the closest point strictly within the radius (first one wins on ties)."""
+    closest, min_dist = None, float('inf')
+    for point in points:
+        dist = haversine_km(lat, lon, point.latitude, point.longitude)
+        if dist < radius_km and dist < min_dist:
+            min_dist = dist
+            closest = point
+    return closest
+
+
+def test_grid_index_matches_linear_scan():
+    """Tests that the grid index returns exactly the same closest match as a full linear Haversine scan for random queries across Israel, including points that are moved after being indexed."""
+    rng = random.Random(7)
+    points = [MockPoint(rng.uniform(29.5, 33.3), rng.uniform(34.2, 35.9)) for _ in range(500)]
+    index = GridIndex(2.5, points)
+
+    # Move a subset of points to verify the index is updated in place
+    for point in points[:100]:
+        point.latitude += rng.uniform(-0.05, 0.05)
+        point.longitude += rng.uniform(-0.05, 0.05)
+        index.update(point)
+
+    for _ in range(2000):
+        lat, lon = rng.uniform(29.5, 33.3), rng.uniform(34.2, 35.9)
+        expected = _linear_nearest(points, lat, lon, 2.5)
+        actual, _ = index.find_nearest(lat, lon)
+        assert actual is expected, "Grid index disagreed with the linear scan!"
+
+    # Iteration order and size must behave like the list cache it replaces
+    assert list(index) == points
+    assert len(index) == 500
+
+
+def test_vectorized_haversine_matches_scalar():
+    """Tests that the NumPy many-to-many distance matrix and nearest-neighbour search agree with the scalar Haversine kernel, including the zero distance for identical points and first-wins tie breaking."""
+    lats1, lons1 = [32.0853, 31.7683, 32.7940], [34.7818, 35.2137, 34.9896]
+    lats2, lons2 = [31.7683, 32.0853], [35.2137, 34.7818]
+
+    matrix = haversine_matrix(lats1, lons1, lats2, lons2)
+    assert matrix.shape == (3, 2)
+    for i in range(3):
+        for j in range(2):
+            assert abs(matrix[i, j] - haversine_km(lats1[i], lons1[i], lats2[j], lons2[j])) < 1e-9
+
+    # Identical points must be exactly zero distance apart
+    assert matrix[1, 0] == 0.0
+
+    indices, distances = nearest_neighbors(lats1, lons1, lats2, lons2)
+    assert list(indices) == [1, 0, 1]
+    assert distances[0] == 0.0
+
+    # Duplicate reference points resolve to the first one, and an empty reference set yields no match
+    assert nearest_neighbor(32.0, 35.0, [31.0, 31.0], [35.0, 35.0])[0] == 0
+    assert nearest_neighbor(32.0, 35.0, [], []) == (None, float('inf'))
+
+
+def test_station_index_invalidated_on_station_change(app):
+    """Tests that the process-wide station index resolves districts from the nearest station, is reused between lookups, and is rebuilt after a station is added to the database."""
+    db.session.add(Station(name="Haifa", district="Coastal", latitude=32.80, longitude=35.02))
+    db.session.commit()
+
+    index = get_station_index()
+    assert index.district_for(31.25, 34.80) == "Coastal"
+    assert get_station_index() is index, "Station index should be reused instead of re-querying the table!"
+
+    # Adding a station closer to Beer Sheva must invalidate the snapshot
+    db.session.add(Station(name="Beer Sheva", district="South", latitude=31.25, longitude=34.82))
+    db.session.commit()
+
+    assert get_station_index() is not index
+    assert get_station_index().district_for(31.25, 34.80) == "South"
+
+
+
+def test_station_index_matches_linear_scan_and_leaves_unknown_district_unset(app):
+    """Tests that the KD-tree station index returns the same nearest station as a linear Haversine scan, and that with an empty station table no district is resolved (None) instead of a placeholder that would be stored on the event."""
+    # The snapshot may still hold stations of an earlier test's (dropped) database
+    invalidate_station_index()
+    assert get_station_index().districts_for([31.25, 32.0], [34.80, 35.0]) == [None, None]
+
+    rng = random.Random(5)
+    for i in range(200):
+        db.session.add(Station(name=f"Station {i}", district=f"District {i}", latitude=rng.uniform(29.5, 33.3),
+                               longitude=rng.uniform(34.3, 35.9)))
+    db.session.commit()
+
+    index = get_station_index()
+    lats = [rng.uniform(29.5, 33.3) for _ in range(100)]
+    lons = [rng.uniform(34.3, 35.9) for _ in range(100)]
+    expected, _ = nearest_neighbors(lats, lons, index.lats, index.lons)
+    assert list(index.nearest_indices(lats, lons)) == list(expected)
+
+def test_in_country_filter_matches_exact_polygon_test():
+    """Tests that the vectorized in-country filter with bounding-box pre-reject agrees with a per-point Shapely containment test, for points inside the borders, in the sea, in neighbouring countries and far outside the bounding box."""
+    rng = random.Random(17)
+    lats = [rng.uniform(28.0, 34.5) for _ in range(2000)] + [31.25, 33.0, 40.0]
+    lons = [rng.uniform(33.5, 37.0) for _ in range(2000)] + [34.79, 34.3, 10.0]
+
+    polygon = get_israel_polygon()
+    expected = [polygon.contains(Point(lon, lat)) for lat, lon in zip(lats, lons)]
+
+    assert list(in_country(lats, lons)) == expected
+    assert is_in_country(31.25, 34.79) and not is_in_country(33.0, 34.3)
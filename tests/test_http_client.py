@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.http_client import AsyncHttpClient
+
+
+def test_async_client_retries_and_limits_per_host():
+    """Tests that the shared async client retries rate-limited responses until they succeed, gives up with the last response once retries are exhausted, and never has more requests in flight to one host than its semaphore allows."""
+    calls = {"flaky": 0, "active": 0, "peak": 0}
+
+    async def handler(request):
+        if request.url.host == "flaky.test":
+            calls["flaky"] += 1
+            return httpx.Response(429 if calls["flaky"] < 3 else 200, json={"ok": True})
+        if request.url.host == "down.test":
+            return httpx.Response(503)
+
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+        await asyncio.sleep(0.01)
+        calls["active"] -= 1
+        return httpx.Response(200)
+
+    async def scenario():
+        async with AsyncHttpClient(host_limits={"limited.test": 2}, max_retries=3, backoff_base=0.0,
+                                   transport=httpx.MockTransport(handler)) as client:
+            flaky = await client.get("https://flaky.test/data")
+            down = await client.get("https://down.test/data", retries=1)
+            await asyncio.gather(*(client.get(f"https://limited.test/{i}") for i in range(10)))
+        return flaky, down
+
+    flaky, down = asyncio.run(scenario())
+
+    assert flaky.status_code == 200 and calls["flaky"] == 3, "Client did not retry the 429 responses!"
+    assert down.status_code == 503, "Exhausted retries should return the last response!"
+    assert calls["peak"] == 2, "Per-host concurrency limit was not respected!"
+
+
+def test_async_client_spaces_requests_to_throttled_host():
+    """Tests that requests to a host with a minimum interval start at least that far apart even when each one finishes immediately, while other hosts are not slowed down."""
+    starts = {"throttled.test": [], "free.test": []}
+
+    def handler(request):
+        starts[request.url.host].append(time.monotonic())
+        return httpx.Response(200)
+
+    async def scenario():
+        async with AsyncHttpClient(host_intervals={"throttled.test": 0.05}, transport=httpx.MockTransport(handler)) as client:
+            await asyncio.gather(*(client.get(f"https://throttled.test/{i}") for i in range(4)),
+                                 *(client.get(f"https://free.test/{i}") for i in range(4)))
+
+    asyncio.run(scenario())
+
+    gaps = [later - earlier for earlier, later in zip(starts["throttled.test"], starts["throttled.test"][1:])]
+    assert len(gaps) == 3 and min(gaps) >= 0.049, "Requests to the throttled host were not spaced out!"
+    assert starts["free.test"][-1] < starts["throttled.test"][-1], "Unthrottled host should not wait for the throttle!"
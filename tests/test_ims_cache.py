@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+
+import app.agents.IMS_DATA_agent as ims_module
+from app.agents.IMS_DATA_agent import ImsObservationCache, enrich_with_ims, prefetch_ims_observations
+from app.services.http_client import AsyncHttpClient
+
+
+class MockFireEvent:
+    """Minimal fire event carrying only the fields the IMS agent reads and writes."""
+
+    def __init__(self, id, lat, lon):
+        """Initialize a mock event at the given coordinates."""
+        self.id = id
+        self.latitude = lat
+        self.longitude = lon
+        self.ims_temp = None
+
+
+def test_ims_readings_are_coalesced_cached_and_prefetched(monkeypatch):
+    """Tests that concurrent events near the same station share one in-flight IMS request, that a later cycle within the TTL is served from the cache, and that the cycle prefetch makes enrichment a pure cache lookup."""
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request.url.path)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"data": [{"channels": [{"name": "TD", "value": 31.5}]}]})
+
+    station = {"id": 24, "name": "Bet Dagan", "lat": 32.0, "lon": 34.8}
+    monkeypatch.setattr(ims_module, "IMS_TOKEN", "test-token")
+    monkeypatch.setattr(ims_module, "get_nearest_stations", lambda lats, lons, k=1: [[station]] * len(lats))
+    monkeypatch.setattr(ims_module, "observation_cache", ImsObservationCache(ttl_seconds=600))
+
+    events = [MockFireEvent(i, 32.0 + i * 0.01, 34.8) for i in range(5)]
+
+    async def enrich_all(targets):
+        async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+            await asyncio.gather(*(enrich_with_ims(event, client) for event in targets))
+
+    # Five concurrent events near one station cost a single request
+    asyncio.run(enrich_all(events))
+    assert len(requests_seen) == 1, "Concurrent callers should share one in-flight fetch!"
+    assert all(event.ims_temp == 31.5 for event in events)
+
+    # A new cycle (new event loop) within the TTL needs no request
+    asyncio.run(enrich_all([MockFireEvent(9, 32.1, 34.8)]))
+    assert len(requests_seen) == 1, "Fresh readings should come from the cache!"
+
+    # After expiry, the cycle prefetch refreshes the station once and enrichment is a lookup
+    ims_module.observation_cache.clear()
+
+    async def prefetch_then_enrich():
+        async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+            await prefetch_ims_observations([32.0, 32.05], [34.8, 34.8], client)
+            fetched_by_prefetch = len(requests_seen)
+            await enrich_with_ims(MockFireEvent(10, 32.02, 34.8), client)
+        return fetched_by_prefetch
+
+    assert asyncio.run(prefetch_then_enrich()) == 2
+    assert len(requests_seen) == 2, "Enrichment after a prefetch must not fetch again!"
+
+
+def test_ims_falls_back_to_next_nearest_station(monkeypatch):
+    """Tests that when the nearest station reports empty data, enrichment uses the next-nearest station returned by the k-nearest lookup."""
+
+    def handler(request):
+        if "/1/" in request.url.path:
+            return httpx.Response(200, json={"data": []})
+        return httpx.Response(200, json={"data": [{"channels": [{"name": "TD", "value": 28.0}]}]})
+
+    candidates = [{"id": 1, "name": "Empty", "lat": 32.0, "lon": 34.8},
+                  {"id": 2, "name": "Backup", "lat": 32.1, "lon": 34.8}]
+    monkeypatch.setattr(ims_module, "IMS_TOKEN", "test-token")
+    monkeypatch.setattr(ims_module, "get_nearest_stations", lambda lats, lons, k=1: [candidates[:k]] * len(lats))
+    monkeypatch.setattr(ims_module, "observation_cache", ImsObservationCache(ttl_seconds=600))
+
+    event = MockFireEvent(1, 32.0, 34.8)
+
+    async def scenario():
+        async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+            await enrich_with_ims(event, client)
+
+    asyncio.run(scenario())
+
+    assert event.ims_station_id == 2 and event.ims_temp == 28.0
@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.geo.distance import haversine_matrix
+from app.services.ims_stations_service import get_nearest_station, get_nearest_stations, load_stations, stations_cache
+
+
+def test_kdtree_matches_brute_force_great_circle():
+    """Tests that the batched KD-tree lookup returns the same k nearest stations, in the same order and with the same distances, as a brute-force great-circle scan over stations.csv."""
+    load_stations()
+    assert stations_cache, "stations.csv should be available to the tests!"
+
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(29.5, 33.3, 200)
+    lons = rng.uniform(34.2, 35.9, 200)
+
+    results = get_nearest_stations(lats, lons, k=3)
+
+    distances = haversine_matrix(lats, lons, [s['lat'] for s in stations_cache], [s['lon'] for s in stations_cache])
+    expected = np.argsort(distances, axis=1, kind='stable')[:, :3]
+
+    for i, candidates in enumerate(results):
+        assert [c['id'] for c in candidates] == [stations_cache[j]['id'] for j in expected[i]]
+        assert np.allclose([c['distance_km'] for c in candidates], distances[i, expected[i]], atol=1e-6)
+
+    assert get_nearest_station(lats[0], lons[0])['id'] == results[0][0]['id']
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import numpy as np
+
+import app.agents.fuel_agent as fuel_module
+from app.agents.fuel_agent import enrich_events_with_fuel
+from app.services.http_client import AsyncHttpClient
+from app.services.landcover_cache import LandCoverCache
+
+
+class MockFireEvent:
+    """Minimal fire event carrying only the fields the fuel agent reads and writes."""
+
+    def __init__(self, id, lat, lon):
+        """Initialize a mock event at the given coordinates with empty fuel fields."""
+        self.id = id
+        self.latitude = lat
+        self.longitude = lon
+        self.fuel_type = None
+        self.fuel_load = None
+
+
+def test_fuel_agent_uses_lazily_filled_landcover_tiles(tmp_path, monkeypatch):
+    """Tests that missing land-cover tiles are exported once and then served from the memory-mapped cache with no network, that pixel rows map north to south onto FUEL_CLASSES in one batch, and that events in a tile whose export fails fall back to the point identify call."""
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request.url.path.rsplit("/", 1)[-1])
+        if request.url.path.endswith("/identify"):
+            return httpx.Response(200, json={"value": "5"})
+
+        lon_min, lat_min = map(float, request.url.params["bbox"].split(",")[:2])
+        if lat_min > 31.5:
+            return httpx.Response(500)
+        # Northern half of every tile is Trees (2), southern half is Rangeland (11)
+        pixels = np.full((8, 8), 11, dtype=np.uint8)
+        pixels[:4] = 2
+        return httpx.Response(200, content=pixels.tobytes())
+
+    cache = LandCoverCache(path=str(tmp_path), tile_deg=0.1, tile_pixels=8)
+    monkeypatch.setattr(fuel_module, "get_landcover_cache", lambda: cache)
+
+    north = MockFireEvent(1, 31.08, 34.81)
+    south = MockFireEvent(2, 31.02, 34.81)
+    same_tile = MockFireEvent(3, 31.09, 34.89)
+    failed_tile = MockFireEvent(4, 31.65, 34.85)
+    events = [north, south, same_tile, failed_tile]
+
+    async def scenario():
+        async with AsyncHttpClient(max_retries=0, transport=httpx.MockTransport(handler)) as client:
+            await enrich_events_with_fuel(events, client)
+            first_pass = list(requests_seen)
+            await enrich_events_with_fuel(events[:3], client)
+        return first_pass
+
+    first_pass = asyncio.run(scenario())
+
+    assert sorted(first_pass) == ["exportImage", "exportImage", "identify"]
+    assert requests_seen == first_pass, "A warm cache must not touch the network!"
+    assert (north.fuel_type, north.fuel_load) == ("Trees", 2.5)
+    assert (south.fuel_type, south.fuel_load) == ("Rangeland", 0.4)
+    assert same_tile.fuel_type == "Trees"
+    assert failed_tile.fuel_type == "Crops", "Uncached tiles should fall back to the identify endpoint!"
@@ -0,0 +1,46 @@
+import json
+
+from app.agents.llm_agent import LLMAgent, split_into_batches
+
+
+def make_payload(event_id, hours=1.0):
+    """Builds a minimal prediction payload carrying the summary id used by batched summaries."""
+    return {"summary_id": f"{event_id}:{hours}", "event_id": event_id,
+            "predictions": {"time_horizon_hours": hours, "risk_level": "HIGH"}}
+
+
+def test_split_into_batches_respects_budget_and_size():
+    """Tests that batches stay within the item cap and the token budget, and that an oversized item gets a batch of its own."""
+    payloads = [make_payload(i) for i in range(7)]
+    assert [len(batch) for batch in split_into_batches(payloads, token_budget=10_000, max_items=3)] == [3, 3, 1]
+
+    # Each item costs its serialized tokens plus 200 expected output tokens, so 500 tokens fit two items
+    assert [len(batch) for batch in split_into_batches(payloads, token_budget=500, max_items=10)] == [2, 2, 2, 1]
+
+    huge = dict(make_payload(99), notes="x" * 10_000)
+    assert [len(batch) for batch in split_into_batches([huge, make_payload(1)], token_budget=500)] == [1, 1]
+
+
+def test_batched_summaries_retry_only_failed_events(monkeypatch):
+    """Tests that one JSON-mode call summarizes a whole batch, that entries failing schema validation (missing, empty or for unknown ids) are retried on their own, and that retries stop once every summary is valid."""
+    agent = LLMAgent()
+    agent.is_active = True
+    prompts = []
+
+    def fake_llm(prompt, context_name="LLM", is_json=False, task_type="dispatch"):
+        """Returns a valid summary for every requested id except event 2, whose summary is empty on the first call."""
+        assert is_json
+        prompts.append(prompt)
+        requested = [item["summary_id"] for item in json.loads(prompt.split("one prediction per item): ", 1)[1].split("\n\n", 1)[0])]
+        entries = [{"summary_id": sid, "summary": "" if sid == "2:1.0" and len(prompts) == 1 else f"forecast {sid}"}
+                   for sid in requested]
+        entries.append({"summary_id": "not-requested", "summary": "stray"})
+        return json.dumps({"summaries": entries})
+
+    monkeypatch.setattr(agent, "_call_llm_with_fallback", fake_llm)
+
+    summaries = agent.summarize_predictions_batch([make_payload(i) for i in range(1, 5)])
+
+    assert summaries == {f"{i}:1.0": f"forecast {i}:1.0" for i in range(1, 5)}
+    assert len(prompts) == 2
+    assert '"2:1.0"' in prompts[1] and '"1:1.0"' not in prompts[1]
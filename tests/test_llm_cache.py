@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timedelta
+
+from app.agents.llm_agent import LLMAgent
+from app.extensions import db
+from app.models.llm_cache import LlmCacheEntry
+from app.services.llm_cache import DatabaseLlmCache, cache_key
+
+
+def dispatch_data(eta_minutes):
+    """Builds a minimal district dispatch payload with the given ETA."""
+    return {"fire_7": {"status": "ACTIVELY_DISPATCHING", "location": {"lat": 32.08341, "lon": 34.78112},
+                       "resources": [{"type": "SAAR", "eta_minutes": eta_minutes, "station": "Tel Aviv"}]}}
+
+
+def test_cache_key_ignores_noise_and_volatile_fields():
+    """Tests that cache keys survive float jitter and changing timestamps, but change with the task type, model or a material input change."""
+    payload = {"predictions": {"rate_of_spread_meters_per_hour": 195.31, "prediction_timestamp": "2026-05-01 10:00"}}
+    jittered = {"predictions": {"rate_of_spread_meters_per_hour": 195.34, "prediction_timestamp": "2026-05-01 10:15"}}
+    changed = {"predictions": {"rate_of_spread_meters_per_hour": 240.0, "prediction_timestamp": "2026-05-01 10:15"}}
+
+    assert cache_key("prediction", "llama", payload) == cache_key("prediction", "llama", jittered)
+    assert cache_key("prediction", "llama", payload) != cache_key("prediction", "llama", changed)
+    assert cache_key("prediction", "llama", payload) != cache_key("dispatch", "llama", payload)
+    assert cache_key("prediction", "llama", payload) != cache_key("prediction", "gemini", payload)
+
+
+def test_dispatch_summary_reuses_cached_response(app, monkeypatch):
+    """Tests that an unchanged district dispatch is served from the cache without calling the LLM, while error responses are never cached."""
+    agent = LLMAgent()
+    agent.is_active = True
+    agent.response_cache = DatabaseLlmCache(ttl_hours=1, max_entries=10)
+    responses = ['{"error": "API Blocked"}', '{"district_overview": "ok", "fires_allocation": []}']
+    calls = []
+
+    def fake_llm(prompt, context_name="LLM", is_json=False, task_type="dispatch"):
+        """Returns the next canned response and records the call."""
+        calls.append(context_name)
+        return responses[len(calls) - 1]
+
+    monkeypatch.setattr(agent, "_call_llm_with_fallback", fake_llm)
+
+    assert "error" in json.loads(agent.summarize_dispatch("Center", dispatch_data(22.71)))
+    assert json.loads(agent.summarize_dispatch("Center", dispatch_data(22.71)))["district_overview"] == "ok"
+    # Same dispatch with ETA jitter is a cache hit
+    assert json.loads(agent.summarize_dispatch("Center", dispatch_data(22.68)))["district_overview"] == "ok"
+    assert len(calls) == 2
+
+
+def test_database_cache_ttl_and_lru_eviction(app):
+    """Tests that expired responses are misses and that the least recently used response is evicted beyond the size limit."""
+    cache = DatabaseLlmCache(ttl_hours=1, max_entries=2)
+    cache.put_many("prediction", {"a": "summary a", "b": "summary b"})
+
+    # Touch 'a' so 'b' becomes the least recently used entry
+    db.session.query(LlmCacheEntry).update({LlmCacheEntry.last_used_at: datetime.utcnow() - timedelta(minutes=5)})
+    db.session.commit()
+    assert cache.get_many(["a"]) == {"a": "summary a"}
+
+    cache.put_many("prediction", {"c": "summary c"})
+    assert cache.get_many(["a", "b", "c"]) == {"a": "summary a", "c": "summary c"}
+
+    db.session.query(LlmCacheEntry).filter_by(cache_key="c").update(
+        {LlmCacheEntry.created_at: datetime.utcnow() - timedelta(hours=2)})
+    db.session.commit()
+    assert cache.get_many(["c"]) == {}
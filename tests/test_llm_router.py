@@ -0,0 +1,101 @@
+import threading
+
+from app.agents.llm_agent import LLMAgent
+from app.services.llm_router import CircuitBreaker, LlmEndpoint, LlmRouter
+
+
+class RateLimitError(Exception):
+    """Provider error carrying an HTTP 429 status, like the Groq SDK's rate-limit error."""
+    status_code = 429
+
+
+class FakeClock:
+    """Manually advanced monotonic clock for circuit breaker tests."""
+
+    def __init__(self):
+        """Starts the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Returns the current fake time."""
+        return self.now
+
+
+class FakeProvider:
+    """Local stand-in for an LLM provider endpoint that replays scripted outcomes and counts its calls."""
+
+    def __init__(self, *outcomes, delay_event=None):
+        """Initializes the provider with outcomes to replay (strings are answers, exceptions are raised) and an optional event to wait on before answering."""
+        self.outcomes = list(outcomes)
+        self.delay_event = delay_event
+        self.calls = 0
+
+    def __call__(self, prompt, is_json):
+        """Answers one prompt with the next scripted outcome (the last one repeats)."""
+        self.calls += 1
+        if self.delay_event is not None:
+            self.delay_event.wait(timeout=5)
+        outcome = self.outcomes[min(self.calls, len(self.outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_router_skips_rate_limited_endpoint_until_cooldown():
+    """Tests that a 429 opens the endpoint's circuit so later prompts go straight to the next provider, and that the endpoint is tried again once its cool-down has passed."""
+    clock = FakeClock()
+    groq = FakeProvider(RateLimitError("429 Too Many Requests"), "groq answer")
+    gemini = FakeProvider("gemini answer")
+    router = LlmRouter({None: [
+        LlmEndpoint("groq", "groq", "llama", groq, CircuitBreaker(rate_limit_cooldown_seconds=30, clock=clock)),
+        LlmEndpoint("gemini", "gemini", "flash", gemini, CircuitBreaker(clock=clock))
+    ]}, hedge=False)
+
+    assert router.complete("prompt") == "gemini answer"
+    assert router.complete("prompt") == "gemini answer"
+    assert groq.calls == 1, "A rate-limited endpoint should be skipped while it cools down!"
+
+    clock.now = 31.0
+    assert router.complete("prompt") == "groq answer"
+    assert groq.calls == 2
+
+
+def test_router_hedges_slow_provider():
+    """Tests that a hedged request asks the backup provider when the first one has not answered within the hedge delay and returns the backup's answer without waiting for the slow one."""
+    release_slow = threading.Event()
+    slow = FakeProvider('{"from": "slow"}', delay_event=release_slow)
+    fast = FakeProvider('{"from": "fast"}')
+    router = LlmRouter({None: [LlmEndpoint("slow", "groq", "llama", slow),
+                               LlmEndpoint("fast", "gemini", "flash", fast)]},
+                       hedge=True, hedge_delay_seconds=0.05)
+
+    try:
+        assert router.complete("prompt", is_json=True) == '{"from": "fast"}'
+        assert (slow.calls, fast.calls) == (1, 1)
+    finally:
+        release_slow.set()
+
+
+def test_router_moves_on_from_invalid_response():
+    """Tests that a response failing validation counts as an endpoint failure and the next endpoint is tried."""
+    broken = FakeProvider("not json")
+    healthy = FakeProvider('{"ok": true}')
+    broken_endpoint = LlmEndpoint("broken", "groq", "llama", broken)
+    router = LlmRouter({None: [broken_endpoint, LlmEndpoint("healthy", "groq", "qwen", healthy)]}, hedge=False)
+
+    assert router.complete("prompt", validate=LLMAgent._is_valid_json) == '{"ok": true}'
+    assert broken_endpoint.breaker.failures == 1
+
+
+def test_agent_reports_unavailable_when_all_circuits_open():
+    """Tests that the agent answers with its error text, without calling any provider, when every endpoint is cooling down."""
+    clock = FakeClock()
+    provider = FakeProvider("answer")
+    breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=60, clock=clock)
+    breaker.record_failure()
+
+    agent = LLMAgent()
+    agent.router = LlmRouter({None: [LlmEndpoint("groq", "groq", "llama", provider, breaker)]})
+
+    assert agent._call_llm_with_fallback("prompt", is_json=True) == '{"error": "API Blocked"}'
+    assert provider.calls == 0
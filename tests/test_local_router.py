@@ -0,0 +1,57 @@
+import app.services.local_router as local_router_module
+from app.services.local_router import LocalRouter, RoadGraph, get_local_router
+
+
+def _build_line_graph():
+    """Builds a tiny directed road graph A <-> B -> C along a meridian, where C has no road back to B, plus an isolated node D."""
+    lats = [31.00, 31.05, 31.10, 31.50]
+    lons = [35.00, 35.00, 35.00, 35.00]
+    edge_from = [0, 1, 1, 1]
+    edge_to = [1, 0, 2, 2]
+    # The duplicated B -> C edge keeps only the fastest traversal time
+    edge_seconds = [300.0, 300.0, 600.0, 400.0]
+    return RoadGraph.from_edges(lats, lons, edge_from, edge_to, edge_seconds)
+
+
+def test_local_router_table_matches_graph(tmp_path):
+    """Tests that the offline router returns shortest-path travel times along directed edges, reports unreachable pairs as None, and gives identical answers from precomputed station times after a save/memory-mapped load round trip."""
+    graph = _build_line_graph()
+    router = LocalRouter(graph)
+
+    # Coordinates sit exactly on nodes, so there is no off-road access time
+    node_a, node_c, node_d = (35.00, 31.00), (35.00, 31.10), (35.00, 31.50)
+    table = router.table([node_a, node_c], [node_c, node_a, node_d])
+
+    assert table[0][0] == 700.0, "A -> C should take the fastest B -> C edge (300 + 400 seconds)!"
+    assert table[1][1] is None, "C has no road back towards A!"
+    assert table[0][2] is None, "Isolated node D must be unreachable!"
+
+    # Precompute station A, save and reload through memory-mapped arrays
+    graph.precompute_sources([node_a])
+    graph.save(str(tmp_path))
+    mapped_router = LocalRouter(RoadGraph.load(str(tmp_path)))
+
+    assert mapped_router.graph.source_column, "Precomputed station times were not loaded!"
+    assert mapped_router.table([node_a], [node_c, node_a, node_d]) == [table[0]]
+
+
+def test_failed_graph_load_is_not_retried(tmp_path, monkeypatch):
+    """Tests that when the road graph cannot be loaded, the local router is reported unavailable and the load is attempted only once per process instead of on every Commander Agent construction."""
+    monkeypatch.setattr(local_router_module, "ROUTING_BACKEND", "local")
+    monkeypatch.setattr(local_router_module, "ROAD_GRAPH_PATH", str(tmp_path / "missing"))
+    monkeypatch.setattr(local_router_module, "_local_router", None)
+    monkeypatch.setattr(local_router_module, "_local_router_loaded", False)
+
+    load_calls = []
+    real_load = RoadGraph.load
+
+    def counting_load(path):
+        """Counts graph load attempts before delegating to the real loader."""
+        load_calls.append(path)
+        return real_load(path)
+
+    monkeypatch.setattr(RoadGraph, "load", staticmethod(counting_load))
+
+    assert get_local_router() is None
+    assert get_local_router() is None
+    assert len(load_calls) == 1
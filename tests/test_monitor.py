@@ -1,5 +1,7 @@
+import asyncio
 from datetime import datetime, timedelta
 
+import app.agents.monitor_agent as monitor_module
 from app.agents.monitor_agent import MonitorAgent
 from app.models.fire_events import FireEvent
 from app.extensions import db
@@ -156,3 +158,43 @@ def test_bounding_box_expansion_logic():
 
     # Verify point counter accumulated all observations
     assert event.num_points == 5, "Point counter did not accumulate observations correctly"
+
+
+def test_enrichment_respects_agent_limits_and_deadline(app, monkeypatch):
+    """Tests that the asyncio enrichment pipeline fans out across all events at once, hands the batched agents every event in one call, never exceeds an agent's concurrency limit, and skips the work still pending once the cycle deadline has passed. Enrichments of the first ten events finish at once and the rest never do, so the outcome does not depend on timing."""
+    active = {"count": 0, "peak": 0}
+    enriched = []
+    batch_calls = []
+
+    async def ims_agent(event, client):
+        """Fake IMS agent that records how many calls overlap; events from id 10 on hang until cancelled."""
+        active["count"] += 1
+        active["peak"] = max(active["peak"], active["count"])
+        try:
+            await asyncio.sleep(0)
+            if event.id >= 10:
+                await asyncio.Event().wait()
+            enriched.append(event.id)
+        finally:
+            active["count"] -= 1
+
+    async def batch_agent(events, client):
+        """Fake batched agent that records how many events it received."""
+        batch_calls.append(len(events))
+
+    monkeypatch.setattr(monitor_module, "enrich_with_ims", ims_agent)
+    monkeypatch.setattr(monitor_module, "enrich_events_with_topography", batch_agent)
+    monkeypatch.setattr(monitor_module, "enrich_events_with_fuel", batch_agent)
+
+    monitor = MonitorAgent()
+    monitor.weather_service.update_weather_for_events = batch_agent
+    monitor.ENRICHMENT_CONCURRENCY["ims"] = 2
+    monitor.ENRICHMENT_DEADLINE_SECONDS = 0.5
+
+    events = [MockFireIncident(id=i, lat=32.0, lon=35.0, brightness=300, frp=10) for i in range(20)]
+    skipped = asyncio.run(monitor._enrich_events_async(events))
+
+    assert batch_calls == [20, 20, 20], "Weather, topography and fuel should each receive all events in one batch call!"
+    assert active["peak"] == 2, "IMS agent exceeded its concurrency limit!"
+    assert sorted(enriched) == list(range(10))
+    assert skipped == 10, "Deadline should have skipped the remaining IMS enrichments!"
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+
+import app.agents.nasa_agent as nasa_module
+from app.agents.nasa_agent import NasaIngestionService
+from app.models.firms_sources import FirmsSourceState
+from app.models.nasa_fire import FireIncident
+from app.services.http_client import AsyncHttpClient
+
+FIRMS_CSV = """latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,confidence,version,bright_ti5,frp,daynight
+31.2500,34.7900,330.5,0.39,0.36,2026-04-20,5,N,n,2.0NRT,290.1,4.2,N
+32.7000,35.3000,345.0,0.40,0.37,2026-04-20,1130,N,h,2.0NRT,295.0,12.8,D
+33.0000,34.3000,310.0,0.40,0.37,2026-04-20,1130,N,l,2.0NRT,288.0,1.5,D
+"""
+
+
+class FrozenDatetime(datetime):
+    """Datetime whose utcnow is fixed to the day after the sample detections."""
+
+    @classmethod
+    def utcnow(cls):
+        """Returns the frozen current time."""
+        return cls(2026, 4, 21, 9, 0)
+
+
+def test_bulk_ingestion_filters_and_skips_duplicates(app, monkeypatch):
+    """Tests that streamed NASA ingestion drops detections outside Israel's borders with the vectorized polygon test, parses HHMM acquisition times, records a per-source high-water mark, requests only the day window since that mark on the next cycle, and reports repeated detections as duplicates instead of inserting them twice."""
+    monkeypatch.setenv("NASA_FIRMS_KEY", "test-key")
+    monkeypatch.setattr(nasa_module, "datetime", FrozenDatetime)
+    requested_days = []
+
+    def handler(request):
+        requested_days.append(int(request.url.path.rsplit("/", 1)[-1]))
+        return httpx.Response(200, content=FIRMS_CSV.encode())
+
+    def run_with_mock_client(func, *args):
+        async def runner():
+            async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+                return await func(*args, client=client)
+        return asyncio.run(runner())
+
+    monkeypatch.setattr(nasa_module, "run_with_client", run_with_mock_client)
+    service = NasaIngestionService()
+    service.sources = ["VIIRS_SNPP_NRT"]
+
+    first = service.fetch_and_save_fires(days_back=5)
+    assert (first["new_fires_added"], first["duplicates_skipped"], first["outside_borders"]) == (2, 0, 1)
+    assert FirmsSourceState.query.one().last_detected_at == datetime(2026, 4, 20, 11, 30)
+
+    # Next cycle only asks for the days since the mark; the 00:05 row is older than the overlap and never re-inserted
+    second = service.fetch_and_save_fires(days_back=5)
+    assert requested_days == [5, 2]
+    assert (second["new_fires_added"], second["duplicates_skipped"]) == (0, 2)
+
+    stored = FireIncident.query.order_by(FireIncident.detected_at).all()
+    assert len(stored) == 2
+    assert stored[0].detected_at == datetime(2026, 4, 20, 0, 5)
+    assert (stored[1].frp, stored[1].confidence, stored[1].is_processed) == (12.8, "h", False)
+
+
+def test_late_granules_within_overlap_are_ingested(app, monkeypatch):
+    """Tests that a detection arriving after the high-water mark has moved past its acquisition time is still ingested when it lies within the overlap margin, while the rows stored on the previous cycle are reported as duplicates."""
+    monkeypatch.setenv("NASA_FIRMS_KEY", "test-key")
+    monkeypatch.setattr(nasa_module, "datetime", FrozenDatetime)
+    late_row = "31.5000,34.9000,335.0,0.39,0.36,2026-04-20,930,N,n,2.0NRT,291.0,6.1,D\n"
+    feeds = [FIRMS_CSV, FIRMS_CSV + late_row]
+
+    def handler(request):
+        return httpx.Response(200, content=feeds.pop(0).encode())
+
+    def run_with_mock_client(func, *args):
+        async def runner():
+            async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+                return await func(*args, client=client)
+        return asyncio.run(runner())
+
+    monkeypatch.setattr(nasa_module, "run_with_client", run_with_mock_client)
+    service = NasaIngestionService()
+    service.sources = ["VIIRS_SNPP_NRT"]
+
+    service.fetch_and_save_fires(days_back=5)
+    second = service.fetch_and_save_fires(days_back=5)
+
+    # 09:30 is two hours before the 11:30 mark, inside the default overlap
+    assert (second["new_fires_added"], second["duplicates_skipped"]) == (1, 2)
+    assert FireIncident.query.filter_by(detected_at=datetime(2026, 4, 20, 9, 30)).count() == 1
+    assert FirmsSourceState.query.one().last_detected_at == datetime(2026, 4, 20, 11, 30)
@@ -1,7 +1,16 @@
 import math
+import threading
+from datetime import datetime
 from unittest.mock import MagicMock
 
+import numpy as np
+
+import app.agents.predict_agent as predict_module
 from app.agents.predict_agent import FirePredictorAgent
+from app.extensions import db
+from app.models.fire_events import FireEvent
+from app.services.summary_queue import get_summary_queue
+from app.services.spread_engine import PREDICTION_HORIZONS_HOURS, build_spread_inputs, compute_spread
 
 
 class MockEvent:
@@ -104,3 +113,154 @@ def test_geometry_ellipse_creation():
     assert coords[0] == coords[-1]
     # Verify number of points: defined as 16 plus closing point equals 17
     assert len(coords) == 17
+
+
+def test_predictor_reuses_unchanged_predictions(app, monkeypatch):
+    """
+    Test that predictions are keyed on a fingerprint of their inputs. A second cycle with unchanged inputs reuses the
+    stored polygon and summary without calling the LLM or re-emitting, each horizon keeps its own prediction, and a
+    change in wind recomputes the event.
+    """
+    emitter = MagicMock()
+    monkeypatch.setattr(predict_module, "SocketIO", lambda *args, **kwargs: emitter)
+    predictor = FirePredictorAgent()
+    predictor.llm_agent = MagicMock()
+    llm_released = threading.Event()
+
+    def gated_summary(data):
+        """LLM stand-in that answers once the current cycle has finished, so the test database sees one writer at a time."""
+        assert llm_released.wait(timeout=5)
+        return {item["summary_id"]: "summary" for item in data}
+
+    predictor.llm_agent.summarize_predictions_batch.side_effect = gated_summary
+
+    event = FireEvent(latitude=32.0, longitude=35.0, detected_at=datetime.utcnow(), is_active=True,
+                      ims_wind_speed=5.0, ims_wind_dir=90, ims_temp=30.0, ims_humidity=30.0, ims_rain=0.0,
+                      fuel_load=1.0, topo_slope=5.0, topo_aspect=180.0)
+    db.session.add(event)
+    db.session.commit()
+
+    def run_cycle(target_hours):
+        """Runs one prediction cycle, then releases and waits for its background summary jobs."""
+        llm_released.clear()
+        predictor.run_cycle(target_hours=target_hours)
+        llm_released.set()
+        assert get_summary_queue().wait(timeout=5) == 0
+        db.session.expire_all()
+
+    run_cycle(1.0)
+    one_hour_polygon = event.prediction_polygon
+    emits_after_first_cycle = emitter.emit.call_count
+    run_cycle(1.0)
+    assert predictor.llm_agent.summarize_predictions_batch.call_count == 1
+    assert emitter.emit.call_count == emits_after_first_cycle
+    assert event.prediction_summary == "summary"
+
+    # A new horizon is computed once, after which the one-hour prediction is restored from the cache
+    run_cycle(6.0)
+    assert event.prediction_polygon != one_hour_polygon
+    run_cycle(1.0)
+    assert event.prediction_polygon == one_hour_polygon
+    assert predictor.llm_agent.summarize_predictions_batch.call_count == 2
+
+    event.ims_wind_speed = 9.0
+    db.session.commit()
+    run_cycle(1.0)
+    assert predictor.llm_agent.summarize_predictions_batch.call_count == 3
+
+
+def test_vectorized_engine_matches_single_event_predictions():
+    """
+    Test that the vectorized spread engine evaluates all events and all horizons in one pass with the same rate of
+    spread, risk level and ellipse as predicting each event and horizon on its own, and that long horizons are
+    time-decayed so the 12-hour ellipse is smaller than four times the 3-hour one.
+    """
+    predictor = FirePredictorAgent()
+    predictor.llm_agent = MagicMock()
+    events = [MockEvent(id=1), MockEvent(id=2, wind_speed=15.0, wind_dir=270.0, humidity=10.0, temp=35.0, slope=20.0,
+                                        aspect=180.0, fuel=2.5), MockEvent(id=3, rain=2.0)]
+
+    spread = compute_spread(build_spread_inputs([predictor._spread_inputs(event) for event in events]))
+    assert spread["vertices"].shape == (3, len(PREDICTION_HORIZONS_HOURS), 17, 2)
+    assert list(spread["risk_level"]) == ["MODERATE", "EXTREME", "LOW"]
+
+    for i, event in enumerate(events[:2]):
+        for j, hours in enumerate(PREDICTION_HORIZONS_HOURS):
+            predictor._calculate_and_update(event, target_hours=hours)
+            assert math.isclose(event.pred_ros, spread["ros_head"][i])
+            assert np.allclose(event.prediction_polygon["coordinates"][0], spread["vertices"][i, j])
+
+    lats = spread["vertices"][1, :, :, 1]
+    extent = lats.max(axis=1) - lats.min(axis=1)
+    assert extent[4] < 4 * extent[2]
+
+
+def test_predict_horizons_then_apply_each_window(app, monkeypatch):
+    """
+    Test that the master-cycle flow predicts every horizon up front into the prediction cache without touching the
+    event's live fields, summarizes all of them with one batched LLM call, and that applying a window puts that
+    horizon's polygon and summary on the event without recomputing it.
+    """
+    monkeypatch.setattr(predict_module, "SocketIO", lambda *args, **kwargs: MagicMock())
+    predictor = FirePredictorAgent()
+    predictor.llm_agent = MagicMock()
+    predictor.llm_agent.summarize_predictions_batch.side_effect = lambda data: {
+        item["summary_id"]: f"{item['predictions']['time_horizon_hours']}h" for item in data}
+
+    event = FireEvent(latitude=32.0, longitude=35.0, detected_at=datetime.utcnow(), is_active=True,
+                      ims_wind_speed=5.0, ims_wind_dir=90, ims_temp=30.0, ims_humidity=30.0, ims_rain=0.0,
+                      fuel_load=1.0, topo_slope=5.0, topo_aspect=180.0)
+    db.session.add(event)
+    db.session.commit()
+
+    predictor.predict_horizons(PREDICTION_HORIZONS_HOURS)
+    assert get_summary_queue().wait(timeout=5) == 0
+    assert predictor.llm_agent.summarize_predictions_batch.call_count == 1
+
+    # Predicting only fills the per-horizon cache; the live fields wait for a window to be applied
+    db.session.expire_all()
+    assert event.prediction_polygon is None
+    assert event.prediction_fingerprint is None
+    assert set(event.prediction_cache) == {str(float(h)) for h in PREDICTION_HORIZONS_HOURS}
+
+    predictor.apply_horizon(3.0)
+    assert event.prediction_summary == "3.0h"
+    three_hour_polygon = event.prediction_polygon
+    predictor.apply_horizon(1.0)
+    assert event.prediction_summary == "1.0h"
+    assert event.prediction_polygon != three_hour_polygon
+    assert predictor.llm_agent.summarize_predictions_batch.call_count == 1
+
+
+def test_prediction_does_not_wait_for_llm_summary(app, monkeypatch):
+    """
+    Test that predictions are saved and applied while the LLM summary is still being generated, and that the summary
+    is written back to the event and broadcast via prediction_update once the background job finishes.
+    """
+    emitter = MagicMock()
+    monkeypatch.setattr(predict_module, "SocketIO", lambda *args, **kwargs: emitter)
+    llm_released = threading.Event()
+
+    def slow_summary(data):
+        """LLM stand-in that blocks until the test releases it."""
+        assert llm_released.wait(timeout=5)
+        return {item["summary_id"]: "late summary" for item in data}
+
+    predictor = FirePredictorAgent()
+    predictor.llm_agent = MagicMock()
+    predictor.llm_agent.summarize_predictions_batch.side_effect = slow_summary
+
+    event = FireEvent(latitude=32.0, longitude=35.0, detected_at=datetime.utcnow(), is_active=True, fuel_load=1.0)
+    db.session.add(event)
+    db.session.commit()
+    event_id = event.id
+
+    predictor.run_cycle(target_hours=1.0)
+    assert event.prediction_polygon is not None
+    assert event.prediction_summary == predict_module.SUMMARY_PENDING_TEXT
+
+    llm_released.set()
+    assert get_summary_queue().wait(timeout=5) == 0
+    db.session.expire_all()
+    assert db.session.get(FireEvent, event_id).prediction_summary == "late summary"
+    assert emitter.emit.call_args.args[1]["prediction_summary"] == "late summary"
@@ -0,0 +1,142 @@
+import asyncio
+import math
+
+import httpx
+import numpy as np
+
+import app.agents.topo_agent as topo_module
+from app.agents.topo_agent import enrich_events_with_topography
+from app.geo.terrain import slope_aspect_deg
+from app.services.dem_store import METERS_PER_DEGREE, DemStore
+from app.services.http_client import AsyncHttpClient
+
+
+class MockFireEvent:
+    """Minimal fire event carrying only the fields the topography agent reads and writes."""
+
+    def __init__(self, id, lat, lon):
+        """Initialize a mock event at the given coordinates with empty topography fields."""
+        self.id = id
+        self.latitude = lat
+        self.longitude = lon
+        self.topo_elevation = None
+        self.topo_slope = None
+        self.topo_aspect = None
+
+
+def _fake_elevation(lat, lon):
+    """Synthetic terrain: a tilted plane whose slope changes with longitude, so every event has a different stencil."""
+    return 100.0 + (lat - 31.0) * 20000.0 + (lon - 34.0) * 15000.0 * (lon - 34.0)
+
+
+def _scalar_slope_aspect(e):
+    """Reference per-event slope/aspect formula from the original single-event topography agent."""
+    dz_dx = (e[3] - e[4]) / 60.0
+    dz_dy = (e[1] - e[2]) / 60.0
+    slope = round(math.degrees(math.atan(math.sqrt(dz_dx ** 2 + dz_dy ** 2))), 1)
+    aspect = 0
+    if dz_dx != 0:
+        aspect = math.degrees(math.atan2(dz_dy, -dz_dx))
+        aspect = aspect + 90 if aspect < 0 else 360 - aspect + 90
+        aspect = round(aspect % 360, 0)
+    return slope, aspect
+
+
+def test_topography_batches_stencils_and_retries_whole_batch(monkeypatch):
+    """Tests that 45 events are packed into 3 OpenTopoData requests of at most 100 locations, that a 429 is retried once for the whole batch, and that the vectorized slope/aspect match the original scalar formula."""
+    requests_seen = []
+
+    def handler(request):
+        locations = request.url.params["locations"].split("|")
+        requests_seen.append(len(locations))
+        # The very first request is rate limited
+        if len(requests_seen) == 1:
+            return httpx.Response(429)
+
+        results = []
+        for loc in locations:
+            lat, lon = map(float, loc.split(","))
+            results.append({"elevation": _fake_elevation(lat, lon)})
+        return httpx.Response(200, json={"results": results})
+
+    monkeypatch.setattr(topo_module, "get_dem_store", lambda: None)
+    events = [MockFireEvent(i, 31.0 + i * 0.05, 34.5 + i * 0.02) for i in range(45)]
+
+    async def scenario():
+        async with AsyncHttpClient(backoff_base=0.0, host_intervals={}, transport=httpx.MockTransport(handler)) as client:
+            await enrich_events_with_topography(events, client)
+
+    asyncio.run(scenario())
+
+    assert len(requests_seen) == 4, "Expected 3 batched requests plus one retry of the rate-limited batch!"
+    assert max(requests_seen) <= 100 and sum(requests_seen[1:]) == 45 * 5
+
+    for event in events:
+        offset = 0.0003
+        stencil = [_fake_elevation(lat, lon) for lat, lon in [
+            (event.latitude, event.longitude), (event.latitude + offset, event.longitude),
+            (event.latitude - offset, event.longitude), (event.latitude, event.longitude + offset),
+            (event.latitude, event.longitude - offset)]]
+        assert (event.topo_slope, event.topo_aspect) == _scalar_slope_aspect(stencil)
+        assert event.topo_elevation == stencil[0]
+
+
+def _write_plane_tile(directory, size=121):
+    """Writes a synthetic N31E034 SRTM tile of a tilted plane (rising to the north, falling to the east) with one void cell, and returns the plane's height function."""
+    def plane(lat, lon):
+        return 500.0 + 2400.0 * (lat - 31.0) - 1200.0 * (lon - 34.0)
+
+    step = 1.0 / (size - 1)
+    lats = 32.0 - np.arange(size) * step
+    lons = 34.0 + np.arange(size) * step
+    heights = np.rint(plane(lats[:, np.newaxis], lons[np.newaxis, :])).astype('>i2')
+    heights[10, 10] = -32768
+    heights.tofile(str(directory / "N31E034.hgt"))
+    return plane
+
+
+def test_local_dem_store_and_api_fallback(tmp_path, monkeypatch):
+    """Tests that the memory-mapped DEM store interpolates heights bilinearly, derives the analytic slope/aspect of a plane both on the fly and from precomputed grids, reports voids and uncovered points as NaN, and that the topography agent only calls the API for events outside coverage."""
+    plane = _write_plane_tile(tmp_path)
+    store = DemStore.load(str(tmp_path))
+
+    lats = np.array([31.4012, 31.7777, 33.5, 32.0 - 10.3 / 120])
+    lons = np.array([34.2345, 34.9001, 34.5, 34.0 + 10.3 / 120])
+    elevation, slope, aspect = store.sample(lats, lons)
+
+    expected_slope, expected_aspect = slope_aspect_deg(-1200.0 / (METERS_PER_DEGREE * np.cos(np.radians(lats[:2]))),
+                                                       2400.0 / METERS_PER_DEGREE)
+    assert np.allclose(elevation[:2], plane(lats[:2], lons[:2]), atol=1.0)
+    assert np.allclose(slope[:2], expected_slope, atol=0.05)
+    assert np.allclose(aspect[:2], expected_aspect, atol=0.5)
+    assert np.isnan(elevation[2]), "Points outside the tiles must not be covered!"
+    assert np.isnan(elevation[3]), "Interpolation next to a void must be NaN!"
+
+    # Precomputed grids are saved, memory-mapped on reload, and agree with the on-the-fly stencil
+    store.precompute_slope_aspect()
+    reloaded = DemStore.load(str(tmp_path))
+    assert reloaded.tiles[(31, 34)].slope is not None
+    _, pre_slope, pre_aspect = reloaded.sample(lats[:2], lons[:2])
+    assert np.allclose(pre_slope, slope[:2], atol=0.05) and np.allclose(pre_aspect, aspect[:2], atol=0.5)
+
+    # Only the uncovered event reaches the API
+    requests_seen = []
+
+    def handler(request):
+        locations = request.url.params["locations"].split("|")
+        requests_seen.append(len(locations))
+        return httpx.Response(200, json={"results": [{"elevation": 50.0}] * len(locations)})
+
+    monkeypatch.setattr(topo_module, "get_dem_store", lambda: reloaded)
+    covered = MockFireEvent(1, 31.4012, 34.2345)
+    outside = MockFireEvent(2, 33.5, 34.5)
+
+    async def scenario():
+        async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+            await enrich_events_with_topography([covered, outside], client)
+
+    asyncio.run(scenario())
+
+    assert requests_seen == [5], "Covered events must not be sent to the topography API!"
+    assert covered.topo_slope == round(float(pre_slope[0]), 1)
+    assert outside.topo_elevation == 50.0 and outside.topo_slope == 0.0
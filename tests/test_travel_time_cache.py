@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock
+
+from app.agents.commander_agent import CommanderAgent
+from app.models.fire_events import FireEvent
+from app.models.resources import Resource
+from app.services.travel_time_cache import TravelTimeCache
+
+
+def test_eta_matrix_requests_only_missing_pairs(app):
+    """Tests that the ETA matrix reuses cached station/fire cells on repeated horizons, that a fire which moved a few hundred meters still hits the snapped cache cell, and that only the new fire is sent to the routing server."""
+    commander = CommanderAgent()
+    commander._fetch_osrm_table = MagicMock(side_effect=lambda sources, dests: [[600.0] * len(dests) for _ in sources])
+
+    station_a = Resource(id=1, resource_type='SAAR', current_lat=32.10, current_lon=34.80)
+    station_b = Resource(id=2, resource_type='ROTEM', current_lat=31.80, current_lon=35.20)
+    fire_1 = FireEvent(id=10, latitude=32.0, longitude=35.0)
+
+    # First horizon fetches the full matrix from the routing server
+    matrix = commander._get_eta_matrix([station_a, station_b], [fire_1])
+    assert matrix[1][10] == 600.0 / 3600.0
+    assert commander._fetch_osrm_table.call_count == 1
+
+    # Repeated horizon with the fire moved ~100 meters is served entirely from the cache
+    fire_1.latitude += 0.001
+    commander._get_eta_matrix([station_a, station_b], [fire_1])
+    assert commander._fetch_osrm_table.call_count == 1, "Cached cells were requested again!"
+
+    # A new fire only requests the missing column
+    fire_2 = FireEvent(id=11, latitude=30.6, longitude=34.8)
+    matrix = commander._get_eta_matrix([station_a, station_b], [fire_1, fire_2])
+    sources, destinations = commander._fetch_osrm_table.call_args[0]
+    assert len(sources) == 2 and destinations == [(34.8, 30.6)]
+    assert matrix[2][11] == 600.0 / 3600.0
+
+
+def test_travel_time_cache_lru_eviction(app):
+    """Tests that the cache stores 'no road' answers, and evicts the least recently used pairs once the size limit is exceeded."""
+    cache = TravelTimeCache(grid_deg=0.01, ttl_hours=1, max_entries=2)
+
+    key_a = cache.key_for(32.0, 34.8, 31.0, 35.0)
+    key_b = cache.key_for(32.0, 34.8, 31.5, 35.0)
+    key_c = cache.key_for(32.0, 34.8, 30.5, 35.0)
+
+    cache.put_many({key_a: 100.0, key_b: None})
+    assert cache.get_many([key_a, key_b]) == {key_a: 100.0, key_b: None}
+
+    # Touch A so B becomes the least recently used entry, then overflow the cache
+    cache.get_many([key_a])
+    cache.put_many({key_c: 300.0})
+
+    assert cache.get_many([key_a, key_b, key_c]) == {key_a: 100.0, key_c: 300.0}
+
+
+def test_travel_times_are_chunked_to_server_limit():
+    """Tests that a large cycle-wide table is split into OSRM requests that never exceed the server coordinate limit, while still covering every source/destination pair exactly once."""
+    commander = CommanderAgent()
+    commander._fetch_osrm_table = MagicMock(side_effect=lambda sources, dests: [[60.0] * len(dests) for _ in sources])
+
+    sources = [(34.0 + i * 0.001, 31.0) for i in range(150)]
+    destinations = [(35.0, 32.0 + j * 0.001) for j in range(60)]
+
+    fetched = commander._fetch_travel_times(sources, destinations)
+
+    assert len(fetched) == 150 * 60
+    for call in commander._fetch_osrm_table.call_args_list:
+        chunk_sources, chunk_dests = call[0]
+        assert len(chunk_sources) + len(chunk_dests) <= 100, "Request exceeded the OSRM coordinate limit!"
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+
+from app.agents.open_weather_map_agent import WeatherFieldCache, WeatherService
+from app.services.http_client import AsyncHttpClient
+
+
+class MockFireEvent:
+    """Minimal fire event carrying only the fields the weather agent reads and writes."""
+
+    def __init__(self, id, lat, lon):
+        """Initialize a mock event at the given coordinates."""
+        self.id = id
+        self.latitude = lat
+        self.longitude = lon
+
+
+def test_weather_field_prefetches_grid_nodes_and_interpolates(monkeypatch):
+    """Tests that fires sharing a grid cell cost a single request for the cell centre rather than one per fire, that a second batch within the TTL needs no requests, that a fire whose surrounding nodes are not all cached takes the nearest cached node, and that between four cached cell centres temperature is bilinearly interpolated while wind is averaged through u/v components."""
+    monkeypatch.setenv("OPENWEATHER_KEY", "test-key")
+    requests_seen = []
+
+    def handler(request):
+        lat = float(request.url.params["lat"])
+        lon = float(request.url.params["lon"])
+        requests_seen.append((lat, lon))
+        # Temperature rises linearly to the north; the wind blows from the west in the south and the north in the north
+        deg = 270 if lat < 32.1 else 0
+        return httpx.Response(200, json={"wind": {"speed": 4.0, "deg": deg},
+                                         "main": {"temp": 20.0 + (lat - 32.0) * 100.0, "humidity": 40}})
+
+    service = WeatherService(field_cache=WeatherFieldCache(grid_deg=0.1, ttl_seconds=600))
+    events = [MockFireEvent(i, 32.01 + i * 0.008, 34.81 + i * 0.008) for i in range(10)]
+
+    async def scenario(targets):
+        async with AsyncHttpClient(transport=httpx.MockTransport(handler)) as client:
+            return await service.update_weather_for_events(targets, client)
+
+    assert asyncio.run(scenario(events)) == 10
+    assert requests_seen == [(32.05, 34.85)], "Ten fires in one grid cell should cost only its centre node!"
+
+    assert asyncio.run(scenario(events[:3])) == 3
+    assert len(requests_seen) == 1, "Cached grid nodes should not be requested again!"
+
+    # Only the fire's own cell is cached, so it takes the cell-centre observation
+    assert events[0].owm_temperature == 25.0
+    assert events[0].owm_humidity == 40
+
+    # Fires in the three neighbouring cells complete the four centres around (32.10, 34.90)
+    neighbours = [MockFireEvent(10, 32.15, 34.85), MockFireEvent(11, 32.05, 34.95), MockFireEvent(12, 32.15, 34.95)]
+    asyncio.run(scenario(neighbours))
+    assert len(requests_seen) == 4
+
+    middle = MockFireEvent(13, 32.08, 34.90)
+    asyncio.run(scenario([middle]))
+    assert len(requests_seen) == 4
+    assert abs(middle.owm_temperature - (20.0 + (middle.latitude - 32.0) * 100.0)) < 0.01
+
+    # Halfway between westerly and northerly 4 m/s winds, the u/v average blows from the north-west
+    halfway = MockFireEvent(99, 32.10, 34.90)
+    asyncio.run(scenario([halfway]))
+    assert halfway.owm_wind_deg == 315
+    assert abs(halfway.owm_wind_speed - 4.0 * 2 ** 0.5 / 2) < 0.01